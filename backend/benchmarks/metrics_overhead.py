@@ -0,0 +1,129 @@
+"""
+Surcoût de l'instrumentation /metrics (middleware + événements SQL).
+
+Démarre deux serveurs uvicorn identiques sur la même base SQLite
+temporaire, l'un avec METRICS_ENABLED=false, l'autre avec true, puis
+alterne les mesures (A, B, A, B...) pour lisser le bruit de la machine.
+Affiche le débit médian et le p50 / p99 de chaque configuration, puis
+le coût absolu du middleware mesuré en isolation (le bruit d'un serveur
+réel dépasse souvent l'effet mesuré).
+
+Usage :
+    uv run python benchmarks/metrics_overhead.py --rounds 5 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from concurrency import _free_port, percentile, seed, start_server
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+async def measure(base_url: str, ids: list, n_requests: int, concurrency: int):
+    """Débit (req/s) et latences triées pour n_requests réparties sur `concurrency` clients."""
+    latencies: list = []
+
+    async def worker(client, offset):
+        for i in range(offset, n_requests, concurrency):
+            url = f"/tasks/{ids[i % len(ids)]}" if i % 2 else f"/tasks?assignee=user{i % 10}"
+            start = time.perf_counter()
+            resp = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, c) for c in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return n_requests / elapsed, latencies
+
+
+async def run(urls: dict, rounds: int, n_requests: int, concurrency: int, seed_count: int):
+    async with httpx.AsyncClient(base_url=urls["off"], timeout=60) as client:
+        ids = await seed(client, seed_count)
+
+    results = {name: {"throughput": [], "latencies": []} for name in urls}
+    for name, url in urls.items():               # échauffement
+        await measure(url, ids, n_requests // 10, concurrency)
+    for _ in range(rounds):
+        for name, url in urls.items():
+            throughput, latencies = await measure(url, ids, n_requests, concurrency)
+            results[name]["throughput"].append(throughput)
+            results[name]["latencies"].extend(latencies)
+
+    for name, result in results.items():
+        latencies = sorted(result["latencies"])
+        print(f"metrics={name:<3} throughput={statistics.median(result['throughput']):.0f} req/s "
+              f"p50={percentile(latencies, 50) * 1000:.2f}ms p99={percentile(latencies, 99) * 1000:.2f}ms")
+    off = statistics.median(results["off"]["throughput"])
+    on = statistics.median(results["on"]["throughput"])
+    print(f"overhead={100 * (off - on) / off:+.1f}% (throughput, median of {rounds} rounds)")
+
+
+def middleware_cost(iterations: int = 20000) -> float:
+    """Coût (µs) du MetricsMiddleware par requête, autour d'une app ASGI vide."""
+    from src.app import app
+    from src.metrics import MetricsMiddleware, MetricsRegistry
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def timed(handler):
+        scope = {"type": "http", "method": "GET", "path": "/tasks/0b5c", "root_path": "",
+                 "query_string": b"", "headers": []}
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await handler(dict(scope), None, send)
+        return (time.perf_counter() - start) / iterations
+
+    async def compare():
+        instrumented = MetricsMiddleware(endpoint, MetricsRegistry(), app.routes)
+        return await timed(instrumented) - await timed(endpoint)
+
+    return asyncio.run(compare()) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000, help="requêtes par manche")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=200, help="tâches insérées")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/bench.db"
+        # cache désactivé : chaque requête passe par la base et donc par les événements SQL
+        ports = {"off": _free_port(), "on": _free_port()}
+        procs = [
+            start_server(database_url, ports[name], METRICS_ENABLED=str(name == "on").lower(),
+                         CACHE_BACKEND="none")
+            for name in ports
+        ]
+        try:
+            urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+            asyncio.run(run(urls, args.rounds, args.requests, args.concurrency, args.seed))
+        finally:
+            for proc in procs:
+                proc.terminate()
+                proc.wait()
+
+    print(f"middleware cost={middleware_cost():.1f}µs per request (route matching + histograms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark de la sérialisation des listes de tâches.
+
+Compare, pour 1k, 10k et 100k lignes d'une base SQLite temporaire :
+
+    orm       select(TaskModel) + TypeAdapter(List[Task]).validate_python
+              (from_attributes) + dump_json : l'ancien chemin de GET /tasks
+    rows      select(*TASK_COLUMNS) + serialization.dump_rows (orjson)
+    rows-pyd  idem avec le repli pydantic-core (sans orjson)
+
+Chaque mesure est le meilleur temps de --repeat exécutions, lecture SQL
+comprise (la construction des objets ORM fait partie du coût évité), puis
+le temps d'encodage seul. Les corps produits sont vérifiés identiques.
+
+Usage :
+    uv run python benchmarks/serialization.py
+    uv run python benchmarks/serialization.py --rows 1000 10000 100000 --repeat 5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import Session
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src import serialization  # noqa: E402
+from src.app import Task  # noqa: E402
+from src.database import Base  # noqa: E402
+from src.ids import new_task_id  # noqa: E402
+from src.models import TaskModel, TaskPriority, TaskStatus  # noqa: E402
+from src.serialization import TASK_COLUMNS, dump_rows  # noqa: E402
+
+TASK_LIST_ADAPTER = TypeAdapter(List[Task])
+
+
+def seed(engine, rows: int):
+    statuses, priorities = list(TaskStatus), list(TaskPriority)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(delete(TaskModel))
+        conn.execute(insert(TaskModel), [{
+            "id": new_task_id(),
+            "title": f"Benchmark task {i}",
+            "description": "Sérialisation d'une liste de tâches" if i % 2 else None,
+            "status": statuses[i % len(statuses)],
+            "priority": priorities[i % len(priorities)],
+            "assignee": f"user{i % 50}" if i % 5 else None,
+            "due_date": start + timedelta(days=i % 30) if i % 4 == 0 else None,
+            "created_at": start + timedelta(seconds=i),
+            "updated_at": start + timedelta(seconds=i),
+            "version": 1,
+        } for i in range(rows)])
+
+
+def best_of(repeat: int, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(session: Session, repeat: int) -> dict:
+    def fetch_orm():
+        session.expunge_all()   # pas d'identity map réutilisée d'une mesure à l'autre
+        return session.scalars(select(TaskModel).order_by(TaskModel.created_at, TaskModel.id)).all()
+
+    def fetch_rows():
+        return session.execute(select(*TASK_COLUMNS).order_by(TaskModel.created_at, TaskModel.id)).all()
+
+    def encode_orm(tasks):
+        return TASK_LIST_ADAPTER.dump_json(TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True))
+
+    tasks, rows = fetch_orm(), fetch_rows()
+    results = {}
+    results["orm"] = best_of(repeat, lambda: encode_orm(fetch_orm())), best_of(repeat, lambda: encode_orm(tasks))
+    encoders = {"rows": serialization.orjson, "rows-pyd": None}
+    if serialization.orjson is None:
+        del encoders["rows"]
+    for name, module in encoders.items():
+        serialization.orjson = module
+        results[name] = best_of(repeat, lambda: dump_rows(fetch_rows())), best_of(repeat, lambda: dump_rows(rows))
+
+    bodies = {name: total[1] for name, (total, _) in results.items()}
+    assert len(set(bodies.values())) == 1, "serialised bodies differ"
+    return {name: (total[0], encode[0]) for name, (total, encode) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    orjson = serialization.orjson
+
+    print(f"{'rows':>7} {'path':<9} {'fetch+encode ms':>16} {'encode ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/serialization.db")
+        Base.metadata.create_all(engine)
+        for rows in args.rows:
+            seed(engine, rows)
+            with Session(engine) as session:
+                results = measure(session, args.repeat)
+            serialization.orjson = orjson
+            reference = results["orm"][0]
+            for name, (total, encode) in results.items():
+                print(f"{rows:>7} {name:<9} {total * 1000:>16.1f} {encode * 1000:>10.1f} "
+                      f"{reference / total:>7.1f}x")
+        engine.dispose()
+    if orjson is None:
+        print("orjson not installed: only the pydantic-core fallback was measured")
+
+
+if __name__ == "__main__":
+    main()
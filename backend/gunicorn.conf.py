@@ -0,0 +1,37 @@
+"""
+Configuration gunicorn : workers uvicorn, application préchargée avant le fork.
+
+    gunicorn -c gunicorn.conf.py src.app:app
+
+Mêmes variables que `python -m src.server` (voir src/server.py).
+Nécessite l'extra `gunicorn` (gunicorn + uvicorn-worker).
+"""
+
+import os
+
+# Avant le préchargement de l'application : les workers ne lancent pas init_db
+os.environ["DB_INIT_ON_STARTUP"] = "false"
+
+from src import server  # noqa: E402
+
+bind = f"{server.HOST}:{server.PORT}"
+workers = server.WORKERS
+# Workers uvicorn ; uvloop / httptools choisis automatiquement s'ils sont installés
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = server.GRACEFUL_TIMEOUT
+keepalive = server.KEEPALIVE
+loglevel = server.LOG_LEVEL
+
+
+def on_starting(arbiter):
+    server.check_workers(arbiter.num_workers)
+    server.prepare_database()
+
+
+def post_fork(arbiter, worker):
+    # pool hérité du parent : oublié sans fermer les connexions du parent
+    from src.database import engine, read_router
+    engine.sync_engine.dispose(close=False)
+    for replica in read_router.engines if read_router else []:
+        replica.sync_engine.dispose(close=False)
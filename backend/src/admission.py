@@ -0,0 +1,363 @@
+"""
+Contrôle d'admission : délestage avant que les requêtes ne s'empilent
+derrière le pool de connexions.
+
+- `AdaptiveLimit` : limite de requêtes simultanées par classe de routes
+  (lectures : GET / HEAD, écritures : le reste), ajustée en AIMD. Elle
+  monte d'un cran quand elle est réellement utilisée et que la latence
+  reste sous ADMISSION_TARGET_LATENCY_MS ; elle baisse de 10 % si la
+  latence moyenne dépasse la cible ou si un checkout du pool a expiré
+  pendant la requête (au plus une baisse par fenêtre de latence cible).
+  Au-delà de la limite, les requêtes attendent dans une file bornée
+  (ADMISSION_QUEUE_SIZE) au plus ADMISSION_QUEUE_TIMEOUT secondes ; file
+  pleine ou délai dépassé : 503 immédiat avec Retry-After.
+- `RateLimiter` : seau à jetons par client (RATE_LIMIT_RPS, RATE_LIMIT_BURST),
+  429 avec Retry-After. Stockage en mémoire par worker (`MemoryBucketStore`)
+  ou partagé entre workers (`RedisBucketStore`, script Lua atomique).
+- `AdmissionMiddleware` (ASGI pur) : applique les deux et renvoie un 503
+  (au lieu d'un 500) quand une requête échoue sur un timeout du pool.
+
+Chaque worker a ses propres limites, comme il a son propre pool. Les sondes
+(/health*, /metrics, /admission/stats) et la documentation ne sont jamais
+limitées ; le flux /tasks/stream (connexions longues, sans base) ne prend
+pas de place dans les limites de concurrence.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.responses import JSONResponse
+
+from .cache import RedisBackend
+
+logger = logging.getLogger("taskflow")
+
+# Jamais limités (sondes, métriques, état du délestage, documentation)
+UNLIMITED_PATHS = ("/health", "/metrics", "/admission", "/docs", "/redoc", "/openapi.json")
+# Connexions longues sans base : soumises au débit, pas à la concurrence
+LONG_LIVED_PATHS = ("/tasks/stream",)
+READ_METHODS = {"GET", "HEAD"}
+
+# Baisse multiplicative de la limite en cas de surcharge
+BACKOFF = 0.9
+# Poids d'une nouvelle mesure dans la latence moyenne (moyenne mobile exponentielle)
+LATENCY_SMOOTHING = 0.2
+
+
+class AdaptiveLimit:
+    """Limite de concurrence AIMD et file d'attente FIFO bornée."""
+
+    def __init__(self, initial: float, min_limit: int = 2, max_limit: int = 100,
+                 queue_size: int = 100, queue_timeout: float = 2.0, target_latency: float = 0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.admitted = 0
+        self.decreases = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0, "pool_timeout": 0}
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> Optional[str]:
+        """Prend une place ; renvoie None, ou le motif du refus."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected["queue_timeout"] += 1
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            # client parti : la place reçue entre-temps est rendue
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._discard(waiter)
+            raise
+        self.admitted += 1
+        return None
+
+    def release(self, latency: float, overloaded: bool = False):
+        """Libère une place et ajuste la limite (`latency` : hors attente en file)."""
+        saturated = self.in_flight * 2 >= self.limit
+        self.in_flight -= 1
+        self.latency = latency if self.latency is None else (
+            (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * latency)
+        if overloaded or self.latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * BACKOFF)
+                self.decreases += 1
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "decreases": self.decreases,
+            "latency_ms": round(self.latency * 1000, 3) if self.latency is not None else None,
+        }
+
+    def _wake(self):
+        """Passe les places libres aux premiers de la file (la place est transmise)."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+# =============================================================================
+# LIMITATION DE DÉBIT PAR CLIENT
+# =============================================================================
+
+class MemoryBucketStore:
+    """Seaux à jetons en mémoire (un jeu par worker), au plus `max_clients` (LRU)."""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Consomme un jeton : (accepté, secondes avant le prochain jeton)."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Lecture, remplissage et consommation en une seule opération atomique côté Redis.
+# Le nombre de jetons est renvoyé en texte (Redis tronque les nombres Lua en entiers).
+TOKEN_BUCKET_SCRIPT = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Seaux à jetons partagés par les workers (clé `ratelimit:<client>` par client)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        allowed, tokens = await self.backend.eval(
+            TOKEN_BUCKET_SCRIPT, [f"ratelimit:{key}"], rate, burst, f"{time.time():.6f}")
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+
+class RateLimiter:
+    """Seau à jetons par client ; une erreur du stockage laisse passer la requête."""
+
+    def __init__(self, store, rate: float, burst: int):
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.limited = 0
+        self.errors = 0
+
+    async def check(self, client: str) -> float:
+        """0 si la requête passe, sinon le délai (secondes) avant de réessayer."""
+        try:
+            allowed, retry_after = await self.store.take(client, self.rate, self.burst)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Rate limit store error: %s", e)
+            return 0.0
+        if allowed:
+            return 0.0
+        self.limited += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "store": type(self.store).__name__,
+            "rate": self.rate,
+            "burst": self.burst,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+class AdmissionControl:
+    """Limites par classe de routes (read / write) et limiteur de débit optionnel."""
+
+    def __init__(self, limits: Dict[str, AdaptiveLimit], rate_limiter: Optional[RateLimiter] = None,
+                 pool_timeouts: Callable[[], int] = lambda: 0, retry_after: int = 1,
+                 client_header: Optional[str] = None, enabled: bool = True):
+        self.limits = limits
+        self.rate_limiter = rate_limiter
+        self.pool_timeouts = pool_timeouts
+        self.retry_after = retry_after
+        self.client_header = client_header.lower().encode() if client_header else None
+        self.enabled = enabled
+
+    def client_key(self, scope) -> str:
+        """Identifiant du client : en-tête configuré (1re valeur), sinon adresse du pair."""
+        if self.client_header:
+            for name, value in scope.get("headers", []):
+                if name == self.client_header:
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "classes": {name: limit.stats() for name, limit in self.limits.items()},
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter else None,
+        }
+
+
+def _reject(status: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : débit par client, puis place dans la limite de la classe."""
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        control = self.control
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(UNLIMITED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        if control.rate_limiter is not None:
+            retry_after = await control.rate_limiter.check(control.client_key(scope))
+            if retry_after:
+                await _reject(429, "Rate limit exceeded", retry_after)(scope, receive, send)
+                return
+
+        if not control.enabled or path.startswith(LONG_LIVED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        limit = control.limits["read" if scope["method"] in READ_METHODS else "write"]
+        refused = await limit.acquire()
+        if refused:
+            await _reject(503, "Server overloaded, retry later", control.retry_after)(scope, receive, send)
+            return
+
+        timeouts = control.pool_timeouts()
+        start = time.perf_counter()
+        latency = None
+        started = False
+
+        async def send_and_time(message):
+            nonlocal latency, started
+            if message["type"] == "http.response.start":
+                started = True
+                latency = time.perf_counter() - start   # jusqu'au premier octet (flux : export)
+            await send(message)
+
+        pool_timeout = False
+        try:
+            await self.app(scope, receive, send_and_time)
+        except PoolTimeoutError:
+            pool_timeout = True
+            if started:
+                raise
+            limit.rejected["pool_timeout"] += 1
+            await _reject(503, "Database busy, retry later", control.retry_after)(scope, receive, send)
+        finally:
+            overloaded = pool_timeout or control.pool_timeouts() != timeouts
+            limit.release(latency if latency is not None else time.perf_counter() - start, overloaded)
+
+
+def build_admission(pool_capacity: int, pool_timeouts: Callable[[], int]) -> AdmissionControl:
+    """Construit le contrôle d'admission à partir des variables d'environnement.
+
+    La limite initiale de chaque classe vaut par défaut la capacité du pool
+    (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    """
+    limits = {
+        name: AdaptiveLimit(
+            initial=float(os.getenv("ADMISSION_INITIAL_LIMIT", str(pool_capacity))),
+            min_limit=int(os.getenv("ADMISSION_MIN_LIMIT", "2")),
+            max_limit=int(os.getenv("ADMISSION_MAX_LIMIT", "100")),
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "100")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2")),
+            target_latency=float(os.getenv("ADMISSION_TARGET_LATENCY_MS", "500")) / 1000,
+        )
+        for name in ("read", "write")
+    }
+    rate = float(os.getenv("RATE_LIMIT_RPS", "0"))
+    rate_limiter = None
+    if rate > 0:
+        if os.getenv("RATE_LIMIT_BACKEND", "memory").lower() == "redis":
+            url = os.getenv("RATE_LIMIT_URL") or os.getenv("CACHE_URL", "redis://localhost:6379/0")
+            store = RedisBucketStore(RedisBackend(url))
+        else:
+            store = MemoryBucketStore(int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000")))
+        rate_limiter = RateLimiter(store, rate, int(os.getenv("RATE_LIMIT_BURST", str(max(1, math.ceil(rate * 2))))))
+    return AdmissionControl(
+        limits,
+        rate_limiter,
+        pool_timeouts=pool_timeouts,
+        retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", "1")),
+        client_header=os.getenv("RATE_LIMIT_CLIENT_HEADER") or None,
+        enabled=os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes", "on"),
+    )
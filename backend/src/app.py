@@ -7,19 +7,65 @@ TP 1 & 2: Uses in-memory storage for simplicity
 TP 3: Will introduce PostgreSQL database (see migration guide)
 """
 
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import List, Literal, Optional, Dict
+from datetime import datetime, timezone
 from enum import Enum
-from fastapi import FastAPI, HTTPException, Response
-from pydantic import BaseModel, Field
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
 import logging
 from contextlib import asynccontextmanager
-import uuid
+import asyncio
+import csv
+import io
+import json
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from .database import get_db, init_db
-from .models import TaskModel, TaskStatus, TaskPriority
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, delete, func, insert, select, union_all, update
+from .admission import AdmissionMiddleware, build_admission
+from .archive import ARCHIVE_ENABLED, ARCHIVE_INTERVAL_SECONDS, archive_periodically
+from .batching import WRITE_BATCHING, WriteBatcher
+from .cache import build_cache
+from .changes import allocate_change_seqs, changes_since, record_deletions
+from .database import (
+    INIT_ON_STARTUP,
+    POOL_MAX_OVERFLOW,
+    POOL_SIZE,
+    ReadYourWritesMiddleware,
+    close_db,
+    engine,
+    get_db,
+    get_read_db,
+    init_db,
+    monitor_replicas,
+    pool_stats,
+    pool_timeouts,
+    read_router,
+    reads_from_replica,
+    reads_own_writes,
+    replica_stats,
+)
+from .etags import if_match_versions, if_none_match, list_etag, task_etag
+from .events import CLOSED, RESYNC, build_event_hub, sse_stream
+from .ids import new_task_id
+from .health import TaskCounter, check_database, refresh_periodically
+from .metrics import MetricsMiddleware, instrument_engine, metrics
+from .profiling import SQL_PROFILING, ProfilingMiddleware, profile_engine
+from .search import search_query, search_terms
+from .serialization import TASK_COLUMNS, dump_rows
+from .models import ArchivedTaskModel, TaskModel, TaskStatus, TaskPriority
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursor,
+    after_cursor,
+    decode_change_cursor,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_change_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+)
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -72,6 +118,54 @@ class Task(BaseModel):
         from_attributes = True  # permet de lire un objet SQLAlchemy
 
 
+# Sérialiseur précompilé : ORM -> octets JSON (mis en cache tels quels).
+# Les listes passent par serialization.dump_rows (tuples, sans revalidation).
+TASK_ADAPTER = TypeAdapter(Task)
+# Table des tâches pour les écritures Core (... RETURNING)
+TASKS = TaskModel.__table__
+
+
+# Nombre maximum d'éléments par requête bulk
+MAX_BULK_ITEMS = 5000
+
+
+class BulkTaskUpdate(TaskUpdate):
+    """One item of PATCH /tasks/bulk: the task id plus the fields to change."""
+    id: str
+
+
+class BulkTaskDelete(BaseModel):
+    """Body of DELETE /tasks/bulk."""
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    """Per-item outcome of a bulk operation (status mirrors the single-item endpoint)."""
+    index: int
+    id: Optional[str] = None
+    status: int
+    task: Optional[Task] = None
+    detail: Optional[str] = None
+
+
+class TaskStats(BaseModel):
+    """Dashboard counters computed server-side."""
+    total: int
+    by_status: Dict[TaskStatus, int]
+    by_priority: Dict[TaskPriority, int]
+    by_assignee: Dict[str, int]
+    unassigned: int
+    overdue: int = Field(..., description="Not done and due_date in the past")
+    archived: int = Field(..., description="Archived (done) tasks, counted above only with include_archived")
+
+
+class TaskChanges(BaseModel):
+    """One page of the sync feed: upserted tasks and deleted ids."""
+    tasks: List[Task]
+    deleted: List[str]
+    cursor: Optional[str] = Field(None, description="Pass as `since` on the next call")
+    has_more: bool
+
 
 # =============================================================================
 # IN-MEMORY STORAGE (for Atelier 1 & 2)
@@ -81,14 +175,80 @@ class Task(BaseModel):
 # =============================================================================
 # FASTAPI APP
 # =============================================================================
+
+# Timeout de la sonde readiness et période de rafraîchissement du compteur
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+TASKS_COUNT_REFRESH_SECONDS = float(os.getenv("TASKS_COUNT_REFRESH_SECONDS", "30"))
+
+task_counter = TaskCounter()
+response_cache = build_cache()
+# Diffusion des écritures (GET /tasks/stream) ; keepalive SSE en secondes
+event_hub = build_event_hub()
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# Délestage (limites de concurrence adaptatives, débit par client), alimenté par les timeouts du pool
+admission = build_admission(POOL_SIZE + POOL_MAX_OVERFLOW, pool_timeouts)
+
+
+@asynccontextmanager
+async def background_session(app: FastAPI):
+    """DB session for background jobs; honours get_db overrides (tests)."""
+    provider = app.dependency_overrides.get(get_db, get_db)
+    sessions = provider()
+    try:
+        yield await sessions.__anext__()
+    finally:
+        await sessions.aclose()
+
+
+async def tasks_archived(task_ids: List[str], seqs: List[int]):
+    """Archiver callback: archived tasks leave the hot table (counter, cached pages)
+    and, like deletions, the synced set (one `deleted` event each, marked `archived`)."""
+    task_counter.add(-len(task_ids))
+    await response_cache.invalidate(*task_ids)
+    await event_hub.publish([dict(event, archived=True) for event in deletion_events(task_ids, seqs)])
+
+
+async def tasks_created(tasks: List):
+    """After a committed creation (single, batched or bulk): counter, cached pages, events."""
+    task_counter.add(len(tasks))
+    await response_cache.invalidate()
+    await event_hub.publish([task_event("created", task) for task in tasks])
+
+
+# Regroupement des créations (POST /tasks) : un INSERT multi-lignes et un COMMIT par lot
+write_batcher = WriteBatcher(
+    lambda: background_session(app), on_flushed=tasks_created, registry=metrics
+) if WRITE_BATCHING else None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager - initialise la DB au démarrage."""
     logger.info("🚀 TaskFlow backend starting up...")
-    init_db()  # Crée les tables en base
-    logger.info("✅ Database initialized")
+    if INIT_ON_STARTUP:
+        await init_db()  # Crée les tables en base
+        logger.info("✅ Database initialized")
+    await event_hub.start()
+    event_hub.close_streams_on_exit()
+    stop_background = asyncio.Event()
+    counter_refresher = asyncio.create_task(refresh_periodically(
+        task_counter, lambda: background_session(app), TASKS_COUNT_REFRESH_SECONDS, stop_background
+    ))
+    replica_monitor = asyncio.create_task(monitor_replicas(stop_background))
+    archiver = asyncio.create_task(archive_periodically(
+        lambda: background_session(app), ARCHIVE_INTERVAL_SECONDS, stop_background, tasks_archived
+    )) if ARCHIVE_ENABLED else None
     yield
     logger.info("🛑 TaskFlow backend shutting down...")
+    if write_batcher:
+        await write_batcher.close()  # créations en attente écrites avant la fermeture de la DB
+    stop_background.set()
+    await counter_refresher
+    await replica_monitor
+    if archiver:
+        await archiver
+    await event_hub.stop()
+    await close_db()
     
     
 
@@ -108,14 +268,37 @@ cors_origins_str = os.getenv(
 )
 cors_origins = [origin.strip() for origin in cors_origins_str.split(",")]
 
+# Contrôle d'admission : ajouté en premier, donc le plus interne. Les refus
+# (503 / 429) passent par CORS, les métriques et le profilage.
+app.add_middleware(AdmissionMiddleware, control=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link", "X-Next-Cursor", "X-DB-Queries", "X-DB-Time", "Retry-After"],
 )
 
+# Répliques en lecture : cookie read-your-writes posé après chaque écriture
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Métriques Prometheus (GET /metrics) : latence par route et requêtes SQL
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+if METRICS_ENABLED:
+    instrument_engine(engine.sync_engine, metrics)
+    for replica in read_router.engines if read_router else []:
+        instrument_engine(replica.sync_engine, metrics)
+    app.add_middleware(MetricsMiddleware, registry=metrics, routes=app.routes)
+
+# Profilage SQL (SQL_PROFILING=true) : requêtes lentes, motifs N+1, en-têtes X-DB-*
+if SQL_PROFILING:
+    profile_engine(engine.sync_engine)
+    for replica in read_router.engines if read_router else []:
+        profile_engine(replica.sync_engine)
+app.add_middleware(ProfilingMiddleware)
+
 # =============================================================================
 # ENDPOINTS
 # =============================================================================
@@ -130,18 +313,71 @@ async def root():
     }
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit / miss / eviction counters of the response cache."""
+    return response_cache.stats()
+
+
+@app.get("/events/stats")
+async def events_stats():
+    """Stream subscribers and published / delivered / dropped event counters."""
+    return event_hub.stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Concurrency limit, queue and rejection counters per route class, and rate limiting."""
+    return admission.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, SQL, pool and admission metrics."""
+    metrics.set_pool_stats(pool_stats())
+    metrics.set_admission_stats(admission.stats())
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/pool")
+async def pool_metrics():
+    """Connection pool usage: in-use / idle connections and checkout wait times."""
+    return pool_stats()
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process answers, no database access."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness(db: AsyncSession = Depends(get_db)):
+    """Readiness probe: a pooled connection answers within HEALTH_DB_TIMEOUT."""
+    try:
+        await check_database(db, HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        detail = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": detail},
+        )
+    return {"status": "ready", "database": "connected", **task_counter.snapshot()}
+
+
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    """Health check with database status."""
+async def health_check(db: AsyncSession = Depends(get_read_db)):
+    """Health check with database status (and read replicas, when configured)."""
     try:
-        # Vérifie que la DB répond
-        db.execute(text("SELECT 1"))
+        # Vérifie que la DB répond (le nombre de tâches vient du cache)
+        await check_database(db, HEALTH_DB_TIMEOUT)
 
-        tasks_count = db.query(TaskModel).count()
+        replicas = replica_stats()
         return {
             "status": "healthy",
             "database": "connected",
-            "tasks_count": tasks_count,
+            "tasks_count": task_counter.value,
+            **({"read_replicas": replicas} if replicas else {}),
         }
     except Exception as e:
         return {
@@ -151,48 +387,603 @@ async def health_check(db: Session = Depends(get_db)):
 
 
 
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse the `fields=` projection, rejecting unknown columns.
+
+    Repeated names are kept once (first position): the selected columns and
+    the JSON keys must stay aligned.
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in Task.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def apply_task_filters(query, status=None, priority=None, assignee=None, model=TaskModel):
+    """Add the status / priority / assignee filters shared by the list endpoints."""
+    if status:
+        query = query.where(model.status == status)
+    if priority:
+        query = query.where(model.priority == priority)
+    if assignee:
+        query = query.where(model.assignee == assignee)
+    return query
+
+
+def json_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+
+
+def page_headers(request: Request, next_cursor: Optional[str]) -> Dict[str, str]:
+    """Link / X-Next-Cursor headers pointing at the next page, if any."""
+    if not next_cursor:
+        return {}
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    return {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
+
+
 @app.get("/tasks", response_model=List[Task])
 async def get_tasks(
+    request: Request,
     status: Optional[TaskStatus] = None,
     priority: Optional[TaskPriority] = None,
     assignee: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title"),
+    include_archived: bool = Query(False, description="Also list archived (old done) tasks"),
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(TaskModel)
+    """List tasks ordered by (created_at, id), one page at a time.
 
-    if status:
-        query = query.filter(TaskModel.status == status)
-    if priority:
-        query = query.filter(TaskModel.priority == priority)
-    if assignee:
-        query = query.filter(TaskModel.assignee == assignee)
+    The next page is advertised through the `Link: <...>; rel="next"` and
+    `X-Next-Cursor` headers. The page ETag changes whenever a task of the
+    page is created, updated or deleted; `If-None-Match` gets a 304.
+    Archived tasks are only listed with `include_archived=true`.
+    """
+    projection = parse_fields(fields)
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    cache_key = await response_cache.list_key(
+        status=status, priority=priority, assignee=assignee,
+        limit=limit, cursor=cursor, fields=",".join(projection or []), include_archived=include_archived,
+    )
+    cached = None if reads_own_writes(db) else await response_cache.get(cache_key)
+    if cached:
+        headers = {**page_headers(request, cached.headers.get("next_cursor")), "ETag": cached.headers["etag"]}
+        if if_none_match(if_none_match_header, cached.headers["etag"]):
+            return not_modified(cached.headers["etag"], headers)
+        return json_response(cached.body, headers)
+
+    def page_query(model):
+        if projection:
+            # Seules les colonnes demandées (+ la clé de tri) sont lues
+            columns = {name: getattr(model, name) for name in projection}
+            columns.setdefault("created_at", model.created_at)
+            columns.setdefault("id", model.id)
+            columns.setdefault("version", model.version)
+            query = select(*(col.label(name) for name, col in columns.items()))
+        else:
+            # Tuples plutôt qu'objets ORM : ni identity map ni revalidation
+            query = select(*(getattr(model, column.key) for column in TASK_COLUMNS))
+
+        query = apply_task_filters(query, status, priority, assignee, model)
+        if position:
+            query = query.where(after_cursor(model.created_at, model.id, position))
+        # limit + 1 : la ligne en trop indique qu'une page suivante existe
+        return query.order_by(model.created_at, model.id).limit(limit + 1)
+
+    query = page_query(TaskModel)
+    if include_archived:
+        # Chaque table donne sa page par son index (created_at, id), puis fusion
+        pages = [page_query(model).subquery() for model in (TaskModel, ArchivedTaskModel)]
+        merged = union_all(*(select(*page.c) for page in pages)).subquery()
+        query = select(*merged.c).order_by(merged.c.created_at, merged.c.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    # ETag calculé sans sérialiser : un 304 évite tout le travail JSON
+    etag = list_etag(rows, ",".join(projection or []), next_cursor)
+    headers = {**page_headers(request, next_cursor), "ETag": etag}
+    if if_none_match(if_none_match_header, etag):
+        return not_modified(etag, headers)
+
+    body = dump_rows(rows, projection) if projection else dump_rows(rows)
 
-    return query.all()
+    if not reads_from_replica(db):
+        await response_cache.set(cache_key, body, {"next_cursor": next_cursor, "etag": etag})
+    return json_response(body, headers)
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+# Nombre de lignes lues par aller-retour sur le curseur serveur
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = list(Task.model_fields)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv_chunk(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+@app.get(
+    "/tasks/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+)
+async def export_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    assignee: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Stream every matching task as NDJSON or CSV.
+
+    Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE,
+    so memory stays flat whatever the size of the table.
+    """
+    query = select(*(getattr(TaskModel, name) for name in EXPORT_COLUMNS))
+    query = apply_task_filters(query, status, priority, assignee)
+    query = query.order_by(TaskModel.created_at, TaskModel.id)
+
+    async def generate():
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if format == "csv":
+            yield _csv_chunk([], header=True)
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+# =============================================================================
+# STATS
+# =============================================================================
+
+@app.get("/tasks/stats", response_model=TaskStats)
+async def task_stats(
+    include_archived: bool = Query(False, description="Also count the archived (done) tasks"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Counts per status, priority and assignee, plus overdue tasks.
+
+    Each figure is a GROUP BY answered from an index; the result is cached
+    and invalidated by every write, like the task lists. Archived tasks are
+    only counted with `include_archived`; `archived` always gives their number.
+    """
+    cache_key = await response_cache.list_key(view="stats", include_archived=include_archived)
+    cached = None if reads_own_writes(db) else await response_cache.get(cache_key)
+    if cached:
+        return json_response(cached.body)
+
+    models = (TaskModel, ArchivedTaskModel) if include_archived else (TaskModel,)
+    by_status = {status: 0 for status in TaskStatus}
+    by_priority = {priority: 0 for priority in TaskPriority}
+    by_assignee, unassigned = {}, 0
+    for model in models:
+        for status, count in await db.execute(
+            select(model.status, func.count()).group_by(model.status)
+        ):
+            by_status[status] += count
+
+        for priority, count in await db.execute(
+            select(model.priority, func.count()).group_by(model.priority)
+        ):
+            by_priority[priority] += count
+
+        for assignee, count in await db.execute(
+            select(model.assignee, func.count()).group_by(model.assignee).order_by(model.assignee)
+        ):
+            if assignee is None:
+                unassigned += count
+            else:
+                by_assignee[assignee] = by_assignee.get(assignee, 0) + count
+    if include_archived:
+        by_assignee = dict(sorted(by_assignee.items()))
+    archived = await db.scalar(select(func.count()).select_from(ArchivedTaskModel))
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    overdue = await db.scalar(
+        select(func.count()).select_from(TaskModel)
+        .where(TaskModel.due_date < now, TaskModel.status != TaskStatus.DONE)
+    )
+
+    stats = TaskStats(
+        total=sum(by_status.values()),
+        by_status=by_status,
+        by_priority=by_priority,
+        by_assignee=by_assignee,
+        unassigned=unassigned,
+        overdue=overdue,
+        archived=archived,
+    )
+    body = stats.model_dump_json().encode()
+    if not reads_from_replica(db):
+        await response_cache.set(cache_key, body)
+    return json_response(body)
+
+
+# =============================================================================
+# SYNC
+# =============================================================================
+
+@app.get("/tasks/changes", response_model=TaskChanges)
+async def task_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous call; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Tasks created or updated, and ids deleted, after `since`.
+
+    Clients keep the returned cursor and apply `tasks` (upsert) and
+    `deleted` to their local copy; while `has_more` is true, call again
+    right away with the new cursor.
+    """
+    try:
+        position = decode_change_cursor(since) if since else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    tasks, deleted, last, has_more = await changes_since(db, position, limit)
+    return TaskChanges(
+        tasks=tasks,
+        deleted=deleted,
+        cursor=encode_change_cursor(*last) if last else None,
+        has_more=has_more,
+    )
+
+
+# =============================================================================
+# PUSH (SSE / WebSocket)
+# =============================================================================
+
+def task_event(kind: str, task) -> dict:
+    """Stream payload for a created / updated task."""
+    return {
+        "type": kind,
+        "id": task.id,
+        "seq": task.change_seq,
+        "task": TASK_ADAPTER.dump_python(TASK_ADAPTER.validate_python(task, from_attributes=True), mode="json"),
+    }
+
+
+def deletion_events(task_ids, seqs) -> List[dict]:
+    return [{"type": "deleted", "id": task_id, "seq": seq} for task_id, seq in zip(task_ids, seqs)]
+
+
+@app.get("/tasks/stream", response_class=StreamingResponse)
+async def stream_tasks():
+    """Server-Sent Events: one `created` / `updated` / `deleted` event per write.
+
+    The event id is the change sequence. A `resync` event means the client
+    fell behind and was disconnected: catch up with GET /tasks/changes,
+    then reconnect.
+    """
+    async def frames():
+        with event_hub.subscribe() as subscription:
+            async for frame in sse_stream(subscription, EVENTS_KEEPALIVE_SECONDS):
+                yield frame
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/tasks/stream")
+async def stream_tasks_ws(websocket: WebSocket):
+    """Same events as the SSE stream, one JSON text message each."""
+    await websocket.accept()
+
+    async def wait_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    disconnected = asyncio.create_task(wait_disconnect())
+    with event_hub.subscribe() as subscription:
+        try:
+            while True:
+                next_event = asyncio.create_task(subscription.next())
+                await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    next_event.cancel()
+                    return
+                event = next_event.result()
+                if event is CLOSED:
+                    break
+                await websocket.send_text(event.data)
+                if event is RESYNC:
+                    break
+        finally:
+            disconnected.cancel()
+    await websocket.close()
+
+
+# =============================================================================
+# SEARCH
+# =============================================================================
+
+@app.get("/tasks/search", response_model=List[Task])
+async def search_tasks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or description"),
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    assignee: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Full-text search over title and description, best matches first.
+
+    Every word must match, as a prefix ("rap" finds "rapport"); title
+    matches rank above description matches. Pagination works like
+    GET /tasks (`Link` / `X-Next-Cursor`).
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    try:
+        offset = decode_offset_cursor(cursor) if cursor else 0
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = search_query(db.get_bind().dialect.name, terms).with_only_columns(*TASK_COLUMNS)
+    query = apply_task_filters(query, status, priority, assignee)
+    rows = (await db.execute(query.offset(offset).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_offset_cursor(offset + limit)
+
+    return json_response(dump_rows(rows), page_headers(request, next_cursor))
+
+
+# =============================================================================
+# BULK OPERATIONS (déclarées avant /tasks/{task_id} pour ne pas être capturées)
+# =============================================================================
+
+@app.post("/tasks/bulk", response_model=List[BulkItemResult], status_code=201)
+async def create_tasks_bulk(
+    payload: List[TaskCreate] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many tasks in one transaction with a multi-row INSERT ... RETURNING."""
+    first_seq = await allocate_change_seqs(db, len(payload))
+    rows = [
+        {"id": new_task_id(), "change_seq": first_seq + n, **item.model_dump()}
+        for n, item in enumerate(payload)
+    ]
+    result = await db.scalars(
+        insert(TaskModel).returning(TaskModel, sort_by_parameter_order=True),
+        rows,
+    )
+    tasks = result.all()
+    await db.commit()
+    await tasks_created(tasks)
+    return [
+        BulkItemResult(index=index, id=task.id, status=201, task=task)
+        for index, task in enumerate(tasks)
+    ]
+
+
+@app.patch("/tasks/bulk", response_model=List[BulkItemResult])
+async def update_tasks_bulk(
+    payload: List[BulkTaskUpdate] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply partial updates to many tasks in one transaction.
+
+    Unknown ids are reported as 404 items; the others are still updated.
+    """
+    ids = {item.id for item in payload}
+    existing = set(await db.scalars(select(TaskModel.id).where(TaskModel.id.in_(ids))))
+
+    # Un UPDATE ... WHERE id = ? en executemany par suite d'éléments qui
+    # modifient les mêmes colonnes : l'ordre de la requête est respecté
+    # (un id répété garde la dernière valeur).
+    groups: List[tuple] = []
+    changes = []
+    for item in payload:
+        values = item.model_dump(exclude_unset=True, exclude={"id"})
+        if item.id in existing and values:
+            changes.append((item.id, values))
+    next_seq = await allocate_change_seqs(db, len(changes)) if changes else 0
+    for n, (task_id, values) in enumerate(changes):
+        columns = tuple(sorted(values))
+        if not groups or groups[-1][0] != columns:
+            groups.append((columns, []))
+        groups[-1][1].append({
+            "b_id": task_id,
+            "b_change_seq": next_seq + n,
+            **{f"b_{name}": value for name, value in values.items()},
+        })
+    for columns, params in groups:
+        statement = (
+            update(TASKS)
+            .where(TASKS.c.id == bindparam("b_id"))
+            .values(
+                version=TASKS.c.version + 1,
+                change_seq=bindparam("b_change_seq"),
+                **{name: bindparam(f"b_{name}") for name in columns},
+            )
+        )
+        await db.execute(statement, params)
+
+    tasks = {}
+    if existing:
+        result = await db.scalars(select(TaskModel).where(TaskModel.id.in_(existing)))
+        tasks = {task.id: task for task in result}
+    await db.commit()
+    await response_cache.invalidate(*existing)
+    await event_hub.publish([task_event("updated", tasks[task_id]) for task_id, _ in changes])
+
+    return [
+        BulkItemResult(index=index, id=item.id, status=200, task=tasks[item.id])
+        if item.id in tasks
+        else BulkItemResult(index=index, id=item.id, status=404, detail="Task not found")
+        for index, item in enumerate(payload)
+    ]
+
+
+@app.delete("/tasks/bulk", response_model=List[BulkItemResult])
+async def delete_tasks_bulk(payload: BulkTaskDelete, db: AsyncSession = Depends(get_db)):
+    """Delete many tasks with a single DELETE ... RETURNING id."""
+    result = await db.scalars(
+        delete(TaskModel).where(TaskModel.id.in_(payload.ids)).returning(TaskModel.id)
+    )
+    deleted = list(result)
+    seqs = await record_deletions(db, deleted)
+    await db.commit()
+    task_counter.add(-len(deleted))
+    await response_cache.invalidate(*deleted)
+    await event_hub.publish(deletion_events(deleted, seqs))
+    deleted = set(deleted)
+
+    return [
+        BulkItemResult(index=index, id=task_id, status=204)
+        if task_id in deleted
+        else BulkItemResult(index=index, id=task_id, status=404, detail="Task not found")
+        for index, task_id in enumerate(payload.ids)
+    ]
 
 
 @app.get("/tasks/{task_id}", response_model=Task)
-async def get_task(task_id: str, db: Session = Depends(get_db)):
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+async def get_task(
+    task_id: str,
+    include_archived: bool = Query(False, description="Also look up archived (old done) tasks"),
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get one task; archived tasks are only found with `include_archived=true`."""
+    cache_key = response_cache.item_key(task_id)
+    cached = None if reads_own_writes(db) else await response_cache.get(cache_key)
+    if cached:
+        etag = cached.headers["etag"]
+        if if_none_match(if_none_match_header, etag):
+            return not_modified(etag)
+        return json_response(cached.body, {"ETag": etag})
+
+    # relevée avant la lecture : une écriture concurrente empêche la mise en cache
+    generation = await response_cache.generation()
+    task = await db.get(TaskModel, task_id)
+    if not task and include_archived:
+        task = await db.get(ArchivedTaskModel, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
 
+    etag = task_etag(task.id, task.version)
+    if if_none_match(if_none_match_header, etag):
+        return not_modified(etag)
+
+    body = TASK_ADAPTER.dump_json(TASK_ADAPTER.validate_python(task, from_attributes=True))
+    if isinstance(task, TaskModel) and not reads_from_replica(db):
+        # (la clé du cache désigne la table chaude ; une réplique peut être en retard)
+        await response_cache.set_item(task_id, generation, body, {"etag": etag})
+    return json_response(body, {"ETag": etag})
+
+
+
+# Écritures unitaires : une seule requête sur tasks (INSERT / UPDATE / DELETE
+# ... RETURNING), la précondition If-Match dans son WHERE ; seule l'attribution
+# du numéro de changement (changes.py) s'y ajoute.
+
+
+def task_condition(task_id: str, if_match_header: Optional[str]):
+    """WHERE id = :id, plus les versions acceptées par If-Match."""
+    condition = TASKS.c.id == task_id
+    versions = if_match_versions(if_match_header, task_id)
+    if versions is not None:
+        condition = condition & TASKS.c.version.in_(versions)
+    return condition
+
+
+async def missing_or_modified(db: AsyncSession, task_id: str, if_match_header: Optional[str]) -> HTTPException:
+    """Aucune ligne touchée : 412 si la tâche existe (If-Match), 404 sinon.
+
+    `If-Match: *` échoue quand la tâche n'existe pas : 412 (RFC 9110
+    §13.1.1), sans lecture. Pour une liste d'ETags, la lecture est faite
+    uniquement dans ce cas d'échec.
+    """
+    if if_match_header is not None and if_match_versions(if_match_header, task_id) is None:
+        return HTTPException(status_code=412, detail="Task does not exist")
+    if if_match_header is not None and await db.scalar(select(TASKS.c.id).where(TASKS.c.id == task_id)):
+        return HTTPException(status_code=412, detail="Task has been modified")
+    return HTTPException(status_code=404, detail="Task not found")
 
 
 @app.post("/tasks", response_model=Task, status_code=201)
-async def create_task(payload: TaskCreate, db: Session = Depends(get_db)):
-    task = TaskModel(
-        id=str(uuid.uuid4()),
-        title=payload.title,
-        description=payload.description,
-        status=payload.status,
-        priority=payload.priority,
-        assignee=payload.assignee,
-        due_date=payload.due_date,
-    )
-    db.add(task)
-    db.commit()
-    db.refresh(task)  # récupère created_at / updated_at
+async def create_task(payload: TaskCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    """Create a task; created_at / updated_at come back through RETURNING.
+
+    With WRITE_BATCHING, concurrent creations share one multi-row INSERT and commit.
+    """
+    values = {"id": new_task_id(), **payload.model_dump()}
+    if write_batcher is not None:
+        task = await write_batcher.submit(values)
+    else:
+        task = (await db.execute(
+            insert(TASKS).values(change_seq=await allocate_change_seqs(db), **values).returning(TASKS)
+        )).one()
+        await db.commit()
+        await tasks_created([task])
+    response.headers["ETag"] = task_etag(task.id, task.version)
     return task
 
 
@@ -201,35 +992,56 @@ async def create_task(payload: TaskCreate, db: Session = Depends(get_db)):
 async def update_task(
     task_id: str,
     payload: TaskUpdate,  # ou TaskCreate si tu n'as pas de modèle séparé
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match_header: Optional[str] = Header(None, alias="If-Match"),
+    db: AsyncSession = Depends(get_db),
 ):
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
+    """Partial update; `If-Match: <etag>` makes it conditional (412 if stale)."""
     # On met à jour uniquement les champs fournis
     updates = payload.model_dump(exclude_unset=True)
-    for field, value in updates.items():
-        setattr(task, field, value)
-
-    db.commit()
-    db.refresh(task)
+    condition = task_condition(task_id, if_match_header)
+    if updates:
+        # UPDATE ... WHERE id = ? [AND version IN (...)] RETURNING : pas de verrou
+        # pris entre une lecture et l'écriture, updated_at via onupdate
+        statement = (
+            update(TASKS)
+            .where(condition)
+            .values(version=TASKS.c.version + 1, change_seq=await allocate_change_seqs(db), **updates)
+            .returning(TASKS)
+        )
+    else:
+        statement = select(TASKS).where(condition)
+    task = (await db.execute(statement)).first()
+    if task is None:
+        raise await missing_or_modified(db, task_id, if_match_header)
+    await db.commit()
+    if updates:
+        await response_cache.invalidate(task_id)
+        await event_hub.publish([task_event("updated", task)])
+    response.headers["ETag"] = task_etag(task.id, task.version)
     return task
 
 
 
 @app.delete("/tasks/{task_id}", status_code=204)
-async def delete_task(task_id: str, db: Session = Depends(get_db)):
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    db.delete(task)
-    db.commit()
+async def delete_task(
+    task_id: str,
+    if_match_header: Optional[str] = Header(None, alias="If-Match"),
+    db: AsyncSession = Depends(get_db),
+):
+    deleted = await db.scalar(
+        delete(TASKS).where(task_condition(task_id, if_match_header)).returning(TASKS.c.id)
+    )
+    if deleted is None:
+        raise await missing_or_modified(db, task_id, if_match_header)
+    seqs = await record_deletions(db, [task_id])
+    await db.commit()
+    task_counter.add(-1)
+    await response_cache.invalidate(task_id)
+    await event_hub.publish(deletion_events([task_id], seqs))
     return Response(status_code=204)
 
-    return None
-
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # python -m src.app : même lancement que python -m src.server
+    from .server import main
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Archivage des tâches terminées : la table tasks ne garde que les tâches vivantes.
+
+Une boucle de fond déplace les tâches `done` dont la dernière modification
+date de plus de ARCHIVE_AFTER_DAYS jours vers la table tasks_archive, par
+lots de ARCHIVE_BATCH_SIZE. Chaque lot est une transaction courte :
+
+    SELECT id ... ORDER BY updated_at LIMIT n   (FOR UPDATE SKIP LOCKED)
+    DELETE FROM tasks WHERE id IN (...) AND <toujours archivable> RETURNING *
+    INSERT INTO tasks_archive (lignes renvoyées par le DELETE)
+    INSERT INTO task_tombstones (une tombe par tâche, nouveau change_seq)
+
+Seules les lignes effectivement supprimées sont archivées : une tâche
+rouverte entre la sélection et le DELETE reste dans tasks, et deux
+workers qui archivent en même temps ne déplacent jamais la même ligne.
+Une courte pause entre deux lots laisse passer les écritures de l'API.
+
+L'archive est en lecture seule : GET /tasks et GET /tasks/{id} la lisent
+avec `include_archived=true`, les écritures n'y touchent pas (404).
+
+Pour la synchronisation, une tâche archivée quitte l'ensemble des tâches
+vivantes comme une suppression : tombe dans la même transaction (elle
+apparaît dans `deleted` de GET /tasks/changes) et événement `deleted`
+marqué `archived` sur /tasks/stream. Un client synchronisé et une
+synchronisation complète voient donc les mêmes tâches.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from .changes import record_deletions
+from .models import ArchivedTaskModel, TaskModel, TaskStatus
+
+logger = logging.getLogger("taskflow")
+
+TASKS = TaskModel.__table__
+ARCHIVE = ArchivedTaskModel.__table__
+
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "300"))
+# Pause entre deux lots (secondes)
+BATCH_PAUSE = 0.05
+
+
+def archive_cutoff(after_days: float = ARCHIVE_AFTER_DAYS) -> datetime:
+    """Date (UTC, naïve comme les colonnes) avant laquelle une tâche terminée est archivée."""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=after_days)
+
+
+async def archive_batch(db, cutoff: datetime,
+                        batch_size: int = ARCHIVE_BATCH_SIZE) -> Tuple[List[str], List[int]]:
+    """Déplace au plus `batch_size` tâches dans l'archive (une transaction).
+
+    Renvoie les ids déplacés (vide : plus rien à archiver) et le numéro de
+    changement de la tombe de chacun.
+    """
+    archivable = (TASKS.c.status == TaskStatus.DONE) & (TASKS.c.updated_at < cutoff)
+    ids = (await db.scalars(
+        select(TASKS.c.id).where(archivable)
+        .order_by(TASKS.c.updated_at).limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if not ids:
+        await db.rollback()
+        return [], []
+    rows = (await db.execute(
+        delete(TASKS).where(TASKS.c.id.in_(ids) & archivable).returning(*TASKS.c)
+    )).mappings().all()
+    moved = [row["id"] for row in rows]
+    seqs = []
+    if rows:
+        await db.execute(insert(ARCHIVE), [dict(row) for row in rows])
+        seqs = await record_deletions(db, moved)
+    await db.commit()
+    return moved, seqs
+
+
+async def archive_done_tasks(db, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE,
+                             on_moved: Optional[Callable[[List[str], List[int]], Awaitable]] = None,
+                             stop: Optional[asyncio.Event] = None) -> int:
+    """Archive lot par lot jusqu'à épuisement (ou `stop`) ; renvoie le nombre de tâches déplacées."""
+    total = 0
+    while stop is None or not stop.is_set():
+        moved, seqs = await archive_batch(db, cutoff, batch_size)
+        if moved and on_moved is not None:
+            await on_moved(moved, seqs)
+        total += len(moved)
+        if len(moved) < batch_size:
+            break
+        await asyncio.sleep(BATCH_PAUSE)
+    return total
+
+
+async def archive_periodically(session_factory, interval: float, stop: asyncio.Event,
+                               on_moved: Optional[Callable[[List[str], List[int]], Awaitable]] = None):
+    """Boucle de fond : une passe d'archivage toutes les `interval` secondes.
+
+    La première passe attend un intervalle (rien ne presse au démarrage).
+    Comme health.refresh_periodically : s'arrête avec `stop`, entre deux
+    lots, sans annuler une transaction en cours.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            async with session_factory() as db:
+                moved = await archive_done_tasks(db, archive_cutoff(), on_moved=on_moved, stop=stop)
+            if moved:
+                logger.info("Archived %d done tasks", moved)
+        except Exception as e:
+            logger.warning("Task archiving failed: %s", e)
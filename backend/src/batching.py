@@ -0,0 +1,161 @@
+"""
+Regroupement des écritures (group commit) pour POST /tasks.
+
+Sans regroupement, chaque création est une transaction : un COMMIT (et un
+fsync) par requête. Avec WRITE_BATCHING=true, les créations qui arrivent
+pendant une courte fenêtre (WRITE_BATCH_WINDOW_MS) ou jusqu'à
+WRITE_BATCH_MAX_ITEMS tâches partent ensemble :
+
+    UPDATE change_sequence ... RETURNING      (n numéros consécutifs)
+    INSERT INTO tasks VALUES (...), (...), ... RETURNING *
+    COMMIT
+
+Chaque requête attend sa propre ligne. Si le lot échoue (contrainte
+violée par une ligne, erreur de la base...), chaque tâche est réessayée
+seule, dans sa transaction : une ligne fautive ne fait échouer que sa
+requête. Le regroupement ajoute au plus la fenêtre à la latence d'une
+création ; en échange, un pic de créations coûte un COMMIT par lot.
+
+Le lot s'exécute dans sa propre tâche asyncio (hors du contexte de la
+requête qui l'a déclenché) : une requête annulée n'annule pas le lot des
+autres. À l'arrêt, `close` écrit les créations en attente.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import insert
+
+from .changes import allocate_change_seqs
+from .models import TaskModel
+
+logger = logging.getLogger("taskflow")
+
+TASKS = TaskModel.__table__
+
+WRITE_BATCHING = os.getenv("WRITE_BATCHING", "false").lower() in ("1", "true", "yes", "on")
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "2"))
+WRITE_BATCH_MAX_ITEMS = int(os.getenv("WRITE_BATCH_MAX_ITEMS", "100"))
+
+
+class _Pending:
+    """Une création en attente : valeurs, résultat attendu, heure d'arrivée."""
+
+    __slots__ = ("values", "future", "queued_at")
+
+    def __init__(self, values: dict, future: asyncio.Future):
+        self.values = values
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class WriteBatcher:
+    """Regroupe les INSERT de tâches arrivant ensemble en un INSERT multi-lignes.
+
+    `session_factory` ouvre une session (gestionnaire de contexte async) ;
+    `on_flushed(rows)` est appelé après chaque COMMIT, avant de rendre les
+    lignes aux requêtes (compteur, cache, événements).
+    """
+
+    def __init__(self, session_factory, window: float = WRITE_BATCH_WINDOW_MS / 1000,
+                 max_items: int = WRITE_BATCH_MAX_ITEMS,
+                 on_flushed: Optional[Callable[[List], Awaitable]] = None, registry=None):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_items = max(1, max_items)
+        self.on_flushed = on_flushed
+        self.registry = registry
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self._closed = False
+
+    async def submit(self, values: dict):
+        """Insère une tâche (valeurs complètes, id compris) ; renvoie sa ligne.
+
+        L'erreur éventuelle est celle de cette ligne seule.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Pending(values, future))
+        if self._closed or len(self._pending) >= self.max_items:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush, context=contextvars.Context())
+        return await future
+
+    def _start_flush(self):
+        """Part avec le lot en attente, dans une tâche détachée de la requête."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            flush = asyncio.create_task(self._flush(batch), context=contextvars.Context())
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[_Pending]):
+        started = time.perf_counter()
+        if self.registry is not None:
+            self.registry.observe_write_batch(len(batch), [started - item.queued_at for item in batch])
+        try:
+            rows = await self._insert(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                _resolve(batch[0], error=e)
+                return
+            # lot refusé : chaque ligne seule, pour rendre à chacun sa propre erreur
+            logger.warning("Batched insert of %d tasks failed (%s), retrying one by one", len(batch), e)
+            if self.registry is not None:
+                self.registry.write_batch_fallbacks.inc()
+            for item in batch:
+                try:
+                    [row] = await self._insert([item])
+                except Exception as item_error:
+                    _resolve(item, error=item_error)
+                else:
+                    _resolve(item, row)
+            return
+        for item, row in zip(batch, rows):
+            _resolve(item, row)
+
+    async def _insert(self, batch: List[_Pending]) -> List:
+        """Une transaction : numéros de changement, INSERT ... RETURNING, COMMIT, puis on_flushed."""
+        async with self.session_factory() as db:
+            first_seq = await allocate_change_seqs(db, len(batch))
+            rows = (await db.execute(
+                insert(TASKS).returning(TASKS, sort_by_parameter_order=True),
+                [{**item.values, "change_seq": first_seq + n} for n, item in enumerate(batch)],
+            )).all()
+            await db.commit()
+        if self.on_flushed is not None:
+            try:
+                await self.on_flushed(rows)
+            except Exception as e:   # lignes déjà écrites : on les rend quand même
+                logger.warning("Write batch callback failed: %s", e)
+        return rows
+
+    async def close(self):
+        """Écrit les créations en attente et attend les lots en cours (arrêt du worker).
+
+        Les créations soumises ensuite partent immédiatement, sans regroupement.
+        """
+        self._closed = True
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+def _resolve(item: _Pending, row=None, error: Optional[BaseException] = None):
+    """Rend son résultat à la requête (sauf si elle a été annulée entre-temps)."""
+    if item.future.done():
+        return
+    if error is not None:
+        item.future.set_exception(error)
+    else:
+        item.future.set_result(row)
@@ -0,0 +1,326 @@
+"""
+Cache de réponses en lecture (read-through) pour GET /tasks et GET /tasks/{id}.
+
+Les réponses sont gardées déjà sérialisées (octets JSON + en-têtes) : un
+hit ne touche ni la base ni Pydantic. Deux backends :
+
+- `MemoryBackend` : LRU en mémoire avec TTL (par défaut) ;
+- `RedisBackend` : client minimal du protocole Redis (RESP), partagé
+  entre workers.
+
+Invalidation : chaque écriture incrémente la "génération" des listes puis
+supprime les clés des tâches touchées ; les clés de liste incluent cette
+génération, les anciennes entrées ne sont donc plus jamais lues et
+finissent évincées (LRU / TTL). Une tâche lue avant une écriture et mise
+en cache après son invalidation serait périmée : `set_item` compare la
+génération d'avant la lecture à celle d'après la mise en cache et retire
+l'entrée si une écriture a eu lieu entre-temps.
+
+Configuration : CACHE_BACKEND (memory | redis | none), CACHE_URL,
+CACHE_TTL (secondes), CACHE_MAX_ENTRIES.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger("taskflow")
+
+LIST_GENERATION_KEY = "tasks:list:generation"
+
+
+class MemoryBackend:
+    """LRU en mémoire avec expiration (TTL) par entrée."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        # la génération ne doit jamais être évincée
+        self._entries[key] = (None, str(value).encode())
+        return value
+
+    async def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    """Réponse d'erreur (-ERR ...) du serveur Redis."""
+
+
+class RedisBackend:
+    """Client Redis minimal (RESP2) : GET / SET EX / DEL / INCR / FLUSHDB / PUBLISH / EVAL.
+
+    Une seule connexion, protégée par un verrou ; elle est rouverte à la
+    demande après une erreur réseau.
+    """
+
+    evictions = 0  # les évictions ont lieu côté serveur (INFO stats)
+
+    def __init__(self, url: str = "redis://localhost:6379/0", timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if ttl:
+            await self._command("SET", key, value, "PX", int(ttl * 1000))
+        else:
+            await self._command("SET", key, value)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._command("DEL", *keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._command("INCR", key)
+
+    async def clear(self):
+        await self._command("FLUSHDB")
+
+    async def publish(self, channel: str, message):
+        """PUBLISH (utilisé par le broker d'événements, voir events.py)."""
+        return await self._command("PUBLISH", channel, message)
+
+    async def eval(self, script: str, keys, *args):
+        """EVAL (utilisé par le limiteur de débit, voir admission.py)."""
+        return await self._command("EVAL", script, len(keys), *keys, *args)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", self.db)
+
+    async def _command(self, *args):
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._send(*args), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                await self.close()
+                raise
+
+    async def _send(self, *args):
+        self._writer.write(encode_command(*args))
+        await self._writer.drain()
+        return await read_reply(self._reader)
+
+
+def encode_command(*args) -> bytes:
+    """Encode une commande en tableau RESP de bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Lit une réponse RESP (+simple, -erreur, :entier, $bulk, *tableau)."""
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Unexpected reply: {line!r}")
+
+
+class CachedResponse:
+    """Corps JSON déjà sérialisé et en-têtes associés."""
+
+    __slots__ = ("body", "headers")
+
+    def __init__(self, body: bytes, headers: Dict[str, str]):
+        self.body = body
+        self.headers = headers
+
+    def dumps(self) -> bytes:
+        return json.dumps(self.headers).encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        headers, _, body = raw.partition(b"\n")
+        return cls(body, json.loads(headers))
+
+
+class ResponseCache:
+    """Cache read-through avec compteurs hits / misses / évictions.
+
+    Les erreurs du backend ne font jamais échouer une requête : elles
+    comptent comme des misses et sont journalisées.
+    """
+
+    def __init__(self, backend, ttl: Optional[float] = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def generation(self) -> int:
+        """Génération courante, incrémentée par chaque écriture."""
+        return int(await self._safe(self.backend.get(LIST_GENERATION_KEY)) or 0)
+
+    async def list_key(self, **params) -> str:
+        """Clé d'une liste : génération courante + tuple des paramètres."""
+        generation = await self.generation()
+        parts = [f"{name}={params[name] if params[name] is not None else ''}" for name in sorted(params)]
+        return f"tasks:list:{generation}:" + "&".join(parts)
+
+    @staticmethod
+    def item_key(task_id: str) -> str:
+        return f"tasks:item:{task_id}"
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self._safe(self.backend.get(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResponse.loads(raw)
+
+    async def set(self, key: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        entry = CachedResponse(body, headers or {})
+        await self._safe(self.backend.set(key, entry.dumps(), self.ttl))
+
+    async def set_item(self, task_id: str, generation: int, body: bytes,
+                       headers: Optional[Dict[str, str]] = None):
+        """Met en cache une tâche lue après avoir relevé `generation`.
+
+        Si une écriture a eu lieu depuis (génération changée), la ligne lue
+        peut être l'ancienne : l'entrée est retirée aussitôt. Avec
+        `invalidate` (génération, puis suppression), soit la génération a
+        déjà changé ici, soit la suppression passe après cette mise en cache.
+        """
+        key = self.item_key(task_id)
+        await self.set(key, body, headers)
+        if await self.generation() != generation:
+            await self._safe(self.backend.delete(key))
+
+    async def invalidate(self, *task_ids: str):
+        """À appeler après chaque écriture : toutes les listes + tâches touchées (dans cet ordre)."""
+        await self._safe(self.backend.incr(LIST_GENERATION_KEY))
+        await self._safe(self.backend.delete(*(self.item_key(task_id) for task_id in task_ids)))
+
+    async def clear(self):
+        await self._safe(self.backend.clear())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    async def _safe(self, operation):
+        try:
+            return await operation
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Cache backend error: %s", e)
+            return None
+
+
+class NullBackend:
+    """Backend désactivé : aucun stockage (CACHE_BACKEND=none)."""
+
+    evictions = 0
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ttl=None):
+        pass
+
+    async def delete(self, *keys):
+        pass
+
+    async def incr(self, key):
+        return 0
+
+    async def clear(self):
+        pass
+
+
+def build_cache() -> ResponseCache:
+    """Construit le cache à partir des variables d'environnement."""
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("CACHE_TTL", "30"))
+    if backend_name == "redis":
+        backend = RedisBackend(os.getenv("CACHE_URL", "redis://localhost:6379/0"))
+    elif backend_name == "none":
+        backend = NullBackend()
+    else:
+        backend = MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+    return ResponseCache(backend, ttl=ttl)
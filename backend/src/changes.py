@@ -0,0 +1,88 @@
+"""
+Flux de changements pour la synchronisation incrémentale (GET /tasks/changes).
+
+Chaque écriture prend un numéro dans `change_sequence` et l'enregistre :
+dans `tasks.change_seq` pour une création / modification, dans
+`task_tombstones` pour une suppression. Un client garde le curseur
+renvoyé et ne redemande ensuite que ce qui a changé après lui.
+
+Les éléments sont ordonnés par (change_seq, id) : les tâches insérées
+hors de l'API (change_seq = 0) restent paginables.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+from .models import ChangeSequence, TaskModel, TaskTombstone
+from .pagination import after_cursor
+
+
+async def allocate_change_seqs(db, count: int = 1) -> int:
+    """Réserve `count` numéros consécutifs et renvoie le premier.
+
+    À appeler dans la transaction de l'écriture : le verrou pris sur la
+    ligne du compteur dure jusqu'au COMMIT.
+    """
+    sequence = ChangeSequence.__table__
+    last = await db.scalar(
+        update(sequence)
+        .where(sequence.c.id == 1)
+        .values(value=sequence.c.value + count)
+        .returning(sequence.c.value)
+    )
+    if last is None:
+        # table créée sans l'événement after_create (base restaurée...)
+        await db.execute(insert(sequence).values(id=1, value=count))
+        last = count
+    return last - count + 1
+
+
+async def record_deletions(db, task_ids: Iterable[str]) -> List[int]:
+    """Ajoute une tombe par tâche supprimée (dans la transaction du DELETE).
+
+    Renvoie le numéro de changement de chaque suppression.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    first = await allocate_change_seqs(db, len(task_ids))
+    seqs = [first + n for n in range(len(task_ids))]
+    await db.execute(
+        insert(TaskTombstone),
+        [{"task_id": task_id, "change_seq": seq} for task_id, seq in zip(task_ids, seqs)],
+    )
+    return seqs
+
+
+async def changes_since(db, position: Optional[Tuple[int, str]], limit: int):
+    """Tâches créées / modifiées et tâches supprimées après `position`.
+
+    Sans position (première synchronisation), seules les tâches existantes
+    sont renvoyées : les tombes antérieures ne concernent pas le client.
+    Renvoie (tâches, ids supprimés, position du dernier élément, has_more).
+    """
+    tasks_query = select(TaskModel).order_by(TaskModel.change_seq, TaskModel.id).limit(limit + 1)
+    if position:
+        tasks_query = tasks_query.where(after_cursor(TaskModel.change_seq, TaskModel.id, position))
+    entries: List[tuple] = [
+        (task.change_seq, task.id, task) for task in (await db.scalars(tasks_query)).all()
+    ]
+
+    if position:
+        tombstones_query = (
+            select(TaskTombstone.change_seq, TaskTombstone.task_id)
+            .where(after_cursor(TaskTombstone.change_seq, TaskTombstone.task_id, position))
+            .order_by(TaskTombstone.change_seq, TaskTombstone.task_id)
+            .limit(limit + 1)
+        )
+        entries.extend((seq, task_id, None) for seq, task_id in await db.execute(tombstones_query))
+
+    entries.sort(key=lambda entry: entry[:2])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    tasks = [task for _, _, task in entries if task is not None]
+    deleted = [task_id for _, task_id, task in entries if task is None]
+    last = entries[-1][:2] if entries else position
+    return tasks, deleted, last, has_more
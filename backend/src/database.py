@@ -1,41 +1,425 @@
+import asyncio
+import itertools
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from typing import List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger("taskflow")
 
 # Lire l'URL de la base de données depuis les variables d'environnement
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./taskflow.db")
+# Répliques en lecture (URLs séparées par des virgules) ; vide : tout va au primaire
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
 
-# Configuration du moteur SQLAlchemy
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite (développement local)
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
+
+def to_async_url(url: str):
+    """Convertit une URL synchrone (sqlite://, postgresql://) vers son driver async.
+
+    Retourne l'URL et les connect_args à passer au moteur.
+    """
+    if url.startswith("postgres://"):
+        # Render / Heroku fournissent parfois l'ancien schéma "postgres://"
+        url = "postgresql://" + url[len("postgres://"):]
+
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    elif parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg ne comprend pas "sslmode" : on le traduit en argument "ssl"
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+    return parsed, connect_args
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+# Pool de connexions (valeurs par défaut = ancienne configuration PostgreSQL)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # attente max d'une connexion libre
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # renouvelle les connexions (s)
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+# init_db au démarrage de chaque processus ; src/server.py le désactive dans
+# les workers après l'avoir exécuté une seule fois dans le processus parent
+INIT_ON_STARTUP = _env_bool("DB_INIT_ON_STARTUP", True)
+# false : init_db échoue si des migrations manquent (python -m src.schema upgrade)
+AUTO_MIGRATE = _env_bool("DB_AUTO_MIGRATE", True)
+# Après une écriture, les lectures du même client vont au primaire pendant ce délai (s)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+# Vérification périodique des répliques : période et délai de réponse (s)
+REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "10"))
+REPLICA_CHECK_TIMEOUT = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "2"))
+
+# PRAGMA SQLite appliqués à chaque nouvelle connexion
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),       # lectures concurrentes des écritures
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),      # fsync au checkpoint (sûr en WAL)
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")),  # négatif = en KiB
+    "temp_store": "MEMORY",
+}
+
+
+class PoolMetrics:
+    """Temps d'attente pour obtenir une connexion et nombre de timeouts."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool=None) -> dict:
+        """Compteurs, plus l'état du pool s'il est donné (plusieurs pools : sans)."""
+        stats = {"pool": type(pool).__name__} if pool is not None else {}
+        stats.update({
+            "checkouts": self.checkouts,
+            "checkout_wait_avg_ms": round(1000 * self.wait_seconds_total / self.checkouts, 3)
+            if self.checkouts else 0.0,
+            "checkout_wait_max_ms": round(1000 * self.wait_seconds_max, 3),
+            "checkout_timeouts": self.timeouts,
+        })
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+pool_metrics = PoolMetrics()
+# Pools des répliques (toutes ensemble), à part : /health/pool décrit le primaire
+replica_pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool qui mesure l'attente de chaque checkout (ouverture comprise)."""
+
+    # journalise sous "sqlalchemy.pool" (niveau WARN par défaut) et non sous src.database
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.TimedQueuePool"
+    metrics = pool_metrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+
+class ReplicaQueuePool(TimedQueuePool):
+    """TimedQueuePool des répliques : mesures dans replica_pool_metrics."""
+
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.ReplicaQueuePool"
+    metrics = replica_pool_metrics
+
+
+def apply_sqlite_pragmas(sync_engine, pragmas=None):
+    """Applique les PRAGMA SQLite à chaque connexion ouverte par le moteur."""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_engine_for(url: str, poolclass=TimedQueuePool):
+    """Moteur async configuré pour `url` (primaire ou réplique).
+
+    Les répliques passent `ReplicaQueuePool` : leurs checkouts sont comptés
+    à part (replica_pool_metrics), leurs timeouts alimentent quand même
+    `pool_timeouts` (contrôle d'admission).
+    """
+    async_url, connect_args = to_async_url(url)
+
+    # Configuration du moteur SQLAlchemy (async : aiosqlite / asyncpg)
+    if async_url.get_backend_name() == "sqlite":
+        # SQLite (développement local)
+        if async_url.database in (None, "", ":memory:"):
+            # base en mémoire : une seule connexion partagée (StaticPool par défaut)
+            new_engine = create_async_engine(async_url, connect_args=connect_args)
+        else:
+            new_engine = create_async_engine(
+                async_url,
+                connect_args={"timeout": CONNECT_TIMEOUT, **connect_args},
+                poolclass=poolclass,
+                pool_size=POOL_SIZE,
+                max_overflow=POOL_MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
+            )
+        apply_sqlite_pragmas(new_engine.sync_engine)
+        return new_engine
     # PostgreSQL (production)
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True
+    return create_async_engine(
+        async_url,
+        connect_args={"timeout": CONNECT_TIMEOUT, **connect_args},
+        poolclass=poolclass,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
     )
 
+
+engine = create_engine_for(DATABASE_URL)
+
 # Factory de sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False : pas de lazy-load implicite (interdit en async) après commit
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Base pour les modèles ORM
 Base = declarative_base()
 
-def get_db():
-    """Générateur qui fournit une session de base de données."""
-    db = SessionLocal()
+async def get_db():
+    """Générateur async qui fournit une session de base de données."""
+    async with SessionLocal() as db:
+        yield db
+
+
+# =============================================================================
+# RÉPLIQUES EN LECTURE
+# =============================================================================
+
+# Cookie posé après une écriture : échéance (epoch) de la lecture sur le primaire
+READ_YOUR_WRITES_COOKIE = "taskflow_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Erreurs qui indiquent une réplique injoignable (et non une requête fautive)
+REPLICA_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+class ReadRouter:
+    """Répartit les lectures entre les répliques en bonne santé (round-robin).
+
+    Une réplique est retirée de la rotation quand elle ne répond pas à la
+    vérification périodique, ou quand une requête échoue faute de
+    connexion ; elle y revient à la vérification suivante réussie. Sans
+    réplique disponible, les lectures vont au primaire.
+    """
+
+    def __init__(self, engines: List):
+        self.engines = engines
+        self.sessions = [
+            async_sessionmaker(bind=replica, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+            for replica in engines
+        ]
+        self.healthy = [True] * len(engines)
+        self.reads = [0] * len(engines)
+        self.primary_reads = 0  # lectures après écriture (read-your-writes)
+        self.fallbacks = 0      # lectures sur le primaire faute de réplique saine
+        self._turn = itertools.count()
+
+    def choose(self) -> Optional[int]:
+        """Index de la prochaine réplique saine, None s'il n'y en a aucune."""
+        candidates = [index for index, healthy in enumerate(self.healthy) if healthy]
+        if not candidates:
+            return None
+        return candidates[next(self._turn) % len(candidates)]
+
+    def mark(self, index: int, healthy: bool, reason: str = ""):
+        if self.healthy[index] != healthy:
+            if healthy:
+                logger.info("Read replica %d is back in rotation", index)
+            else:
+                logger.warning("Read replica %d removed from rotation: %s", index, reason)
+        self.healthy[index] = healthy
+
+    async def check(self, timeout: float = REPLICA_CHECK_TIMEOUT):
+        """SELECT 1 sur chaque réplique, en parallèle."""
+        async def ping(index: int, replica):
+            try:
+                async with replica.connect() as connection:
+                    await asyncio.wait_for(connection.execute(text("SELECT 1")), timeout=timeout)
+            except Exception as e:
+                self.mark(index, False, "timeout" if isinstance(e, asyncio.TimeoutError) else str(e))
+            else:
+                self.mark(index, True)
+
+        await asyncio.gather(*(ping(index, replica) for index, replica in enumerate(self.engines)))
+
+    async def monitor(self, interval: float, stop: asyncio.Event):
+        """Boucle de fond : vérifie les répliques toutes les `interval` secondes."""
+        while not stop.is_set():
+            await self.check()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"index": index, "healthy": healthy, "reads": reads}
+                for index, (healthy, reads) in enumerate(zip(self.healthy, self.reads))
+            ],
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+    async def dispose(self):
+        for replica in self.engines:
+            await replica.dispose()
+
+
+read_router: Optional[ReadRouter] = (
+    ReadRouter([create_engine_for(url, poolclass=ReplicaQueuePool) for url in DATABASE_READ_URLS])
+    if DATABASE_READ_URLS else None
+)
+
+
+async def monitor_replicas(stop: asyncio.Event):
+    """Vérifie les répliques toutes les DB_REPLICA_CHECK_INTERVAL secondes (lifespan)."""
+    if read_router:
+        await read_router.monitor(REPLICA_CHECK_INTERVAL, stop)
+
+
+def wrote_recently(request: Request) -> bool:
+    """Le client a écrit il y a moins de READ_YOUR_WRITES_SECONDS (cookie)."""
     try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def reads_own_writes(db) -> bool:
+    """Session de lecture forcée sur le primaire après une écriture du client.
+
+    Les handlers ignorent alors le cache de réponses : une lecture sur une
+    réplique en retard a pu y remettre des données antérieures à l'écriture.
+    """
+    return db.info.get("read_your_writes", False)
+
+
+def reads_from_replica(db) -> bool:
+    """Session liée à une réplique, qui peut être en retard sur le primaire.
+
+    Ses lectures peuvent servir un hit du cache de réponses mais ne le
+    remplissent jamais : sinon une ligne antérieure à une écriture y serait
+    rangée sous la nouvelle génération et servie à tous jusqu'au TTL.
+    """
+    return db.info.get("replica", False)
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    """Session pour les handlers en lecture seule : une réplique si possible.
+
+    Le primaire (`db`, la session de get_db : aucune connexion n'est
+    ouverte tant qu'elle n'exécute rien) sert les lectures quand aucune
+    réplique n'est configurée ou saine, et celles d'un client qui vient
+    d'écrire.
+    """
+    router = read_router
+    if router is None:
+        yield db
+        return
+    if wrote_recently(request):
+        router.primary_reads += 1
+        db.info["read_your_writes"] = True
         yield db
-    finally:
-        db.close()
+        return
+    index = router.choose()
+    if index is None:
+        router.fallbacks += 1
+        yield db
+        return
+    router.reads[index] += 1
+    async with router.sessions[index]() as replica:
+        replica.info["replica"] = True
+        try:
+            yield replica
+        except REPLICA_ERRORS as e:
+            router.mark(index, False, str(e))
+            raise
+
+
+class ReadYourWritesMiddleware:
+    """Pose le cookie read-your-writes sur les écritures réussies (ASGI pur).
+
+    Sans effet si aucune réplique n'est configurée. Le cookie porte son
+    échéance : tous les workers l'interprètent de la même façon.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or read_router is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + READ_YOUR_WRITES_SECONDS
+                cookie = (f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={int(READ_YOUR_WRITES_SECONDS) or 1}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+async def init_db():
+    """Met le schéma à jour (migrations Alembic, voir schema.py).
+
+    Schéma déjà à jour : une seule lecture de la table alembic_version.
+    """
+    from . import schema
+    async with engine.connect() as conn:
+        await conn.run_sync(schema.ensure_schema, AUTO_MIGRATE)
+
+def pool_stats() -> dict:
+    """Métriques du pool de connexions (taille, en cours d'utilisation, attente)."""
+    return pool_metrics.snapshot(engine.pool)
+
+def pool_timeouts() -> int:
+    """Checkouts expirés depuis le démarrage (primaire et répliques : signal de surcharge)."""
+    return pool_metrics.timeouts + replica_pool_metrics.timeouts
+
+def replica_stats() -> Optional[dict]:
+    """État des répliques en lecture et attente de leurs pools (None : aucune configurée)."""
+    if not read_router:
+        return None
+    return {**read_router.stats(), "pool": replica_pool_metrics.snapshot()}
 
-def init_db():
-    """Initialise la base de données en créant toutes les tables."""
-    from . import models
-    Base.metadata.create_all(bind=engine)
+async def close_db():
+    """Ferme les connexions du pool (appelé à l'arrêt de l'application)."""
+    await engine.dispose()
+    if read_router:
+        await read_router.dispose()
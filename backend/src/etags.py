@@ -0,0 +1,65 @@
+"""
+ETags et requêtes conditionnelles (If-None-Match / If-Match).
+
+- Une tâche a l'ETag fort `"<id>.<version>"` : la colonne `version` est
+  incrémentée à chaque écriture (updated_at n'a qu'une précision d'une
+  seconde sous SQLite, deux écritures rapprochées auraient le même ETag).
+- Une page de liste a pour ETag un condensat des couples (id, version)
+  qu'elle contient : toute création, modification ou suppression dans la
+  page le change, sans avoir à sérialiser le corps.
+"""
+
+import hashlib
+from typing import Iterable, List, Optional
+
+
+def task_etag(task_id: str, version: int) -> str:
+    return f'"{task_id}.{version}"'
+
+
+def list_etag(rows: Iterable, *parts: Optional[str]) -> str:
+    """ETag d'une page : (id, version) de chaque ligne + paramètres de forme."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(f"{part or ''}|".encode())
+    for row in rows:
+        digest.update(f"{row.id}.{row.version};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _tags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True si le client a déjà cette représentation (comparaison faible, RFC 9110)."""
+    if not header:
+        return False
+    tags = _tags(header)
+    if "*" in tags:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in tags)
+
+
+def if_match_versions(header: Optional[str], task_id: str) -> Optional[List[int]]:
+    """Versions de `task_id` acceptées par If-Match (None : aucune condition de version).
+
+    La précondition est ainsi vérifiée par le WHERE de l'UPDATE / DELETE
+    lui-même, sans lire la tâche avant. `*` n'exige que son existence ;
+    un ETag faible ou celui d'une autre tâche ne correspond jamais.
+    """
+    if header is None:
+        return None
+    tags = _tags(header)
+    if "*" in tags:
+        return None
+    prefix = f'"{task_id}.'
+    versions = []
+    for tag in tags:
+        if tag.startswith(prefix) and tag.endswith('"'):
+            try:
+                versions.append(int(tag[len(prefix):-1]))
+            except ValueError:
+                pass
+    return versions
@@ -0,0 +1,274 @@
+"""
+Diffusion des écritures aux clients connectés (GET /tasks/stream en SSE,
+ou WebSocket sur le même chemin).
+
+- `EventHub` : fan-out asyncio vers les abonnés de ce worker. Chaque
+  abonné a une file bornée ; un client trop lent qui la remplit reçoit
+  un unique événement `resync` puis est déconnecté (il se recale avec
+  GET /tasks/changes). Un abonné lent ne bloque donc jamais les écritures
+  ni les autres abonnés, et la mémoire reste bornée.
+- Broker : transporte les événements entre workers. `MemoryBroker`
+  (par défaut) les livre directement dans le processus ; `RedisBroker`
+  passe par PUBLISH / SUBSCRIBE pour que tous les workers uvicorn
+  reçoivent les écritures des autres.
+
+Configuration : EVENTS_BROKER (memory | redis), EVENTS_URL,
+EVENTS_QUEUE_SIZE, EVENTS_KEEPALIVE_SECONDS.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+from typing import Callable, List, Optional
+
+from .cache import RedisBackend, RedisError, encode_command, read_reply
+
+logger = logging.getLogger("taskflow")
+
+EVENTS_CHANNEL = "taskflow:tasks:events"
+
+
+class TaskEvent:
+    """Événement déjà sérialisé une fois pour tous les abonnés."""
+
+    __slots__ = ("type", "seq", "data")
+
+    def __init__(self, payload: dict):
+        self.type = payload["type"]
+        self.seq = payload.get("seq")
+        self.data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+    def sse(self) -> bytes:
+        lines = [f"event: {self.type}"]
+        if self.seq is not None:
+            lines.append(f"id: {self.seq}")
+        lines.append(f"data: {self.data}")
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+# Événements de contrôle
+RESYNC = TaskEvent({"type": "resync"})   # file pleine : le client doit se recaler
+CLOSED = TaskEvent({"type": "closed"})   # arrêt du serveur
+
+
+class Subscription:
+    """File bornée d'un client connecté."""
+
+    def __init__(self, size: int):
+        self.queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(size)
+        self.lagged = False
+
+    def offer(self, event: TaskEvent) -> bool:
+        """Ajoute sans attendre ; False si l'abonné vient de décrocher."""
+        if self.lagged:
+            return True
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            # on vide la file : le client n'a plus que l'ordre de se recaler
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.lagged = True
+            return False
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSED)
+
+    async def next(self) -> TaskEvent:
+        return await self.queue.get()
+
+
+class MemoryBroker:
+    """Broker local : les événements ne sortent pas du processus."""
+
+    async def start(self, deliver: Callable[[List[dict]], None]):
+        self._deliver = deliver
+
+    async def publish(self, events: List[dict]):
+        self._deliver(events)
+
+    async def stop(self):
+        pass
+
+
+class RedisBroker:
+    """Broker Redis PUBLISH / SUBSCRIBE partagé par les workers.
+
+    Les événements de ce worker lui reviennent aussi par l'abonnement :
+    ils ne sont livrés qu'une fois, dans le même ordre partout.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", channel: str = EVENTS_CHANNEL,
+                 reconnect_delay: float = 1.0):
+        self.publisher = RedisBackend(url)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._listener: Optional[asyncio.Task] = None
+        self.subscribed = asyncio.Event()
+
+    async def start(self, deliver: Callable[[List[dict]], None]):
+        self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def publish(self, events: List[dict]):
+        await self.publisher.publish(self.channel, json.dumps(events, separators=(",", ":")))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        await self.publisher.close()
+
+    async def _listen(self, deliver):
+        """Connexion d'abonnement dédiée, rouverte après une erreur réseau."""
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(self.publisher.host, self.publisher.port)
+                if self.publisher.password:
+                    writer.write(encode_command("AUTH", self.publisher.password))
+                    await read_reply(reader)
+                writer.write(encode_command("SUBSCRIBE", self.channel))
+                await writer.drain()
+                while True:
+                    reply = await read_reply(reader)
+                    if reply[0] == b"subscribe":
+                        self.subscribed.set()
+                    elif reply[0] == b"message":
+                        deliver(json.loads(reply[2]))
+            except (OSError, asyncio.IncompleteReadError, RedisError, ValueError) as e:
+                self.subscribed.clear()
+                logger.warning("Events broker connection lost: %s", e)
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class EventHub:
+    """Fan-out des événements vers les abonnés locaux, via le broker."""
+
+    def __init__(self, broker, queue_size: int = 100):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.published = 0
+        self.delivered = 0
+        self.disconnected_slow = 0
+        self.errors = 0
+
+    async def start(self):
+        await self.broker.start(self._deliver)
+
+    async def stop(self):
+        self.close_streams()
+        await self.broker.stop()
+
+    def close_streams(self):
+        """Termine les flux ouverts (événement `closed`)."""
+        for subscription in self.subscribers:
+            subscription.close()
+
+    def close_streams_on_exit(self):
+        """Ferme les flux dès SIGINT / SIGTERM.
+
+        uvicorn attend la fin des connexions avant l'arrêt du lifespan : un
+        flux ouvert bloquerait l'arrêt jusqu'à ce que le client parte. On
+        chaîne donc le gestionnaire de signal d'uvicorn (installé avant le
+        lifespan, restauré par lui à la sortie).
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                loop.call_soon_threadsafe(self.close_streams)
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    async def publish(self, events: List[dict]):
+        """À appeler après le COMMIT ; une erreur du broker ne fait pas échouer l'écriture."""
+        if not events:
+            return
+        self.published += len(events)
+        try:
+            await self.broker.publish(events)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Events broker error: %s", e)
+
+    def subscribe(self) -> "_Subscribed":
+        return _Subscribed(self)
+
+    def _deliver(self, events: List[dict]):
+        for payload in events:
+            event = TaskEvent(payload)
+            for subscription in self.subscribers:
+                if subscription.offer(event):
+                    self.delivered += 1
+                else:
+                    self.disconnected_slow += 1
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "disconnected_slow": self.disconnected_slow,
+            "errors": self.errors,
+        }
+
+
+class _Subscribed:
+    """`with hub.subscribe() as subscription:` (désabonnement garanti)."""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+        self.subscription = Subscription(hub.queue_size)
+
+    def __enter__(self) -> Subscription:
+        self.hub.subscribers.add(self.subscription)
+        return self.subscription
+
+    def __exit__(self, *exc):
+        self.hub.subscribers.discard(self.subscription)
+
+
+async def sse_stream(subscription: Subscription, keepalive: float):
+    """Trames text/event-stream ; commentaire keepalive quand rien ne se passe."""
+    yield b"retry: 3000\n\n"
+    while True:
+        try:
+            event = await asyncio.wait_for(subscription.next(), keepalive)
+        except asyncio.TimeoutError:
+            yield b": keepalive\n\n"
+            continue
+        if event is CLOSED:
+            return
+        yield event.sse()
+        if event is RESYNC:
+            return
+
+
+def build_event_hub() -> EventHub:
+    """Construit le hub à partir des variables d'environnement."""
+    queue_size = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    if os.getenv("EVENTS_BROKER", "memory").lower() == "redis":
+        url = os.getenv("EVENTS_URL") or os.getenv("CACHE_URL", "redis://localhost:6379/0")
+        return EventHub(RedisBroker(url), queue_size)
+    return EventHub(MemoryBroker(), queue_size)
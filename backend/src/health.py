@@ -0,0 +1,82 @@
+"""
+Health checks : liveness / readiness et compteur de tâches en cache.
+
+Les sondes du load balancer ne doivent jamais lancer un COUNT(*) sur la
+table tasks : le nombre de tâches est gardé en mémoire, ajusté à chaque
+écriture et recalculé périodiquement en tâche de fond (estimation
+`reltuples` sur PostgreSQL, COUNT(*) ailleurs).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import func, select, text
+
+from .models import TaskModel
+
+logger = logging.getLogger("taskflow")
+
+
+class TaskCounter:
+    """Nombre approximatif de tâches, sans requête au moment de la lecture."""
+
+    def __init__(self):
+        self.value: Optional[int] = None
+        self.estimated = False
+        self.refreshed_at: Optional[float] = None
+
+    def add(self, delta: int):
+        """Ajuste le compteur après une écriture (ignoré tant qu'il est inconnu)."""
+        if self.value is not None:
+            self.value = max(0, self.value + delta)
+
+    async def refresh(self, db):
+        """Recalcule le compteur depuis la base."""
+        if db.get_bind().dialect.name == "postgresql":
+            # Estimation du planner : O(1), mise à jour par VACUUM / ANALYZE
+            estimate = await db.scalar(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = 'tasks'::regclass"
+            ))
+            if estimate is not None and estimate >= 0:
+                self._set(int(estimate), estimated=True)
+                return
+        count = await db.scalar(select(func.count()).select_from(TaskModel))
+        self._set(count, estimated=False)
+
+    def snapshot(self) -> dict:
+        age = None if self.refreshed_at is None else round(time.monotonic() - self.refreshed_at, 1)
+        return {
+            "tasks_count": self.value,
+            "tasks_count_estimated": self.estimated,
+            "tasks_count_age_seconds": age,
+        }
+
+    def _set(self, value: int, estimated: bool):
+        self.value = value
+        self.estimated = estimated
+        self.refreshed_at = time.monotonic()
+
+
+async def refresh_periodically(counter: TaskCounter, session_factory, interval: float, stop: asyncio.Event):
+    """Boucle de fond : rafraîchit le compteur toutes les `interval` secondes.
+
+    S'arrête quand `stop` est positionné, sans interrompre une requête en
+    cours (annuler la tâche pourrait laisser une transaction ouverte).
+    """
+    while not stop.is_set():
+        try:
+            async with session_factory() as db:
+                await counter.refresh(db)
+        except Exception as e:
+            logger.warning("Task count refresh failed: %s", e)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def check_database(db, timeout: float):
+    """Vérifie qu'une connexion du pool répond en moins de `timeout` secondes."""
+    await asyncio.wait_for(db.execute(text("SELECT 1")), timeout=timeout)
@@ -0,0 +1,51 @@
+"""
+Identifiants des tâches : UUIDv7 (RFC 9562), ordonnés dans le temps.
+
+Les 48 premiers bits sont l'heure en millisecondes : les nouvelles clés
+arrivent en fin d'index (B-tree) au lieu d'un endroit aléatoire comme
+avec uuid4, ce qui évite de fragmenter l'index et garde les pages
+chaudes en cache. Dans une même milliseconde, les 12 bits suivants
+servent de compteur (méthode 1 de la RFC) : les identifiants d'un
+processus sont strictement croissants.
+
+Stockage (models.TaskId) : type uuid natif sous PostgreSQL, 16 octets
+sous SQLite ; l'API les échange toujours sous forme de chaîne.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+# Compteur sur 12 bits, tiré au hasard dans sa moitié basse à chaque nouvelle
+# milliseconde (reste de la marge pour incrémenter)
+_COUNTER_MAX = 0xFFF
+_COUNTER_SEED_MASK = 0x7FF
+
+
+def uuid7() -> uuid.UUID:
+    """Nouvel UUIDv7, strictement supérieur au précédent dans ce processus."""
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2), "big") & _COUNTER_SEED_MASK
+        else:
+            # même milliseconde (ou horloge revenue en arrière) : on incrémente
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(timestamp << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | random_bits)
+
+
+def new_task_id() -> str:
+    """Identifiant d'une nouvelle tâche, au format texte de l'API."""
+    return str(uuid7())
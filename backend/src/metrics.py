@@ -0,0 +1,322 @@
+"""
+Métriques au format texte Prometheus, servies par GET /metrics.
+
+- `MetricsMiddleware` (ASGI pur, sans BaseHTTPMiddleware) : nombre de
+  requêtes, histogramme de latence et requêtes en cours, par méthode et
+  par modèle de route (`/tasks/{task_id}`, jamais le chemin brut : le
+  nombre de séries reste borné).
+- `instrument_engine` : compte les requêtes SQL et leur durée, au total
+  et par requête HTTP (le contexte de la requête est porté par une
+  ContextVar). Les durées viennent de `on_query`, chronométrage unique
+  partagé avec le profilage SQL (profiling.py).
+
+Chaque worker a son propre registre : Prometheus agrège les workers.
+Configuration : METRICS_ENABLED (true par défaut).
+"""
+
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+# Bornes (secondes) des histogrammes de latence, celles du client Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bornes du nombre de requêtes SQL par requête HTTP
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+# Regroupement des écritures : tâches par lot, attente ajoutée (secondes)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+BATCH_WAIT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Compteur monotone, une série par tuple de labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Valeur instantanée (peut descendre)."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, labels: Tuple, value: float):
+        self.values[labels] = value
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets `le`, `_sum`, `_count`)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [compteurs par bucket (non cumulés) + un pour +Inf, somme]
+        self.series: Dict[Tuple, List] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, labels: Tuple = ()) -> int:
+        series = self.series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def sum(self, labels: Tuple = ()) -> float:
+        series = self.series.get(labels)
+        return series[1] if series else 0.0
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class RequestStats:
+    """Requêtes SQL exécutées pendant une requête HTTP."""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Statistiques SQL de la requête HTTP en cours (None hors requête)."""
+    return _request_stats.get()
+
+
+class MetricsRegistry:
+    """Ensemble des métriques de l'application et rendu texte Prometheus."""
+
+    def __init__(self):
+        route = ("method", "route")
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by route template and status.", route + ("status",))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "HTTP request latency in seconds.", route)
+        self.in_progress = Gauge(
+            "http_requests_in_progress", "HTTP requests currently being served.", route)
+        self.db_queries = Counter("db_queries_total", "SQL statements executed.")
+        self.db_latency = Histogram(
+            "db_query_duration_seconds", "SQL statement execution time in seconds.")
+        self.request_queries = Histogram(
+            "http_request_db_queries", "SQL statements per HTTP request.", route, QUERY_COUNT_BUCKETS)
+        self.request_db_time = Histogram(
+            "http_request_db_duration_seconds", "Time spent in SQL per HTTP request.", route)
+        self.pool = Gauge("db_pool_connections", "Connection pool connections by state.", ("state",))
+        self.admission_limit = Gauge(
+            "admission_concurrency_limit", "Adaptive concurrency limit by route class.", ("class",))
+        self.admission_in_flight = Gauge(
+            "admission_in_flight", "Admitted requests being served by route class.", ("class",))
+        self.admission_queued = Gauge(
+            "admission_queued", "Requests waiting for a slot by route class.", ("class",))
+        self.admission_rejected = Counter(
+            "admission_rejected_total", "Requests shed with 503 or 429, by route class and reason.",
+            ("class", "reason"))
+        self.write_batch_size = Histogram(
+            "write_batch_size", "Task inserts committed together by the write batcher.", (), BATCH_SIZE_BUCKETS)
+        self.write_batch_wait = Histogram(
+            "write_batch_wait_seconds", "Time a task insert waited for its batch to start.", (),
+            BATCH_WAIT_BUCKETS)
+        self.write_batch_fallbacks = Counter(
+            "write_batch_fallbacks_total", "Failed batches retried one insert at a time.")
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        labels = (method, route)
+        self.requests.inc(labels + (str(status),))
+        self.latency.observe(labels, seconds)
+        self.request_queries.observe(labels, stats.queries)
+        self.request_db_time.observe(labels, stats.db_seconds)
+
+    def observe_query(self, seconds: float):
+        self.db_queries.inc()
+        self.db_latency.observe((), seconds)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+    def observe_write_batch(self, size: int, waits: Iterable[float]):
+        """Un lot du regroupement des écritures (batching.WriteBatcher)."""
+        self.write_batch_size.observe((), size)
+        for wait in waits:
+            self.write_batch_wait.observe((), wait)
+
+    def set_pool_stats(self, stats: dict):
+        for state in ("in_use", "idle", "overflow"):
+            if state in stats:
+                self.pool.set((state,), stats[state])
+
+    def set_admission_stats(self, stats: dict):
+        """Recopie les compteurs du contrôle d'admission (admission.AdmissionControl.stats)."""
+        for name, limit in stats["classes"].items():
+            self.admission_limit.set((name,), limit["limit"])
+            self.admission_in_flight.set((name,), limit["in_flight"])
+            self.admission_queued.set((name,), limit["queued"])
+            for reason, count in limit["rejected"].items():
+                self.admission_rejected.values[(name, reason)] = count
+        if stats["rate_limit"]:
+            self.admission_rejected.values[("any", "rate_limit")] = stats["rate_limit"]["limited"]
+
+    def metrics(self):
+        return [self.requests, self.latency, self.in_progress, self.db_queries, self.db_latency,
+                self.request_queries, self.request_db_time, self.pool, self.admission_limit,
+                self.admission_in_flight, self.admission_queued, self.admission_rejected,
+                self.write_batch_size, self.write_batch_wait, self.write_batch_fallbacks]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def route_template(routes, scope) -> str:
+    """Modèle de la route qui traitera la requête (`/tasks/{task_id}`)."""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path   # bon chemin, autre méthode (405)
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence, statut et requêtes SQL de chaque requête HTTP."""
+
+    def __init__(self, app, registry: MetricsRegistry, routes):
+        self.app = app
+        self.registry = registry
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], route_template(self.routes, scope))
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        self.registry.in_progress.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.in_progress.dec(labels)
+            _request_stats.reset(token)
+            self.registry.observe_request(*labels, status, elapsed, stats)
+
+
+# Abonnés de chaque moteur à la durée de ses requêtes SQL (métriques, profilage)
+_query_observers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def on_query(sync_engine, observer: Callable):
+    """Appelle `observer(statement, seconds, cursor, executemany)` après chaque requête SQL.
+
+    Un seul couple d'écouteurs before/after_cursor_execute par moteur, quel
+    que soit le nombre d'abonnés : chaque requête n'est chronométrée qu'une
+    fois. Une requête en échec est transmise avec `cursor` à None.
+    """
+    observers = _query_observers.get(sync_engine)
+    if observers is None:
+        observers = _query_observers[sync_engine] = []
+        _time_queries(sync_engine, observers)
+    observers.append(observer)
+
+
+def _time_queries(sync_engine, observers: List[Callable]):
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        for observer in observers:
+            observer(statement, seconds, cursor, executemany)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed_query(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            seconds = time.perf_counter() - starts.pop()
+            for observer in observers:
+                observer(exception_context.statement, seconds, None, False)
+
+
+def instrument_engine(sync_engine, registry: MetricsRegistry):
+    """Mesure chaque requête SQL exécutée par le moteur."""
+    on_query(sync_engine, lambda statement, seconds, cursor, executemany: registry.observe_query(seconds))
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,57 @@
+"""
+Environnement Alembic.
+
+Utilisé par src/schema.py (connexion de l'application passée dans
+config.attributes["connection"]) et par la CLI `alembic` lancée depuis
+backend/ (alembic.ini), qui ouvre alors sa propre connexion sur
+DATABASE_URL. `alembic revision --autogenerate` compare la base à
+Base.metadata.
+"""
+
+import asyncio
+
+from alembic import context
+
+from src import models  # noqa: F401  (tables enregistrées dans Base.metadata)
+from src.database import Base, DATABASE_URL, engine, to_async_url
+from src.schema import include_object
+
+target_metadata = Base.metadata
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # une transaction par migration : CREATE INDEX CONCURRENTLY s'exécute hors transaction
+        transaction_per_migration=True,
+        # SQLite ne sait pas modifier une colonne : Alembic recrée la table
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_online():
+    async with engine.connect() as connection:
+        await connection.run_sync(run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    # alembic upgrade --sql : script SQL à relire / appliquer à la main
+    url, _ = to_async_url(context.config.get_main_option("sqlalchemy.url") or DATABASE_URL)
+    context.configure(
+        url=url.set(drivername=url.get_backend_name()),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+elif context.config.attributes.get("connection") is not None:
+    run_migrations(context.config.attributes["connection"])
+else:
+    asyncio.run(run_online())
@@ -0,0 +1,38 @@
+"""Create the tasks table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("description", sa.String(1000), nullable=True),
+        # SQLAlchemy enregistre le nom des membres de l'énumération (TODO, ...)
+        sa.Column("status", sa.Enum("TODO", "IN_PROGRESS", "DONE", name="taskstatus"), nullable=True),
+        sa.Column("priority", sa.Enum("LOW", "MEDIUM", "HIGH", name="taskpriority"), nullable=True),
+        sa.Column("assignee", sa.String(100), nullable=True),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    sa.Enum(name="taskstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="taskpriority").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,31 @@
+"""Index the GET /tasks filters and pagination order
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from src.schema import create_index_online, drop_index_online
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_tasks_created_at_id": ["created_at", "id"],
+    "ix_tasks_assignee_status": ["assignee", "status"],
+    "ix_tasks_status_priority": ["status", "priority"],
+    "ix_tasks_priority": ["priority"],
+    "ix_tasks_due_date": ["due_date"],
+}
+
+
+def upgrade():
+    for name, columns in INDEXES.items():
+        create_index_online(name, "tasks", columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        drop_index_online(name, "tasks")
@@ -0,0 +1,24 @@
+"""Add tasks.version (ETags and optimistic locking)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # défaut constant : PostgreSQL (11+) n'a pas à réécrire la table
+    op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    # SQLite >= 3.35 : ALTER TABLE DROP COLUMN (sans recréer la table ni ses triggers)
+    op.drop_column("tasks", "version")
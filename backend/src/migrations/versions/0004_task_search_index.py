@@ -0,0 +1,37 @@
+"""Full-text search index on title and description
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.schema import create_index_online, drop_index_online
+from src.search import POSTGRES_SEARCH_VECTOR, SQLITE_SEARCH_DDL
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_context().dialect.name == "postgresql":
+        create_index_online("ix_tasks_search", "tasks", [sa.text(f"({POSTGRES_SEARCH_VECTOR})")],
+                            postgresql_using="gin")
+        return
+    # SQLite : table FTS5 + triggers, puis indexation des tâches existantes
+    for statement in SQLITE_SEARCH_DDL:
+        op.execute(statement)
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES('rebuild')")
+
+
+def downgrade():
+    if op.get_context().dialect.name == "postgresql":
+        drop_index_online("ix_tasks_search", "tasks")
+        return
+    for trigger in ("tasks_fts_insert", "tasks_fts_delete", "tasks_fts_update"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
@@ -0,0 +1,49 @@
+"""Change feed: tasks.change_seq, tombstones and the change counter
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.schema import create_index_online, drop_index_online
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # défaut constant : PostgreSQL (11+) n'a pas à réécrire la table
+    op.add_column("tasks", sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    # IF NOT EXISTS : create_all a pu créer ces tables à côté d'une ancienne table tasks
+    op.create_table(
+        "task_tombstones",
+        sa.Column("task_id", sa.String(), primary_key=True),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_task_tombstones_change_seq", "task_tombstones", ["change_seq", "task_id"],
+                    if_not_exists=True)
+    op.create_table(
+        "change_sequence",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        if_not_exists=True,
+    )
+    op.execute("INSERT INTO change_sequence (id, value) SELECT 1, 0 "
+               "WHERE NOT EXISTS (SELECT 1 FROM change_sequence WHERE id = 1)")
+    create_index_online("ix_tasks_change_seq_id", "tasks", ["change_seq", "id"])
+
+
+def downgrade():
+    drop_index_online("ix_tasks_change_seq_id", "tasks")
+    op.drop_table("change_sequence")
+    op.drop_index("ix_task_tombstones_change_seq", table_name="task_tombstones")
+    op.drop_table("task_tombstones")
+    # SQLite >= 3.35 : ALTER TABLE DROP COLUMN (sans recréer la table ni ses triggers)
+    op.drop_column("tasks", "change_seq")
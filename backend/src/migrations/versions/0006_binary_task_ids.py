@@ -0,0 +1,97 @@
+"""Task ids stored as native uuid (PostgreSQL) / 16-byte blobs (SQLite)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+import uuid
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from src.search import SQLITE_SEARCH_DDL
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# (table, colonne) des identifiants de tâche
+ID_COLUMNS = [("tasks", "id"), ("task_tombstones", "task_id")]
+UUID_PATTERN = "^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$"
+SEARCH_TRIGGERS = ("tasks_fts_insert", "tasks_fts_delete", "tasks_fts_update")
+BATCH_SIZE = 10_000
+
+
+def _check_ids(bind):
+    """Refuse la migration si un identifiant n'est pas un UUID (créé hors de l'API)."""
+    for table, column in ID_COLUMNS:
+        if bind.dialect.name == "postgresql":
+            invalid = bind.execute(sa.text(
+                f"SELECT {column} FROM {table} WHERE {column} !~* :pattern LIMIT 5"
+            ), {"pattern": UUID_PATTERN}).scalars().all()
+        else:
+            invalid = []
+            for (value,) in bind.execute(sa.text(f"SELECT {column} FROM {table}")):
+                try:
+                    uuid.UUID(value)
+                except (AttributeError, TypeError, ValueError):
+                    invalid.append(value)
+        if invalid:
+            raise RuntimeError(
+                f"{table}.{column} contains ids that are not UUIDs (e.g. {invalid[:5]}): "
+                "change or delete these rows, then run the migration again"
+            )
+
+
+def _convert_sqlite(bind, table: str, column: str, convert):
+    """Réécrit chaque valeur de `column` (par lots, repérés par rowid)."""
+    rows = bind.execute(sa.text(f"SELECT rowid, {column} FROM {table}")).all()
+    update = sa.text(f"UPDATE {table} SET {column} = :value WHERE rowid = :row")
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(update, [{"row": row, "value": convert(value)} for row, value in rows[start:start + BATCH_SIZE]])
+
+
+def _retype_sqlite(type_):
+    """SQLite : valeurs converties, puis tables recréées avec le type déclaré.
+
+    La recopie de tasks supprime ses triggers et renumérote les rowid :
+    l'index plein texte est recréé et reconstruit ensuite.
+    """
+    for trigger in SEARCH_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table, column in ID_COLUMNS:
+        with op.batch_alter_table(table, recreate="always") as batch:
+            batch.alter_column(column, type_=type_, existing_nullable=False)
+    for statement in SQLITE_SEARCH_DDL:
+        op.execute(statement)
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES('rebuild')")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not op.get_context().as_sql:  # (--sql : pas de données à vérifier)
+        _check_ids(bind)
+    if bind.dialect.name == "postgresql":
+        # réécriture de la table (verrou exclusif pendant la conversion)
+        for table, column in ID_COLUMNS:
+            op.alter_column(table, column, type_=postgresql.UUID(), existing_nullable=False,
+                            postgresql_using=f"{column}::uuid")
+        return
+    for table, column in ID_COLUMNS:
+        _convert_sqlite(bind, table, column, lambda value: uuid.UUID(value).bytes)
+    _retype_sqlite(sa.LargeBinary(16))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for table, column in ID_COLUMNS:
+            op.alter_column(table, column, type_=sa.String(), existing_nullable=False,
+                            postgresql_using=f"{column}::text")
+        return
+    for table, column in ID_COLUMNS:
+        _convert_sqlite(bind, table, column, lambda value: str(uuid.UUID(bytes=bytes(value))))
+    _retype_sqlite(sa.String())
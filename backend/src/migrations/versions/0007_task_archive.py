@@ -0,0 +1,63 @@
+"""Archive table for done tasks and the index used to find them
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from src.schema import create_index_online, drop_index_online
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Colonnes communes à tasks et tasks_archive (copie au downgrade)
+TASK_COLUMNS = ("id, title, description, status, priority, assignee, due_date, "
+                "created_at, updated_at, version, change_seq")
+
+
+def _enum(*values, name: str):
+    """Type énuméré existant (PostgreSQL : créé par 0001, à ne pas recréer)."""
+    if op.get_context().dialect.name == "postgresql":
+        return postgresql.ENUM(*values, name=name, create_type=False)
+    return sa.Enum(*values, name=name)
+
+
+def upgrade():
+    postgres = op.get_context().dialect.name == "postgresql"
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", postgresql.UUID() if postgres else sa.LargeBinary(16), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("description", sa.String(1000), nullable=True),
+        sa.Column("status", _enum("TODO", "IN_PROGRESS", "DONE", name="taskstatus"), nullable=True),
+        sa.Column("priority", _enum("LOW", "MEDIUM", "HIGH", name="taskpriority"), nullable=True),
+        sa.Column("assignee", sa.String(100), nullable=True),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_tasks_archive_created_at_id", "tasks_archive", ["created_at", "id"], if_not_exists=True)
+    create_index_online("ix_tasks_status_updated_at", "tasks", ["status", "updated_at"])
+
+
+def downgrade():
+    drop_index_online("ix_tasks_status_updated_at", "tasks")
+    # les tâches archivées reviennent dans tasks plutôt que d'être perdues ;
+    # sans leur tombe et avec un nouveau numéro de changement, pour que les
+    # clients synchronisés (qui les ont effacées) les récupèrent
+    op.execute("UPDATE change_sequence SET value = value + 1 WHERE id = 1")
+    restored_columns = TASK_COLUMNS.replace("change_seq", "(SELECT value FROM change_sequence WHERE id = 1)")
+    op.execute(f"INSERT INTO tasks ({TASK_COLUMNS}) SELECT {restored_columns} FROM tasks_archive")
+    op.execute("DELETE FROM task_tombstones WHERE task_id IN (SELECT id FROM tasks_archive)")
+    op.drop_index("ix_tasks_archive_created_at_id", table_name="tasks_archive")
+    op.drop_table("tasks_archive")
@@ -1,5 +1,8 @@
+import uuid
 from enum import Enum
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum
+from sqlalchemy import BigInteger, Column, DDL, String, DateTime, Index, Integer, Enum as SQLEnum, event
+from sqlalchemy import LargeBinary, TypeDecorator
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.sql import func
 
 from .database import Base
@@ -19,16 +22,146 @@ class TaskPriority(str, Enum):
     HIGH = "high"
 
 
+# SQLite remplit CURRENT_TIMESTAMP à la seconde ("2024-01-01 12:00:00") :
+# on lie les paramètres au même format pour que les comparaisons du
+# curseur de pagination (created_at == ...) fonctionnent.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
+class TaskId(TypeDecorator):
+    """Identifiant de tâche : chaîne UUID côté Python et API, 16 octets en base.
+
+    PostgreSQL : type natif uuid ; SQLite : BLOB de 16 octets (au lieu de
+    36 caractères). Toutes les formes acceptées par uuid.UUID sont lues,
+    le résultat est toujours la forme canonique en minuscules. Une chaîne
+    qui n'est pas un UUID est liée comme NULL : elle ne désigne aucune
+    tâche (404, pas d'erreur de conversion).
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            parsed = value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+        except (AttributeError, TypeError, ValueError):
+            return None
+        return parsed if dialect.name == "postgresql" else parsed.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)):
+            return str(uuid.UUID(bytes=bytes(value)))
+        return str(value)  # uuid.UUID (asyncpg : son propre type UUID)
+
+
 class TaskModel(Base):
     """Modèle SQLAlchemy pour la table tasks."""
     __tablename__ = "tasks"
 
-    id = Column(String, primary_key=True, index=True)
+    # UUIDv7 (ids.new_task_id) : clés croissantes, insérées en fin d'index
+    id = Column(TaskId, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(String(1000), nullable=True)
     status = Column(SQLEnum(TaskStatus), default=TaskStatus.TODO)
     priority = Column(SQLEnum(TaskPriority), default=TaskPriority.MEDIUM)
     assignee = Column(String(100), nullable=True)
     due_date = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+    # Compteur de version : base des ETags et du verrouillage optimiste
+    # (UPDATE / DELETE ... WHERE version = <version lue>)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Numéro du dernier changement (GET /tasks/changes), pris dans ChangeSequence
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    # Index alignés sur les filtres de GET /tasks (status / priority / assignee
+    # dans n'importe quelle combinaison) et sur l'ordre de pagination.
+    __table_args__ = (
+        # liste sans filtre : parcours dans l'ordre (created_at, id)
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # assignee, assignee + status (+ priority)
+        Index("ix_tasks_assignee_status", "assignee", "status"),
+        # status, status + priority
+        Index("ix_tasks_status_priority", "status", "priority"),
+        # priority seule
+        Index("ix_tasks_priority", "priority"),
+        # requêtes d'échéance (tâches en retard, à venir)
+        Index("ix_tasks_due_date", "due_date"),
+        # flux de synchronisation : parcours dans l'ordre (change_seq, id)
+        Index("ix_tasks_change_seq_id", "change_seq", "id"),
+        # archivage : tâches terminées les plus anciennes d'abord (archive.py)
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+class ArchivedTaskModel(Base):
+    """Tâche terminée déplacée hors de la table tasks (archive.py), en lecture seule.
+
+    Mêmes colonnes que tasks, plus la date d'archivage ; lue seulement
+    avec `include_archived=true`.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(TaskId, primary_key=True)
+    title = Column(String(200), nullable=False)
+    description = Column(String(1000), nullable=True)
+    status = Column(SQLEnum(TaskStatus))
+    priority = Column(SQLEnum(TaskPriority))
+    assignee = Column(String(100), nullable=True)
+    due_date = Column(DateTime, nullable=True)
+    created_at = Column(Timestamp)
+    updated_at = Column(Timestamp)
+    version = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    archived_at = Column(Timestamp, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # fusion avec les pages de tasks, dans l'ordre (created_at, id)
+        Index("ix_tasks_archive_created_at_id", "created_at", "id"),
+    )
+
+
+class TaskTombstone(Base):
+    """Trace d'une tâche supprimée, pour que les clients synchronisés l'effacent."""
+    __tablename__ = "task_tombstones"
+
+    task_id = Column(TaskId, primary_key=True)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_task_tombstones_change_seq", "change_seq", "task_id"),
+    )
+
+
+class ChangeSequence(Base):
+    """Compteur des changements : une seule ligne (id = 1).
+
+    L'UPDATE qui l'incrémente verrouille la ligne jusqu'au COMMIT : les
+    numéros sont donc visibles dans l'ordre où ils ont été attribués.
+    """
+    __tablename__ = "change_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+event.listen(
+    ChangeSequence.__table__,
+    "after_create",
+    DDL("INSERT INTO change_sequence (id, value) VALUES (1, 0)"),
+)
@@ -0,0 +1,85 @@
+"""
+Pagination par curseur (keyset) pour GET /tasks.
+
+Le curseur encode la clé de tri (created_at, id) de la dernière ligne
+renvoyée : la page suivante reprend juste après, sans OFFSET.
+
+Exception : les résultats de recherche sont triés par pertinence, un score
+qui dépend de toutes les correspondances ; leur curseur encode simplement
+la position (le moteur plein texte classe de toute façon tout le résultat).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou falsifié."""
+
+
+def encode_cursor(created_at: datetime, task_id: str) -> str:
+    """Encode la clé de tri en chaîne opaque (base64 url-safe)."""
+    raw = json.dumps([created_at.isoformat(), task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Décode un curseur produit par encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(task_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Curseur opaque d'une position dans un résultat classé (recherche)."""
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Décode un curseur produit par encode_offset_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("offset must be a positive integer")
+    return offset
+
+
+def encode_change_cursor(change_seq: int, task_id: str) -> str:
+    """Curseur opaque du flux de changements : (change_seq, id) du dernier élément."""
+    return base64.urlsafe_b64encode(json.dumps([change_seq, task_id]).encode()).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, str]:
+    """Décode un curseur produit par encode_change_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        change_seq, task_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(change_seq, int):
+        raise InvalidCursor("change_seq must be an integer")
+    return change_seq, str(task_id)
+
+
+def after_cursor(created_col, id_col, cursor: Optional[Tuple[datetime, str]]):
+    """Condition WHERE "(created_at, id) > curseur" (None si pas de curseur)."""
+    if cursor is None:
+        return None
+    created_at, task_id = cursor
+    return or_(
+        created_col > created_at,
+        and_(created_col == created_at, id_col > task_id),
+    )
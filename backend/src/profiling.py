@@ -0,0 +1,204 @@
+"""
+Profilage SQL par requête HTTP (opt-in : SQL_PROFILING=true).
+
+- `profile_engine` : ajoute chaque requête SQL, avec sa durée, au profil
+  de la requête HTTP en cours (ContextVar). La durée vient des écouteurs
+  de metrics.py (`on_query`) : une requête n'est chronométrée qu'une fois.
+  Une requête plus longue que SQL_SLOW_QUERY_MS est journalisée aussitôt,
+  même hors requête HTTP (tâches de fond).
+- `ProfilingMiddleware` (ASGI pur) : ouvre un profil par requête HTTP,
+  journalise les motifs coûteux détectés à la fin et, si DEBUG=true,
+  ajoute les en-têtes X-DB-Queries / X-DB-Time (ms) à la réponse.
+
+Motifs détectés dans une même requête HTTP :
+
+    n+1                  le même SELECT exécuté SQL_N_PLUS_ONE_THRESHOLD
+                         fois ou plus (paramètres différents)
+    select-before-write  ligne lue par clé puis modifiée / supprimée
+                         (UPDATE ... RETURNING ferait les deux)
+    refresh-after-write  colonnes d'une ligne relues par clé après INSERT /
+                         UPDATE (db.refresh : RETURNING éviterait
+                         l'aller-retour) ; un test d'existence (SELECT de
+                         la seule clé) n'est pas signalé
+
+Journal structuré : une ligne JSON par événement (`slow_query`,
+`sql_patterns`) sur le logger "taskflow.sql", les champs sont aussi
+passés dans `extra={"sql": ...}`. Les paramètres des requêtes ne sont
+jamais journalisés.
+
+Les en-têtes sont fixés à l'envoi de la réponse : pour un flux
+(/tasks/export), ils ne comptent que les requêtes exécutées avant le
+premier octet.
+"""
+
+import json
+import logging
+import os
+import re
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from .metrics import on_query
+
+logger = logging.getLogger("taskflow.sql")
+
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() in ("1", "true", "yes", "on")
+# En-têtes X-DB-* sur les réponses (mode debug uniquement : ils renseignent sur le schéma)
+DEBUG_HEADERS = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes", "on")
+SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# Longueur maximale d'une requête SQL dans le journal
+STATEMENT_LOG_LENGTH = 500
+
+_WRITE = re.compile(r"^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.I)
+_SELECT = re.compile(r"^\s*SELECT\b(.*?)\bFROM\s+(\w+)", re.I | re.S)
+
+
+def _compact(statement: str) -> str:
+    return " ".join(statement.split())[:STATEMENT_LOG_LENGTH]
+
+
+def classify(statement: str) -> Tuple[Optional[str], Optional[str], bool]:
+    """(verbe, table, accès par clé) d'une requête SQL ; (None, None, False) sinon.
+
+    « Par clé » : condition `<table>.id = ` ou `<table>.id IN`, la forme
+    que génèrent db.get, db.refresh et le flush de l'ORM.
+    """
+    match = _WRITE.match(statement)
+    if match:
+        verb, table = match.group(1).split()[0].upper(), match.group(2)
+    else:
+        match = _SELECT.match(statement)
+        if not match:
+            return None, None, False
+        verb, table = "SELECT", match.group(2)
+    by_key = re.search(rf"\bWHERE\s+{table}\.id\s*(=|IN\b)", statement, re.I) is not None
+    return verb, table, by_key
+
+
+def _key_only(statement: str, table: str) -> bool:
+    """SELECT de la seule clé (`tasks.id`, `1`) : test d'existence, pas relecture."""
+    columns = _SELECT.match(statement).group(1).strip()
+    return columns in (f"{table}.id", "1")
+
+
+class QueryProfile:
+    """Requêtes SQL (texte, durée) exécutées pendant une requête HTTP."""
+
+    __slots__ = ("queries",)
+
+    def __init__(self):
+        self.queries: List[Tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def patterns(self, n_plus_one: int = N_PLUS_ONE_THRESHOLD) -> List[dict]:
+        """Motifs coûteux de la requête HTTP (un seul signalement par motif et table)."""
+        found, seen = [], set()
+
+        def flag(pattern: str, **details):
+            key = (pattern, details.get("table"), details.get("statement"))
+            if key not in seen:
+                seen.add(key)
+                found.append({"pattern": pattern, **details})
+
+        repeats = {}
+        read_by_key, written = set(), set()
+        for statement, _ in self.queries:
+            verb, table, by_key = classify(statement)
+            if verb == "SELECT":
+                repeats[statement] = repeats.get(statement, 0) + 1
+                if by_key and table in written and not _key_only(statement, table):
+                    flag("refresh-after-write", table=table)
+                if by_key:
+                    read_by_key.add(table)
+            elif verb in ("UPDATE", "DELETE") and by_key and table in read_by_key:
+                flag("select-before-write", table=table)
+            if verb in ("INSERT", "UPDATE"):
+                written.add(table)
+        for statement, count in repeats.items():
+            if count >= n_plus_one:
+                flag("n+1", statement=_compact(statement), count=count)
+        return found
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("sql_profile", default=None)
+
+
+def current_profile() -> Optional[QueryProfile]:
+    """Profil SQL de la requête HTTP en cours (None hors requête ou si désactivé)."""
+    return _profile.get()
+
+
+def _log(level: int, record: dict):
+    logger.log(level, "%s", json.dumps(record, ensure_ascii=False), extra={"sql": record})
+
+
+def profile_engine(sync_engine, slow_query_ms: Optional[float] = None):
+    """Ajoute chaque requête SQL du moteur au profil (voir le docstring du module).
+
+    La durée vient du chronométrage partagé avec les métriques (`on_query`).
+    """
+
+    def _record(statement, seconds, cursor, executemany):
+        if not SQL_PROFILING or cursor is None:
+            return
+        profile = _profile.get()
+        if profile is not None:
+            profile.queries.append((statement, seconds))
+        threshold = SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        if seconds * 1000 >= threshold:
+            _log(logging.WARNING, {
+                "event": "slow_query",
+                "duration_ms": round(seconds * 1000, 3),
+                "rows": cursor.rowcount,
+                "executemany": executemany,
+                "statement": _compact(statement),
+            })
+
+    on_query(sync_engine, _record)
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI : profil SQL de chaque requête HTTP (si SQL_PROFILING)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILING:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and DEBUG_HEADERS:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-queries", str(profile.count).encode()),
+                    (b"x-db-time", f"{profile.db_seconds * 1000:.3f}".encode()),
+                ]
+            await send(message)
+
+        token = _profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _profile.reset(token)
+            patterns = profile.patterns()
+            if patterns:
+                _log(logging.WARNING, {
+                    "event": "sql_patterns",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "queries": profile.count,
+                    "db_ms": round(profile.db_seconds * 1000, 3),
+                    "patterns": patterns,
+                })
@@ -0,0 +1,242 @@
+"""
+Migrations du schéma (Alembic) : remplacent create_all au démarrage.
+
+- Scripts : src/migrations/versions, un par évolution du schéma, dans
+  l'ordre de l'historique du projet (tasks, index des filtres, version,
+  recherche plein texte, flux de changements, identifiants binaires,
+  archive des tâches terminées).
+- Au démarrage (`init_db`) : la révision enregistrée dans
+  `alembic_version` est comparée à la tête des scripts. Schéma à jour :
+  rien d'autre n'est fait (ni inspection des tables, ni DDL). Sinon les
+  migrations sont appliquées, ou le démarrage échoue si
+  DB_AUTO_MIGRATE=false (migrations lancées à part, avec la CLI).
+- Base créée par create_all avant les migrations (pas de table
+  `alembic_version`) : la révision correspondant au schéma présent est
+  détectée et enregistrée, puis seules les migrations suivantes sont
+  appliquées.
+- PostgreSQL : les index d'une table existante sont créés par
+  `create_index_online` (CREATE INDEX CONCURRENTLY, hors transaction) :
+  les écritures ne sont pas bloquées pendant la construction.
+
+CLI :
+    python -m src.schema upgrade [revision]      # head par défaut
+    python -m src.schema downgrade <revision>
+    python -m src.schema current | check | history
+    python -m src.schema stamp <revision>
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import String, inspect, text
+
+# Alembic (~100 ms d'import) n'est importé que pour migrer : la
+# vérification du démarrage s'en passe.
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+VERSIONS_DIR = MIGRATIONS_DIR / "versions"
+VERSION_TABLE = "alembic_version"
+
+# Tables / index gérés par le SQL brut de search.py, absents de Base.metadata
+SEARCH_OBJECTS = ("tasks_fts", "ix_tasks_search")
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Le schéma de la base n'est pas à la révision attendue par le code."""
+
+
+def alembic_config(connection=None):
+    """Configuration Alembic ; `connection` : connexion synchrone à utiliser."""
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["connection"] = connection
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Dernière révision des scripts : celle qu'aucune autre ne remplace.
+
+    Lue dans les fichiers (une fois par processus) plutôt que par
+    ScriptDirectory, qui demanderait d'importer Alembic.
+    """
+    revisions, replaced = set(), set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        source = path.read_text()
+        revisions.add(re.search(r'^revision = "(\w+)"', source, re.M).group(1))
+        down = re.search(r'^down_revision = "(\w+)"', source, re.M)
+        if down:
+            replaced.add(down.group(1))
+    heads = revisions - replaced
+    if len(heads) != 1:
+        raise RuntimeError(f"Expected a single migration head, found {sorted(heads)}")
+    return heads.pop()
+
+
+def current_revision(connection) -> Optional[str]:
+    """Révision enregistrée en base (None : aucune migration appliquée)."""
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return None
+    return connection.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalar()
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Filtre de l'autogénération : ignore l'index de recherche et ses tables."""
+    return not (name or "").startswith(SEARCH_OBJECTS)
+
+
+def _has_search_index(connection) -> bool:
+    if connection.dialect.name == "postgresql":
+        query = "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_tasks_search'"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    return connection.execute(text(query)).first() is not None
+
+
+def detect_revision(connection) -> Optional[str]:
+    """Révision d'une base créée par create_all (None : base vide).
+
+    Chaque révision se reconnaît à l'objet qu'elle a ajouté. On retient
+    la dernière d'une suite sans trou : create_all n'ajoute jamais de
+    colonne à une table existante, mais l'index de recherche a pu être
+    ajouté à une ancienne table tasks (les migrations suivantes le
+    recréent sans erreur).
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table("tasks"):
+        return None
+    columns = {column["name"]: column["type"] for column in inspector.get_columns("tasks")}
+    markers = {
+        "0002": lambda: "ix_tasks_created_at_id" in {index["name"] for index in inspector.get_indexes("tasks")},
+        "0003": lambda: "version" in columns,
+        "0004": lambda: _has_search_index(connection),
+        "0005": lambda: "change_seq" in columns,
+        # identifiants uuid (PostgreSQL) / BLOB (SQLite) au lieu de VARCHAR
+        "0006": lambda: not isinstance(columns["id"], String),
+        "0007": lambda: inspector.has_table("tasks_archive"),
+    }
+    revision = "0001"
+    for candidate, present in markers.items():
+        if not present():
+            break
+        revision = candidate
+    return revision
+
+
+def upgrade(connection, revision: str = "head"):
+    """Applique les migrations jusqu'à `revision` (adopte une base create_all)."""
+    from alembic import command
+
+    if current_revision(connection) is None:
+        detected = detect_revision(connection)
+        if detected:
+            connection.commit()
+            command.stamp(alembic_config(connection), detected)
+    # Alembic gère ses transactions (une par migration) : aucune ne doit être ouverte
+    connection.commit()
+    command.upgrade(alembic_config(connection), revision)
+
+
+def ensure_schema(connection, auto_migrate: bool = True):
+    """Vérification du démarrage : une lecture si le schéma est à jour."""
+    current = current_revision(connection)
+    connection.commit()
+    if current == head_revision():
+        return
+    if not auto_migrate:
+        raise SchemaOutOfDate(
+            f"Database schema is at {current or 'no revision'}, code expects {head_revision()}: "
+            "run `python -m src.schema upgrade`"
+        )
+    upgrade(connection)
+
+
+def create_index_online(name: str, table: str, columns: List, **kw):
+    """CREATE INDEX dans une migration, sans bloquer les écritures sur `table`.
+
+    PostgreSQL : CONCURRENTLY, dans un bloc autocommit (impossible dans une
+    transaction). Un index déjà présent et valide est conservé ; un index
+    invalide, laissé par une construction interrompue, est reconstruit.
+    Les autres bases : CREATE INDEX ordinaire.
+    """
+    from alembic import op
+
+    if op.get_context().dialect.name != "postgresql":
+        op.create_index(name, table, columns, **kw)
+        return
+    with op.get_context().autocommit_block():
+        # (--sql : pas de connexion, la vérification est omise)
+        valid = None if op.get_context().as_sql else op.get_bind().execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name"
+        ), {"name": name}).scalar()
+        if valid:
+            return
+        if valid is False:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kw)
+
+
+def drop_index_online(name: str, table: str):
+    """DROP INDEX (CONCURRENTLY sous PostgreSQL)."""
+    from alembic import op
+
+    if op.get_context().dialect.name != "postgresql":
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+async def _run(fn, *args):
+    from .database import engine
+
+    try:
+        async with engine.connect() as connection:
+            return await connection.run_sync(fn, *args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.schema", description="Database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("upgrade", help="apply migrations").add_argument("revision", nargs="?", default="head")
+    commands.add_parser("downgrade", help="revert migrations").add_argument("revision")
+    commands.add_parser("stamp", help="record a revision without running it").add_argument("revision")
+    commands.add_parser("current", help="show the database and code revisions")
+    commands.add_parser("check", help="exit with 1 if migrations are pending")
+    commands.add_parser("history", help="list the migrations")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from alembic import command
+    from alembic.script import ScriptDirectory
+
+    if args.command == "history":
+        for script in ScriptDirectory.from_config(alembic_config()).walk_revisions():
+            print(f"{script.revision}  {script.doc}")
+        return 0
+    if args.command == "upgrade":
+        asyncio.run(_run(upgrade, args.revision))
+    elif args.command == "downgrade":
+        asyncio.run(_run(lambda connection: command.downgrade(alembic_config(connection), args.revision)))
+    elif args.command == "stamp":
+        asyncio.run(_run(lambda connection: command.stamp(alembic_config(connection), args.revision)))
+
+    current = asyncio.run(_run(current_revision))
+    print(f"database: {current or 'no revision'}  code: {head_revision()}")
+    if args.command == "check" and current != head_revision():
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
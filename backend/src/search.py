@@ -0,0 +1,122 @@
+"""
+Recherche plein texte sur le titre et la description des tâches.
+
+- SQLite : table virtuelle FTS5 `tasks_fts` à contenu externe (le texte
+  reste dans `tasks`), tenue à jour par des triggers ; classement bm25
+  avec un poids 10 pour le titre.
+- PostgreSQL : index GIN sur l'expression `tsvector` (titre en poids A,
+  description en poids B), classement ts_rank.
+
+Les mots de la requête sont extraits (\\w+) puis combinés en ET, chacun en
+préfixe : "rap pdf" trouve "Rapport PDF mensuel". Aucun opérateur de la
+syntaxe FTS n'est transmis tel quel, et jamais de LIKE '%...%'.
+
+Après un VACUUM SQLite (qui peut renuméroter les rowid), reconstruire
+l'index : INSERT INTO tasks_fts(tasks_fts) VALUES('rebuild').
+"""
+
+import os
+import re
+from typing import List
+
+from sqlalchemy import column, event, func, literal_column, select, table, text
+
+from .models import TaskModel
+
+# Configuration PostgreSQL (text search config) : 'simple' ne dépend pas de la langue
+SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "simple")
+# Nombre maximum de mots pris en compte dans une requête
+MAX_SEARCH_TERMS = 16
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_SEARCH_DDL = [
+    # prefix : index des préfixes de 2 et 3 lettres (recherche pendant la frappe)
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description,
+        content='tasks', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # classement par défaut de la colonne `rank` : le titre pèse 10x la description
+    "INSERT INTO tasks_fts(tasks_fts, rank) VALUES('rank', 'bm25(10.0, 1.0)')",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END""",
+    # uniquement si le texte change : un changement de statut ne touche pas l'index
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END""",
+]
+
+# Même expression dans l'index et dans les requêtes (sinon l'index n'est pas utilisé)
+POSTGRES_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(description, '')), 'B')"
+)
+
+
+def search_terms(q: str) -> List[str]:
+    """Mots de la requête utilisateur, sans aucun opérateur."""
+    return _WORD.findall(q)[:MAX_SEARCH_TERMS]
+
+
+def create_search_index(connection):
+    """Crée l'index plein texte s'il manque (et l'alimente avec les tâches existantes)."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+        ).first()
+        if exists:
+            return
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES('rebuild')")
+    elif dialect == "postgresql":
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING GIN (({POSTGRES_SEARCH_VECTOR}))"
+        )
+
+
+# Créé / supprimé avec la table tasks (create_all / drop_all)
+@event.listens_for(TaskModel.__table__, "after_create")
+def _after_create(table, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(TaskModel.__table__, "before_drop")
+def _before_drop(table, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts")
+
+
+_tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+
+
+def search_query(dialect: str, terms: List[str]):
+    """SELECT des tâches correspondant à tous les mots, les plus pertinentes d'abord."""
+    if dialect == "postgresql":
+        vector = literal_column(f"({POSTGRES_SEARCH_VECTOR})")
+        tsquery = func.to_tsquery(
+            literal_column(f"'{SEARCH_TS_CONFIG}'"), " & ".join(f"{term}:*" for term in terms)
+        )
+        return (
+            select(TaskModel)
+            .where(vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc(), TaskModel.id)
+        )
+
+    return (
+        select(TaskModel)
+        .join(_tasks_fts, _tasks_fts.c.rowid == literal_column("tasks.rowid"))
+        .where(literal_column("tasks_fts").match(" ".join(f'"{term}"*' for term in terms)))
+        .order_by(_tasks_fts.c.rank, TaskModel.id)
+    )
@@ -0,0 +1,61 @@
+"""
+Sérialisation rapide des listes de tâches : lignes SQL -> octets JSON.
+
+Le chemin ORM (`select(TaskModel)` puis `TypeAdapter(List[Task])` en
+`from_attributes`) construit un objet par ligne, le revalide champ par
+champ puis l'encode. Ici on lit des tuples `Row` (`select(*TASK_COLUMNS)`)
+et on les encode directement, sans validation : les valeurs viennent de
+la base et ont déjà les bons types. Le JSON produit est identique octet
+pour octet (voir tests/test_serialization.py) et le schéma OpenAPI reste
+celui de `response_model=List[Task]`.
+
+orjson est utilisé s'il est installé (extra `fast`), sinon pydantic-core
+sérialise les dictionnaires via un TypedDict, sans validation non plus.
+
+Mesures : benchmarks/serialization.py.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from .models import TaskModel, TaskPriority, TaskStatus
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    orjson = None
+
+
+class TaskRow(TypedDict, total=False):
+    """Forme JSON d'une tâche (mêmes champs que le modèle de réponse Task)."""
+    id: str
+    title: str
+    description: Optional[str]
+    status: TaskStatus
+    priority: TaskPriority
+    assignee: Optional[str]
+    due_date: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+
+
+# Champs renvoyés, dans l'ordre du modèle de réponse
+TASK_FIELDS = list(TaskRow.__annotations__)
+# Colonnes lues : les champs + version (ETag de la page)
+TASK_COLUMNS = [getattr(TaskModel, name) for name in TASK_FIELDS] + [TaskModel.version]
+
+_ROWS_ADAPTER = TypeAdapter(List[TaskRow])
+
+
+def dump_rows(rows: Iterable, fields: Sequence[str] = TASK_FIELDS) -> bytes:
+    """Tableau JSON des lignes dont les premières colonnes sont `fields`.
+
+    Les colonnes suivantes (version, clé de tri ajoutée...) sont ignorées.
+    """
+    items = [dict(zip(fields, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(items)
+    return _ROWS_ADAPTER.dump_json(items)
@@ -0,0 +1,134 @@
+"""
+Lancement en production : plusieurs workers, schéma initialisé une fois.
+
+    python -m src.server                        # uvicorn --workers
+    gunicorn -c gunicorn.conf.py src.app:app    # application préchargée puis fork
+
+- `init_db` (migrations du schéma, voir schema.py) s'exécute une seule
+  fois dans le processus parent, avant le démarrage des workers : lancées
+  dans chaque worker en même temps, les migrations se battent pour créer
+  les mêmes objets. Les workers reçoivent DB_INIT_ON_STARTUP=false ;
+  avec un seul worker, servi dans ce même processus, l'initialisation au
+  démarrage y est aussi désactivée.
+- uvloop et httptools (extra uvicorn[standard]) sont utilisés s'ils sont
+  installés, sinon asyncio et h11.
+- Arrêt progressif : à SIGTERM, les workers n'acceptent plus de
+  connexion, ferment les flux /tasks/stream et laissent
+  SERVER_GRACEFUL_TIMEOUT secondes aux requêtes en cours.
+- Plusieurs workers exigent un cache et un bus d'événements partagés
+  (CACHE_BACKEND=redis ou none, EVENTS_BROKER=redis) : avec `memory`,
+  une écriture n'invalide le cache et ne publie l'événement que dans son
+  worker. Le lanceur refuse alors de démarrer, sauf
+  SERVER_ALLOW_LOCAL_STATE=true (avertissement seulement).
+- uvicorn démarre ses workers par spawn (chacun réimporte l'application) ;
+  gunicorn avec preload_app les démarre par fork d'un parent qui l'a déjà
+  importée, ce qui est plus rapide et partage la mémoire du code.
+
+Configuration : WEB_CONCURRENCY (nombre de workers), HOST, PORT,
+SERVER_GRACEFUL_TIMEOUT, SERVER_KEEPALIVE, LOG_LEVEL, SERVER_ALLOW_LOCAL_STATE.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+
+from . import database
+from .database import close_db, init_db
+
+logger = logging.getLogger("taskflow")
+
+APP = "src.app:app"
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Secondes laissées aux requêtes en cours après SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# Durée de vie d'une connexion keep-alive inactive (derrière un proxy : plus que celle du proxy)
+KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").lower()
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def local_state_backends() -> list:
+    """Réglages dont l'état reste dans chaque worker (cache, événements)."""
+    local = []
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "memory":
+        local.append("CACHE_BACKEND=memory")
+    if os.getenv("EVENTS_BROKER", "memory").lower() == "memory":
+        local.append("EVENTS_BROKER=memory")
+    return local
+
+
+def check_workers(workers: int = WORKERS):
+    """Refuse plusieurs workers avec un cache ou des événements propres à chacun.
+
+    Un worker servirait des réponses périmées (jusqu'au TTL du cache) et ses
+    clients /tasks/stream manqueraient les écritures des autres.
+    """
+    local = local_state_backends()
+    if workers <= 1 or not local:
+        return
+    message = (f"{workers} workers with {', '.join(local)}: writes only reach the worker that "
+               "handled them (stale cached reads, missed live events). Use redis, or WEB_CONCURRENCY=1")
+    if os.getenv("SERVER_ALLOW_LOCAL_STATE", "false").lower() in ("1", "true", "yes", "on"):
+        logger.warning("⚠️ %s", message)
+        return
+    raise RuntimeError(message + " (SERVER_ALLOW_LOCAL_STATE=true to start anyway)")
+
+
+def prepare_database():
+    """Met le schéma à jour une fois, puis le désactive dans les workers à venir.
+
+    Le pool est vidé ensuite : aucune connexion ouverte ici ne doit être
+    héritée par un worker forké.
+    """
+    async def run():
+        try:
+            await init_db()
+        finally:
+            await close_db()
+
+    asyncio.run(run())
+    os.environ["DB_INIT_ON_STARTUP"] = "false"
+    # un seul worker : uvicorn sert l'application dans ce processus, où la
+    # variable a déjà été lue (par database, et par app s'il est importé)
+    database.INIT_ON_STARTUP = False
+    app_module = sys.modules.get(f"{__package__}.app")
+    if app_module is not None:
+        app_module.INIT_ON_STARTUP = False
+    logger.info("✅ Database initialized once for %d worker(s)", WORKERS)
+
+
+def server_options() -> dict:
+    """Arguments de uvicorn.run."""
+    return {
+        "host": HOST,
+        "port": PORT,
+        "workers": WORKERS,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "timeout_keep_alive": KEEPALIVE,
+        "log_level": LOG_LEVEL,
+    }
+
+
+def main():
+    import uvicorn
+
+    logging.basicConfig(level=LOG_LEVEL.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    check_workers()
+    prepare_database()
+    options = server_options()
+    logger.info("🚀 Starting %d worker(s) on %s:%d (loop=%s, http=%s)",
+                options["workers"], HOST, PORT, options["loop"], options["http"])
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 import pytest
 from fastapi.testclient import TestClient
-from src.app import app
+from src.app import app, response_cache
 
+import asyncio
 import tempfile
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from src.database import Base, get_db
-from src.models import TaskModel
+from sqlalchemy.pool import NullPool, StaticPool
+from src.archive import archive_cutoff, archive_done_tasks
+from src.batching import WriteBatcher
+from src.database import Base, apply_sqlite_pragmas, get_db, to_async_url
+from src.metrics import MetricsRegistry, instrument_engine, metrics
+from src.profiling import profile_engine
+from src.models import ArchivedTaskModel, TaskModel, TaskTombstone
 
 
 
@@ -15,6 +21,7 @@ from src.models import TaskModel
 TEST_DB_FILE = tempfile.mktemp(suffix=".db")
 TEST_DATABASE_URL = f"sqlite:///{TEST_DB_FILE}"
 
+# Moteur synchrone : création des tables et nettoyage entre les tests
 test_engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
@@ -23,6 +30,24 @@ test_engine = create_engine(
 
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Moteur async utilisé par l'application pendant les tests.
+# NullPool : chaque TestClient a sa propre boucle asyncio, on ne garde
+# donc aucune connexion d'une boucle à l'autre.
+_async_url, _connect_args = to_async_url(TEST_DATABASE_URL)
+async_test_engine = create_async_engine(
+    _async_url,
+    connect_args=_connect_args,
+    poolclass=NullPool,
+)
+apply_sqlite_pragmas(async_test_engine.sync_engine)
+instrument_engine(async_test_engine.sync_engine, metrics)
+# inactif tant que les tests ne positionnent pas profiling.SQL_PROFILING
+profile_engine(async_test_engine.sync_engine)
+
+AsyncTestSessionLocal = async_sessionmaker(
+    bind=async_test_engine, autoflush=False, expire_on_commit=False
+)
+
 # Ajout des fixtures
 @pytest.fixture(scope="session")
 def setup_test_database():
@@ -34,51 +59,129 @@ def setup_test_database():
 
 @pytest.fixture(autouse=True)
 def clear_test_data(setup_test_database):
-    """Nettoie les données entre chaque test."""
+    """Nettoie les données (et le cache de réponses) entre chaque test."""
     db = TestSessionLocal()
     db.query(TaskModel).delete()
+    db.query(TaskTombstone).delete()
+    db.query(ArchivedTaskModel).delete()
     db.commit()
     db.close()
+    asyncio.run(response_cache.clear())
 
 
 @pytest.fixture
 def client(setup_test_database):
-    """Client de test avec base de données isolée."""
-    def override_get_db():
-        db = TestSessionLocal()
-        try:
+    """
+    Provide a test client for making API requests.
+
+    The get_db dependency is overridden so that every request uses the
+    isolated test database.
+
+    Usage in tests:
+        def test_something(client):
+            response = client.get("/tasks")
+            assert response.status_code == 200
+    """
+    async def override_get_db():
+        async with AsyncTestSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     # on remplace la dépendance get_db par notre version de test
     app.dependency_overrides[get_db] = override_get_db
 
-    with TestClient(app) as c:
-        yield c
+    with TestClient(app) as test_client:
+        yield test_client
 
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def sync_engine(setup_test_database):
+    """Moteur synchrone sur la base de test (requêtes directes, EXPLAIN...)."""
+    return test_engine
 
-@pytest.fixture(autouse=True)
-def clean_tasks():
-    """
-    Clear all tasks before each test.
-    This ensures tests don't interfere with each other.
-    """
-    yield
+
+@pytest.fixture
+def async_session_factory(setup_test_database):
+    """Sessions async sur la base de test (à utiliser hors requêtes HTTP)."""
+    return AsyncTestSessionLocal
 
 
 @pytest.fixture
-def client():
-    """
-    Provide a test client for making API requests.
+def sql_statements():
+    """Liste des (statement, parameters) exécutés par l'application pendant le test."""
+    statements = []
 
-    Usage in tests:
-        def test_something(client):
-            response = client.get("/tasks")
-            assert response.status_code == 200
-    """
-    with TestClient(app) as test_client:
-        yield test_client
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = async_test_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def statements_of(client, sql_statements):
+    """Requêtes SQL exécutées par un appel (sans le compteur de tâches en tâche de fond)."""
+    def run(call):
+        sql_statements.clear()
+        response = call()
+        executed = [" ".join(statement.split()) for statement, _ in sql_statements
+                    if not statement.lstrip().startswith("SELECT count(*)")]
+        return response, executed
+    return run
+
+
+@pytest.fixture
+def query_plan(sync_engine):
+    """Étapes du plan SQLite (EXPLAIN QUERY PLAN) d'une requête capturée."""
+    def explain(statement, parameters=()):
+        with sync_engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters)).all()
+        return [row[-1] for row in rows]
+    return explain
+
+
+@pytest.fixture
+def batcher(async_session_factory):
+    """Fabrique de WriteBatcher sur la base de test, avec son propre registre."""
+    def make(**options):
+        options.setdefault("registry", MetricsRegistry())
+        return WriteBatcher(async_session_factory, **options)
+    return make
+
+
+@pytest.fixture
+def archive(async_session_factory):
+    """Lance une passe d'archivage ; renvoie les ids déplacés, lot par lot."""
+    def run(batch_size=500, on_moved=None):
+        batches = []
+
+        async def moved(task_ids, seqs):
+            batches.append(task_ids)
+            if on_moved:
+                await on_moved(task_ids, seqs)
+
+        async def main():
+            async with async_session_factory() as db:
+                await archive_done_tasks(db, archive_cutoff(30), batch_size, on_moved=moved)
+
+        asyncio.run(main())
+        return batches
+    return run
+
+
+@pytest.fixture
+def create_task(client):
+    """Crée une tâche par POST /tasks ; renvoie (id, ETag)."""
+    def create(title="Tâche", **fields):
+        response = client.post("/tasks", json={"title": title, **fields})
+        return response.json()["id"], response.headers["ETag"]
+    return create
+
+
+@pytest.fixture
+def titles():
+    """Titres des tâches d'une réponse de liste, dans l'ordre."""
+    return lambda response: [task["title"] for task in response.json()]
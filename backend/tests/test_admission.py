@@ -0,0 +1,186 @@
+"""
+Tests du contrôle d'admission (src/admission.py) : limites adaptatives,
+file d'attente bornée, limitation de débit par client.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src import admission as admission_module
+from src.admission import AdaptiveLimit, MemoryBucketStore, RateLimiter, RedisBucketStore
+from src.app import admission, app
+from src.cache import RedisBackend
+from src.database import get_db
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_requests_beyond_the_limit_wait_in_fifo_order():
+    async def scenario():
+        limit = AdaptiveLimit(initial=1, min_limit=1, queue_size=2, queue_timeout=1)
+        assert await limit.acquire() is None
+        order = []
+
+        async def waiter(name):
+            assert await limit.acquire() is None
+            order.append(name)
+            limit.release(0.001)
+
+        waiters = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        assert limit.stats()["queued"] == 2
+        limit.release(0.001)
+        await asyncio.gather(*waiters)
+        return order, limit
+
+    order, limit = run(scenario)
+    assert order == ["a", "b"]
+    assert (limit.in_flight, limit.admitted) == (0, 3)
+
+
+def test_full_queue_and_deadline_reject_immediately():
+    async def scenario():
+        limit = AdaptiveLimit(initial=1, min_limit=1, queue_size=1, queue_timeout=0.05)
+        await limit.acquire()
+        queued = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        full = await limit.acquire()
+        return full, await queued, limit
+
+    full, timed_out, limit = run(scenario)
+    assert (full, timed_out) == ("queue_full", "queue_timeout")
+    assert limit.stats()["queued"] == 0 and limit.in_flight == 1
+
+
+def test_limit_backs_off_on_overload_and_grows_when_used():
+    limit = AdaptiveLimit(initial=10, min_limit=2, target_latency=0.5)
+    limit.in_flight = 10
+
+    limit.release(0.01, overloaded=True)   # timeout du pool pendant la requête
+    assert limit.limit == pytest.approx(9)
+    limit.release(0.01, overloaded=True)   # même fenêtre : une seule baisse
+    assert limit.decreases == 1
+
+    limit._last_decrease = 0
+    limit.release(0.01)                    # latence moyenne sous la cible, limite utilisée
+    assert limit.limit == pytest.approx(9 + 1 / 9)
+
+    limit.in_flight = 1
+    limit.release(0.01)                    # peu de requêtes en cours : pas de hausse
+    assert limit.limit == pytest.approx(9 + 1 / 9)
+
+
+def test_slow_responses_lower_the_limit_down_to_the_minimum():
+    limit = AdaptiveLimit(initial=3, min_limit=2, target_latency=0.1)
+    for _ in range(5):
+        limit.in_flight += 1
+        limit._last_decrease = 0
+        limit.release(1.0)
+
+    assert limit.limit == 2
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """Limite d'écriture pleine, sans file d'attente."""
+    write = AdaptiveLimit(initial=1, min_limit=1, queue_size=0)
+    write.in_flight = 1
+    monkeypatch.setitem(admission.limits, "write", write)
+    return write
+
+
+def test_writes_are_shed_with_retry_after_while_reads_still_pass(client, saturated):
+    response = client.post("/tasks", json={"title": "Refusée"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/tasks").json() == []
+    assert client.get("/health/live").status_code == 200
+    stats = client.get("/admission/stats").json()
+    assert stats["classes"]["write"]["rejected"]["queue_full"] == 1
+    assert stats["classes"]["read"]["in_flight"] == 0
+
+
+def test_shed_requests_are_counted_in_metrics(client, saturated):
+    client.post("/tasks", json={"title": "Refusée"})
+
+    body = client.get("/metrics").text
+
+    assert 'admission_rejected_total{class="write",reason="queue_full"} 1' in body
+    assert 'http_requests_total{method="POST",route="/tasks",status="503"}' in body
+
+
+def test_pool_timeout_becomes_503_and_lowers_the_limit(client, monkeypatch):
+    read = AdaptiveLimit(initial=10)
+    monkeypatch.setitem(admission.limits, "read", read)
+
+    async def exhausted_pool():
+        raise PoolTimeoutError("QueuePool limit of size 5 overflow 10 reached")
+        yield
+
+    app.dependency_overrides[get_db] = exhausted_pool
+    response = client.get("/tasks/changes")
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert read.rejected["pool_timeout"] == 1
+    assert read.limit == pytest.approx(9) and read.in_flight == 0
+
+
+def test_rate_limit_per_client(client, monkeypatch):
+    monkeypatch.setattr(admission, "rate_limiter", RateLimiter(MemoryBucketStore(), rate=0.5, burst=2))
+    monkeypatch.setattr(admission, "client_header", b"x-forwarded-for")
+
+    statuses = [client.get("/tasks", headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.254"}).status_code
+                for _ in range(3)]
+    limited = client.get("/tasks", headers={"X-Forwarded-For": "10.0.0.1"})
+
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429 and limited.headers["Retry-After"] == "2"
+    assert client.get("/tasks", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+    assert client.get("/health/live").status_code == 200
+    assert admission.stats()["rate_limit"]["limited"] == 2
+
+
+def test_memory_buckets_refill_and_stay_bounded(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: clock[0])
+    store = MemoryBucketStore(max_clients=2)
+
+    async def scenario():
+        results = [await store.take("a", 1.0, 1) for _ in range(2)]
+        clock[0] += 0.5
+        results.append(await store.take("a", 1.0, 1))
+        clock[0] += 0.5
+        results.append(await store.take("a", 1.0, 1))
+        await store.take("b", 1.0, 1)
+        await store.take("c", 1.0, 1)
+        return results
+
+    assert run(scenario) == [(True, 0.0), (False, 1.0), (False, 0.5), (True, 0.0)]
+    assert len(store) == 2
+
+
+def test_unreachable_shared_store_lets_requests_through():
+    limiter = RateLimiter(RedisBucketStore(RedisBackend("redis://127.0.0.1:1/0", timeout=0.2)), rate=1, burst=1)
+
+    assert run(lambda: limiter.check("10.0.0.1")) == 0.0
+    assert limiter.stats()["errors"] == 1
+
+
+def test_redis_store_runs_the_token_bucket_script():
+    calls = []
+
+    class Backend:
+        async def eval(self, script, keys, *args):
+            calls.append((keys, args[:2]))
+            return [0, "0.25"]
+
+    allowed, retry_after = run(lambda: RedisBucketStore(Backend()).take("10.0.0.1", 2.0, 5))
+
+    assert (allowed, retry_after) == (False, pytest.approx(0.375))
+    assert calls == [(["ratelimit:10.0.0.1"], (2.0, 5))]
@@ -0,0 +1,135 @@
+"""
+Tests de l'archivage des tâches terminées (src/archive.py) et de
+`include_archived` sur GET /tasks et GET /tasks/{id}.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from src import app as app_module
+from src.app import tasks_archived
+from src.models import ArchivedTaskModel, TaskModel, TaskStatus
+
+TASKS = TaskModel.__table__
+OLD = datetime(2020, 1, 1)
+
+
+def age(sync_engine, *task_ids):
+    """Dernière modification très ancienne (archivable si la tâche est terminée)."""
+    with sync_engine.begin() as connection:
+        connection.execute(update(TASKS).where(TASKS.c.id.in_(task_ids)).values(updated_at=OLD))
+
+
+def test_only_old_done_tasks_are_moved(client, sync_engine, archive, create_task):
+    old_done = create_task("Ancienne terminée", status="done")[0]
+    old_todo = create_task("Ancienne à faire")[0]
+    create_task("Récente terminée", status="done")
+    age(sync_engine, old_done, old_todo)
+
+    assert archive() == [[old_done]]
+
+    with sync_engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(TaskModel)) == 2
+        archived = connection.execute(select(ArchivedTaskModel)).one()
+    assert (archived.id, archived.status, archived.updated_at) == (old_done, TaskStatus.DONE, OLD)
+    assert archived.archived_at is not None
+    assert archive() == []
+
+
+def test_moves_happen_in_small_batches(client, sync_engine, archive, create_task):
+    task_ids = [create_task(f"T{i}", status="done")[0] for i in range(5)]
+    age(sync_engine, *task_ids)
+
+    batches = archive(batch_size=2)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(sum(batches, [])) == sorted(task_ids)
+
+
+def test_archived_tasks_are_hidden_unless_requested(client, sync_engine, archive, create_task, titles):
+    archived = create_task("Archivée", status="done")[0]
+    create_task("Vivante")
+    age(sync_engine, archived)
+    assert titles(client.get("/tasks")) == ["Archivée", "Vivante"]   # mise en cache
+
+    archive(on_moved=tasks_archived)
+
+    assert titles(client.get("/tasks")) == ["Vivante"]
+    assert titles(client.get("/tasks", params={"include_archived": True})) == ["Archivée", "Vivante"]
+    assert client.get(f"/tasks/{archived}").status_code == 404
+    response = client.get(f"/tasks/{archived}", params={"include_archived": True})
+    assert response.status_code == 200 and response.json()["status"] == "done"
+    assert "ETag" in response.headers
+
+
+def test_archived_tasks_are_read_only(client, sync_engine, archive, create_task):
+    archived = create_task("Archivée", status="done")[0]
+    age(sync_engine, archived)
+    archive()
+
+    assert client.put(f"/tasks/{archived}", json={"status": "todo"}).status_code == 404
+    assert client.delete(f"/tasks/{archived}").status_code == 404
+
+
+def test_pagination_merges_hot_and_archived_tasks(client, sync_engine, archive, create_task, titles):
+    task_ids = [create_task(f"T{i}", status="done" if i % 2 else "todo")[0] for i in range(5)]
+    age(sync_engine, *task_ids)
+    archive()
+
+    pages, params = [], {"include_archived": True, "limit": 2, "fields": "title,status"}
+    while True:
+        response = client.get("/tasks", params=params)
+        pages.append(titles(response))
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert pages == [["T0", "T1"], ["T2", "T3"], ["T4"]]
+    done = client.get("/tasks", params={"include_archived": True, "status": "done"})
+    assert titles(done) == ["T1", "T3"]
+
+
+def test_archived_listing_reads_both_tables_through_their_sort_index(client, sql_statements, query_plan):
+    client.get("/tasks", params={"include_archived": True})
+
+    [(statement, parameters)] = [(sql, params) for sql, params in sql_statements if "tasks_archive" in sql]
+    plan = query_plan(statement, parameters)
+    assert any("ix_tasks_created_at_id" in step for step in plan), plan
+    assert any("ix_tasks_archive_created_at_id" in step for step in plan), plan
+
+
+def test_archived_tasks_leave_synced_clients_like_deletions(client, sync_engine, archive, monkeypatch, create_task):
+    archived = create_task("Archivée", status="done")[0]
+    kept = create_task("Vivante")[0]
+    age(sync_engine, archived)
+    cursor = client.get("/tasks/changes").json()["cursor"]
+    events = []
+
+    async def publish(batch):
+        events.extend(batch)
+
+    monkeypatch.setattr(app_module.event_hub, "publish", publish)
+    archive(on_moved=tasks_archived)
+
+    changes = client.get("/tasks/changes", params={"since": cursor}).json()
+    assert (changes["tasks"], changes["deleted"]) == ([], [archived])
+    assert [task["id"] for task in client.get("/tasks/changes").json()["tasks"]] == [kept]
+    [event] = events
+    assert (event["type"], event["id"], event["archived"]) == ("deleted", archived, True)
+    assert event["seq"] > 0
+
+
+def test_stats_count_archived_tasks_only_on_request(client, sync_engine, archive, create_task):
+    archived = create_task("Archivée", status="done")[0]
+    create_task("Vivante")
+    age(sync_engine, archived)
+    assert client.get("/tasks/stats").json()["by_status"]["done"] == 1   # mise en cache
+
+    archive(on_moved=tasks_archived)
+
+    stats = client.get("/tasks/stats").json()
+    assert (stats["total"], stats["by_status"]["done"], stats["archived"]) == (1, 0, 1)
+    stats = client.get("/tasks/stats", params={"include_archived": True}).json()
+    assert (stats["total"], stats["by_status"]["done"], stats["archived"]) == (2, 1, 1)
+    assert stats["by_priority"]["medium"] == 2 and stats["unassigned"] == 2
@@ -0,0 +1,98 @@
+"""
+Tests du regroupement des écritures (src/batching.py) : un INSERT
+multi-lignes et un COMMIT par lot, une erreur par ligne, vidage à l'arrêt.
+"""
+
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from src import app as app_module
+from src.batching import WriteBatcher
+from src.etags import task_etag
+from src.ids import new_task_id
+from src.metrics import MetricsRegistry
+from src.models import TaskModel
+
+
+def values(title):
+    return {"id": new_task_id(), "title": title}
+
+
+def inserts(sql_statements):
+    return [statement for statement, _ in sql_statements if statement.lstrip().startswith("INSERT INTO tasks")]
+
+
+def test_concurrent_creations_share_one_insert(batcher, sql_statements):
+    write = batcher(window=0.05, max_items=10)
+
+    async def scenario():
+        return await asyncio.gather(*(write.submit(values(f"T{i}")) for i in range(4)))
+
+    rows = asyncio.run(scenario())
+
+    assert [row.title for row in rows] == ["T0", "T1", "T2", "T3"]
+    assert [row.change_seq for row in rows] == list(range(rows[0].change_seq, rows[0].change_seq + 4))
+    assert len(inserts(sql_statements)) == 1
+    assert write.registry.write_batch_size.sum() == 4 and write.registry.write_batch_size.count() == 1
+    assert write.registry.write_batch_wait.count() == 4
+
+
+def test_a_full_batch_leaves_without_waiting_for_the_window(batcher):
+    write = batcher(window=10, max_items=2)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(write.submit(values("A")), write.submit(values("B"))), 1)
+
+    assert [row.title for row in asyncio.run(scenario())] == ["A", "B"]
+    assert write.registry.write_batch_wait.sum() < 1
+
+
+def test_each_request_gets_its_own_error(client, batcher, sync_engine):
+    taken = client.post("/tasks", json={"title": "Existante"}).json()["id"]
+    write = batcher(window=0.05)
+
+    async def scenario():
+        return await asyncio.gather(
+            write.submit(values("A")), write.submit({"id": taken, "title": "Doublon"}), write.submit(values("B")),
+            return_exceptions=True,
+        )
+
+    first, duplicate, last = asyncio.run(scenario())
+
+    assert (first.title, last.title) == ("A", "B")
+    assert isinstance(duplicate, IntegrityError)
+    assert write.registry.write_batch_fallbacks.values[()] == 1
+    with sync_engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(TaskModel)) == 3
+
+
+def test_close_flushes_pending_creations(batcher):
+    write = batcher(window=10)
+
+    async def scenario():
+        pending = asyncio.create_task(write.submit(values("En attente")))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(write.close(), 1)
+        late = await asyncio.wait_for(write.submit(values("Après l'arrêt")), 1)
+        return pending.result(), late
+
+    pending, late = asyncio.run(scenario())
+
+    assert (pending.title, late.title) == ("En attente", "Après l'arrêt")
+
+
+def test_post_tasks_goes_through_the_batcher(client, monkeypatch, sql_statements):
+    write = WriteBatcher(lambda: app_module.background_session(app_module.app), window=0.001,
+                         on_flushed=app_module.tasks_created, registry=MetricsRegistry())
+    monkeypatch.setattr(app_module, "write_batcher", write)
+
+    response = client.post("/tasks", json={"title": "Regroupée", "priority": "high"})
+
+    assert response.status_code == 201
+    task = response.json()
+    assert (task["title"], task["priority"]) == ("Regroupée", "high")
+    assert response.headers["ETag"] == task_etag(task["id"], 1)
+    assert [t["id"] for t in client.get("/tasks").json()] == [task["id"]]
+    assert len(inserts(sql_statements)) == 1 and write.registry.write_batch_size.count() == 1
@@ -0,0 +1,97 @@
+"""
+Tests des endpoints bulk : POST / PATCH / DELETE /tasks/bulk.
+"""
+
+
+def test_bulk_create(client):
+    payload = [{"title": f"Import {i}", "priority": "high"} for i in range(50)]
+
+    response = client.post("/tasks/bulk", json=payload)
+
+    assert response.status_code == 201
+    results = response.json()
+    assert len(results) == 50
+    assert [r["index"] for r in results] == list(range(50))
+    assert all(r["status"] == 201 for r in results)
+    # l'ordre des résultats suit l'ordre de la requête
+    assert [r["task"]["title"] for r in results] == [f"Import {i}" for i in range(50)]
+    assert results[0]["task"]["created_at"] is not None
+    assert len(client.get("/tasks?limit=1000").json()) == 50
+
+
+def test_bulk_create_uses_a_few_statements(client, sql_statements):
+    client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(200)])
+
+    inserts = [s for s, _ in sql_statements if s.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 1
+
+
+def test_bulk_create_is_all_or_nothing(client):
+    payload = [{"title": "ok"}, {"title": ""}]
+
+    response = client.post("/tasks/bulk", json=payload)
+
+    assert response.status_code == 422
+    assert client.get("/tasks").json() == []
+
+
+def test_bulk_update(client):
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=[
+        {"title": "A"}, {"title": "B"}, {"title": "C"},
+    ]).json()]
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": ids[0], "status": "done"},
+        {"id": "missing", "status": "done"},
+        {"id": ids[1], "title": "B2", "assignee": "alice"},
+    ])
+
+    assert response.status_code == 200
+    first, missing, second = response.json()
+    assert first["status"] == 200
+    assert first["task"]["status"] == "done"
+    assert first["task"]["title"] == "A"
+    assert missing["status"] == 404
+    assert second["task"]["title"] == "B2"
+    assert second["task"]["assignee"] == "alice"
+    assert client.get(f"/tasks/{ids[2]}").json()["status"] == "todo"
+
+
+def test_bulk_update_applies_repeated_ids_in_request_order(client):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": task_id, "title": "x"},
+        {"id": task_id, "title": "y", "status": "done"},
+        {"id": task_id, "title": "z"},
+    ])
+
+    assert response.status_code == 200
+    task = client.get(f"/tasks/{task_id}").json()
+    assert (task["title"], task["status"]) == ("z", "done")
+    assert [item["task"]["title"] for item in response.json()] == ["z", "z", "z"]
+
+
+def test_bulk_update_rejects_invalid_items(client):
+    response = client.patch("/tasks/bulk", json=[{"id": "x", "priority": "urgent"}])
+    assert response.status_code == 422
+
+
+def test_bulk_delete(client):
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=[
+        {"title": "A"}, {"title": "B"},
+    ]).json()]
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [ids[0], "missing"]})
+
+    assert response.status_code == 200
+    deleted, missing = response.json()
+    assert deleted == {"index": 0, "id": ids[0], "status": 204, "task": None, "detail": None}
+    assert missing["status"] == 404
+    assert client.get(f"/tasks/{ids[0]}").status_code == 404
+    assert client.get(f"/tasks/{ids[1]}").status_code == 200
+
+
+def test_bulk_limit(client):
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": []})
+    assert response.status_code == 422
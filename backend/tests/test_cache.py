@@ -0,0 +1,273 @@
+"""
+Tests du cache de réponses (LRU mémoire, backend Redis, invalidation).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.app import response_cache
+from src.cache import MemoryBackend, RedisBackend, ResponseCache, read_reply
+
+
+def selects_on_tasks(sql_statements):
+    return [s for s, _ in sql_statements if s.lstrip().startswith("SELECT") and "FROM tasks" in s]
+
+
+# =============================================================================
+# Cache HTTP (backend mémoire par défaut)
+# =============================================================================
+
+def test_list_is_served_from_cache(client, sql_statements):
+    client.post("/tasks", json={"title": "A"})
+
+    first = client.get("/tasks?status=todo")
+    before = len(selects_on_tasks(sql_statements))
+    second = client.get("/tasks?status=todo")
+
+    assert second.json() == first.json()
+    assert len(selects_on_tasks(sql_statements)) == before
+
+
+def test_item_is_served_from_cache(client, sql_statements):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+
+    client.get(f"/tasks/{task_id}")
+    before = len(selects_on_tasks(sql_statements))
+    response = client.get(f"/tasks/{task_id}")
+
+    assert response.json()["title"] == "A"
+    assert len(selects_on_tasks(sql_statements)) == before
+
+
+def test_item_read_before_a_write_is_not_kept():
+    async def scenario():
+        cache = ResponseCache(MemoryBackend())
+        key = cache.item_key("t1")
+
+        generation = await cache.generation()          # GET : lecture de la version 1...
+        await cache.invalidate("t1")                   # ... PATCH validé et invalidé entre-temps
+        await cache.set_item("t1", generation, b"v1", {"etag": '"t1.1"'})
+        stale = await cache.get(key)
+
+        generation = await cache.generation()          # lecture sans écriture concurrente
+        await cache.set_item("t1", generation, b"v2", {"etag": '"t1.2"'})
+        return stale, await cache.get(key)
+
+    stale, fresh = asyncio.run(scenario())
+
+    assert stale is None
+    assert fresh.body == b"v2"
+
+
+def test_create_invalidates_lists(client):
+    client.post("/tasks", json={"title": "A"})
+    assert len(client.get("/tasks").json()) == 1
+
+    client.post("/tasks", json={"title": "B"})
+
+    assert len(client.get("/tasks").json()) == 2
+
+
+def test_update_invalidates_item_and_lists(client):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+    client.get(f"/tasks/{task_id}")
+    client.get("/tasks?status=done")
+
+    client.put(f"/tasks/{task_id}", json={"status": "done"})
+
+    assert client.get(f"/tasks/{task_id}").json()["status"] == "done"
+    assert [t["id"] for t in client.get("/tasks?status=done").json()] == [task_id]
+
+
+def test_delete_invalidates_item(client):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+    client.get(f"/tasks/{task_id}")
+
+    client.delete(f"/tasks/{task_id}")
+
+    assert client.get(f"/tasks/{task_id}").status_code == 404
+    assert client.get("/tasks").json() == []
+
+
+def test_bulk_writes_invalidate(client):
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}]).json()]
+    client.get(f"/tasks/{ids[0]}")
+
+    client.patch("/tasks/bulk", json=[{"id": ids[0], "title": "A2"}])
+    assert client.get(f"/tasks/{ids[0]}").json()["title"] == "A2"
+
+    client.request("DELETE", "/tasks/bulk", json={"ids": ids})
+    assert client.get(f"/tasks/{ids[0]}").status_code == 404
+
+
+def test_cached_page_keeps_next_link(client):
+    client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(3)])
+
+    first = client.get("/tasks?limit=2")
+    second = client.get("/tasks?limit=2")
+
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert second.headers["Link"] == first.headers["Link"]
+
+
+def test_cache_stats(client):
+    client.post("/tasks", json={"title": "A"})
+    client.get("/tasks")
+    client.get("/tasks")
+
+    stats = client.get("/cache/stats").json()
+
+    assert stats["backend"] == "MemoryBackend"
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
+    assert "evictions" in stats
+    assert response_cache.stats()["hits"] == stats["hits"]
+
+
+# =============================================================================
+# Backend mémoire
+# =============================================================================
+
+def test_memory_backend_evicts_least_recently_used():
+    async def scenario():
+        backend = MemoryBackend(max_entries=2)
+        await backend.set("a", b"1")
+        await backend.set("b", b"2")
+        await backend.get("a")          # "b" devient le moins récent
+        await backend.set("c", b"3")
+        return backend, [await backend.get(k) for k in ("a", "b", "c")]
+
+    backend, values = asyncio.run(scenario())
+
+    assert values == [b"1", None, b"3"]
+    assert backend.evictions == 1
+
+
+def test_memory_backend_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    async def scenario():
+        backend = MemoryBackend()
+        await backend.set("a", b"1", ttl=5)
+        fresh = await backend.get("a")
+        now[0] += 6
+        return backend, fresh, await backend.get("a")
+
+    backend, fresh, expired = asyncio.run(scenario())
+
+    assert fresh == b"1"
+    assert expired is None
+    assert backend.evictions == 1
+
+
+# =============================================================================
+# Backend Redis (contre un serveur RESP local de substitution)
+# =============================================================================
+
+class RedisStandIn:
+    """Serveur RESP minimal (GET / SET PX / DEL / INCR / FLUSHDB) pour les tests."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                self.commands.append(command[0].upper())
+                writer.write(self.execute(*command))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    def execute(self, name, *args):
+        name = name.upper()
+        if name == b"GET":
+            value = self.data.get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            self.data[args[0]] = args[1]
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args)
+            return b":%d\r\n" % removed
+        if name == b"INCR":
+            value = int(self.data.get(args[0], b"0")) + 1
+            self.data[args[0]] = str(value).encode()
+            return b":%d\r\n" % value
+        if name == b"FLUSHDB":
+            self.data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def redis_scenario():
+    """Exécute un scénario avec un RedisBackend branché sur le serveur de substitution."""
+    def run(scenario):
+        async def main():
+            standin = RedisStandIn()
+            server = await asyncio.start_server(standin.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+            try:
+                return standin, await scenario(ResponseCache(backend, ttl=30))
+            finally:
+                await backend.close()
+                server.close()
+                await server.wait_closed()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_redis_backend_roundtrip(redis_scenario):
+    async def scenario(cache):
+        key = await cache.list_key(status="todo", limit=10)
+        miss = await cache.get(key)
+        await cache.set(key, b'[{"id":"1"}]', {"next_cursor": "abc"})
+        hit = await cache.get(key)
+        return key, miss, hit
+
+    standin, (key, miss, hit) = redis_scenario(scenario)
+
+    assert miss is None
+    assert hit.body == b'[{"id":"1"}]'
+    assert hit.headers == {"next_cursor": "abc"}
+    assert b"SET" in standin.commands
+
+
+def test_redis_backend_invalidation(redis_scenario):
+    async def scenario(cache):
+        old_key = await cache.list_key(status=None)
+        await cache.set(old_key, b"[]")
+        await cache.set(cache.item_key("42"), b"{}")
+
+        await cache.invalidate("42")
+
+        new_key = await cache.list_key(status=None)
+        return old_key, new_key, await cache.get(cache.item_key("42")), cache.stats()
+
+    _, (old_key, new_key, item, stats) = redis_scenario(scenario)
+
+    assert old_key != new_key
+    assert item is None
+    assert stats["backend"] == "RedisBackend"
+    assert stats["errors"] == 0
+
+
+def test_unreachable_redis_counts_as_miss():
+    async def scenario():
+        cache = ResponseCache(RedisBackend("redis://127.0.0.1:1/0", timeout=0.2))
+        return await cache.get("key"), cache.stats()
+
+    value, stats = asyncio.run(scenario())
+
+    assert value is None
+    assert stats["misses"] == 1
+    assert stats["errors"] == 1
@@ -0,0 +1,96 @@
+"""
+Tests du flux de synchronisation incrémentale (GET /tasks/changes).
+"""
+
+import asyncio
+
+from src.changes import allocate_change_seqs
+
+
+def sync(client, since=None, **params):
+    if since:
+        params["since"] = since
+    response = client.get("/tasks/changes", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_full_sync_then_empty_delta(client):
+    client.post("/tasks", json={"title": "A"})
+    client.post("/tasks", json={"title": "B"})
+
+    full = sync(client)
+    assert [t["title"] for t in full["tasks"]] == ["A", "B"]
+    assert full["deleted"] == []
+    assert full["has_more"] is False
+
+    delta = sync(client, full["cursor"])
+    assert delta == {"tasks": [], "deleted": [], "cursor": full["cursor"], "has_more": False}
+
+
+def test_delta_contains_only_changed_tasks(client):
+    a = client.post("/tasks", json={"title": "A"}).json()["id"]
+    client.post("/tasks", json={"title": "B"})
+    cursor = sync(client)["cursor"]
+
+    client.put(f"/tasks/{a}", json={"status": "done"})
+    c = client.post("/tasks", json={"title": "C"}).json()["id"]
+
+    delta = sync(client, cursor)
+    assert [(t["id"], t["status"]) for t in delta["tasks"]] == [(a, "done"), (c, "todo")]
+
+
+def test_deletes_are_reported_as_tombstones(client):
+    a = client.post("/tasks", json={"title": "A"}).json()["id"]
+    b = client.post("/tasks", json={"title": "B"}).json()["id"]
+    cursor = sync(client)["cursor"]
+
+    client.delete(f"/tasks/{a}")
+    client.request("DELETE", "/tasks/bulk", json={"ids": [b]})
+
+    delta = sync(client, cursor)
+    assert delta["tasks"] == []
+    assert delta["deleted"] == [a, b]
+    # une première synchronisation n'a pas besoin des tombes
+    assert sync(client)["deleted"] == []
+
+
+def test_bulk_writes_are_in_the_feed(client):
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}]).json()]
+    cursor = sync(client)["cursor"]
+
+    client.patch("/tasks/bulk", json=[{"id": ids[1], "title": "B2"}])
+
+    assert [t["title"] for t in sync(client, cursor)["tasks"]] == ["B2"]
+
+
+def test_pagination_walks_every_change(client):
+    client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(5)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = sync(client, cursor, limit=2)
+        seen += [t["title"] for t in page["tasks"]]
+        cursor, pages = page["cursor"], pages + 1
+        if not page["has_more"]:
+            break
+
+    assert sorted(seen) == [f"T{i}" for i in range(5)]
+    assert pages == 3
+
+
+def test_change_sequence_is_monotonic(async_session_factory):
+    async def allocate():
+        async with async_session_factory() as db:
+            first = await allocate_change_seqs(db, 3)
+            second = await allocate_change_seqs(db)
+            await db.commit()
+            return first, second
+
+    first, second = asyncio.run(allocate())
+
+    assert second == first + 3
+
+
+def test_invalid_cursor(client):
+    assert client.get("/tasks/changes?since=garbage").status_code == 400
@@ -0,0 +1,133 @@
+"""
+Tests des ETags (If-None-Match -> 304) et des écritures conditionnelles (If-Match -> 412).
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+
+from src.etags import if_match_versions, if_none_match
+from src.models import TaskModel
+
+
+def test_get_task_returns_etag_and_304(client, create_task):
+    task_id, created_etag = create_task()
+
+    first = client.get(f"/tasks/{task_id}")
+    assert first.headers["ETag"] == created_etag
+
+    second = client.get(f"/tasks/{task_id}", headers={"If-None-Match": created_etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == created_etag
+
+
+def test_etag_changes_on_every_update(client, create_task):
+    task_id, etag = create_task()
+
+    # deux écritures dans la même seconde : updated_at ne suffirait pas
+    etag2 = client.put(f"/tasks/{task_id}", json={"title": "B"}).headers["ETag"]
+    etag3 = client.put(f"/tasks/{task_id}", json={"title": "C"}).headers["ETag"]
+
+    assert len({etag, etag2, etag3}) == 3
+    response = client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "C"
+
+
+def test_list_304_until_something_changes(client, create_task):
+    task_id, _ = create_task()
+    first = client.get("/tasks")
+    etag = first.headers["ETag"]
+
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/tasks/{task_id}", json={"status": "done"})
+    changed = client.get("/tasks", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_304_without_cache(client, monkeypatch, create_task):
+    from src.cache import NullBackend
+
+    monkeypatch.setattr("src.app.response_cache.backend", NullBackend())
+    create_task()
+    etag = client.get("/tasks?fields=id").headers["ETag"]
+
+    response = client.get("/tasks?fields=id", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    # la projection fait partie de l'ETag
+    assert client.get("/tasks").headers["ETag"] != etag
+
+
+def test_list_etag_changes_on_delete(client, create_task):
+    task_id, _ = create_task()
+    create_task()
+    etag = client.get("/tasks").headers["ETag"]
+
+    client.delete(f"/tasks/{task_id}")
+
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_put_with_current_etag(client, create_task):
+    task_id, etag = create_task()
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "B"}, headers={"If-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_put_with_stale_etag_is_rejected(client, create_task):
+    task_id, etag = create_task()
+    client.put(f"/tasks/{task_id}", json={"title": "Autre client"})
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "B"}, headers={"If-Match": etag})
+
+    assert response.status_code == 412
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Autre client"
+
+
+def test_delete_with_stale_etag_is_rejected(client, create_task):
+    task_id, etag = create_task()
+    client.put(f"/tasks/{task_id}", json={"status": "done"})
+
+    assert client.delete(f"/tasks/{task_id}", headers={"If-Match": etag}).status_code == 412
+    current = client.get(f"/tasks/{task_id}").headers["ETag"]
+    assert client.delete(f"/tasks/{task_id}", headers={"If-Match": current}).status_code == 204
+
+
+def test_concurrent_write_is_detected_without_locks(client, async_session_factory, create_task):
+    """Entre la lecture et le COMMIT, une autre écriture fait échouer l'UPDATE versionné."""
+    task_id, _ = create_task()
+
+    async def scenario():
+        async with async_session_factory() as first, async_session_factory() as second:
+            mine = await first.get(TaskModel, task_id)
+            theirs = await second.get(TaskModel, task_id)
+            theirs.title = "Eux"
+            await second.commit()
+
+            mine.title = "Moi"
+            with pytest.raises(StaleDataError):
+                await first.commit()
+
+    asyncio.run(scenario())
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Eux"
+
+
+def test_header_matching_rules():
+    assert if_none_match('"a", W/"b"', '"b"')
+    assert if_none_match("*", '"b"')
+    assert not if_none_match(None, '"b"')
+
+
+def test_if_match_versions_for_the_where_clause():
+    assert if_match_versions(None, "t1") is None
+    assert if_match_versions("*", "t1") is None
+    assert if_match_versions('"t1.3", "t1.4", "t2.5"', "t1") == [3, 4]
+    assert if_match_versions('W/"t1.3", "t1.x"', "t1") == []
@@ -0,0 +1,154 @@
+"""
+Tests de la diffusion des écritures (GET /tasks/stream en SSE et WebSocket).
+"""
+
+import asyncio
+import json
+
+from src.app import app, event_hub
+from src.cache import read_reply
+from src.events import RESYNC, EventHub, MemoryBroker, RedisBroker, TaskEvent, sse_stream
+
+
+def test_websocket_receives_every_kind_of_write(client):
+    with client.websocket_connect("/tasks/stream") as ws:
+        task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+        client.put(f"/tasks/{task_id}", json={"status": "done"})
+        client.delete(f"/tasks/{task_id}")
+
+        created, updated, deleted = (ws.receive_json() for _ in range(3))
+
+    assert (created["type"], created["task"]["title"]) == ("created", "A")
+    assert (updated["type"], updated["task"]["status"]) == ("updated", "done")
+    assert deleted == {"type": "deleted", "id": task_id, "seq": deleted["seq"]}
+    assert created["seq"] < updated["seq"] < deleted["seq"]
+
+
+def test_bulk_writes_are_broadcast(client):
+    with client.websocket_connect("/tasks/stream") as ws:
+        ids = [r["id"] for r in client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}]).json()]
+        client.request("DELETE", "/tasks/bulk", json={"ids": ids})
+
+        events = [ws.receive_json() for _ in range(4)]
+
+    assert [e["type"] for e in events] == ["created", "created", "deleted", "deleted"]
+    assert client.get("/events/stats").json()["subscribers"] == 0
+
+
+def test_sse_endpoint_streams_events():
+    async def scenario():
+        await event_hub.start()
+        sent, disconnect = [], asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if b"event: created" in message.get("body", b""):
+                disconnect.set()
+
+        scope = {"type": "http", "method": "GET", "path": "/tasks/stream", "raw_path": b"/tasks/stream",
+                 "root_path": "", "query_string": b"", "headers": [], "scheme": "http",
+                 "server": ("test", 80), "client": ("test", 1), "http_version": "1.1"}
+        request = asyncio.create_task(app(scope, receive, send))
+        while not event_hub.subscribers:
+            await asyncio.sleep(0.01)
+        await event_hub.publish([{"type": "created", "id": "1", "seq": 7, "task": {"title": "A"}}])
+        await asyncio.wait_for(request, 5)
+        return sent
+
+    sent = asyncio.run(scenario())
+
+    start = sent[0]
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert b"event: created\nid: 7\ndata: " in body
+    assert not event_hub.subscribers
+
+
+def test_slow_subscriber_is_told_to_resync():
+    async def scenario():
+        hub = EventHub(MemoryBroker(), queue_size=2)
+        await hub.start()
+        with hub.subscribe() as slow, hub.subscribe() as fast:
+            for seq in range(3):
+                await hub.publish([{"type": "created", "id": str(seq), "seq": seq}])
+                if seq < 2:
+                    await fast.next()
+            return [await slow.next()], [(await fast.next()).seq], hub.stats()
+
+    slow_events, fast_seqs, stats = asyncio.run(scenario())
+
+    assert slow_events == [RESYNC]
+    assert fast_seqs == [2]
+    assert stats["disconnected_slow"] == 1
+
+
+def test_sse_frames_and_keepalive():
+    async def scenario():
+        hub = EventHub(MemoryBroker())
+        await hub.start()
+        with hub.subscribe() as subscription:
+            stream = sse_stream(subscription, keepalive=0.01)
+            frames = [await stream.__anext__(), await stream.__anext__()]
+            await hub.publish([{"type": "updated", "id": "1", "seq": 3}])
+            frames.append(await stream.__anext__())
+            await stream.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+
+    assert frames[0].startswith(b"retry:")
+    assert frames[1] == b": keepalive\n\n"
+    assert frames[2] == TaskEvent({"type": "updated", "id": "1", "seq": 3}).sse()
+
+
+class PubSubStandIn:
+    """Serveur RESP minimal avec SUBSCRIBE / PUBLISH."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                name, *args = await read_reply(reader)
+                if name.upper() == b"SUBSCRIBE":
+                    self.subscribers.append(writer)
+                    writer.write(b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:1\r\n" % (len(args[0]), args[0]))
+                elif name.upper() == b"PUBLISH":
+                    channel, message = args
+                    for subscriber in self.subscribers:
+                        subscriber.write(b"*3\r\n$7\r\nmessage\r\n$%d\r\n%s\r\n$%d\r\n%s\r\n"
+                                         % (len(channel), channel, len(message), message))
+                    writer.write(b":%d\r\n" % len(self.subscribers))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+
+def test_redis_broker_shares_events_between_workers():
+    async def scenario():
+        standin = PubSubStandIn()
+        server = await asyncio.start_server(standin.handle, "127.0.0.1", 0)
+        url = f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0"
+        worker_a, worker_b = EventHub(RedisBroker(url)), EventHub(RedisBroker(url))
+        try:
+            for hub in (worker_a, worker_b):
+                await hub.start()
+                await asyncio.wait_for(hub.broker.subscribed.wait(), 5)
+            with worker_a.subscribe() as on_a, worker_b.subscribe() as on_b:
+                await worker_a.publish([{"type": "created", "id": "1", "seq": 1}])
+                received = [await asyncio.wait_for(s.next(), 5) for s in (on_a, on_b)]
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+            server.close()
+            await server.wait_closed()
+        return [json.loads(event.data) for event in received]
+
+    on_a, on_b = asyncio.run(scenario())
+
+    assert on_a == on_b == {"type": "created", "id": "1", "seq": 1}
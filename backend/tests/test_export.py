@@ -0,0 +1,80 @@
+"""
+Tests de l'export streaming GET /tasks/export (NDJSON / CSV).
+"""
+
+import csv
+import io
+import json
+
+
+def test_export_ndjson(client):
+    client.post("/tasks/bulk", json=[{"title": f"T{i}", "assignee": "bob"} for i in range(3)])
+
+    response = client.get("/tasks/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    tasks = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(task["title"] for task in tasks) == ["T0", "T1", "T2"]
+    task = tasks[0]
+    assert task["status"] == "todo"
+    assert task["assignee"] == "bob"
+    assert task["created_at"]
+
+
+def test_export_csv(client):
+    client.post("/tasks", json={"title": "Rapport, mensuel", "priority": "high"})
+
+    response = client.get("/tasks/export?format=csv")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["title"] == "Rapport, mensuel"
+    assert rows[0]["priority"] == "high"
+    assert rows[0]["description"] == ""
+
+
+def test_export_honours_filters(client):
+    client.post("/tasks", json={"title": "A", "status": "done"})
+    client.post("/tasks", json={"title": "B"})
+
+    response = client.get("/tasks/export?status=done")
+
+    lines = response.text.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["A"]
+
+
+def test_export_streams_in_batches(client, monkeypatch):
+    import src.app
+
+    batches = []
+    ndjson_chunk = src.app._ndjson_chunk
+
+    def recording_chunk(rows):
+        batches.append(len(rows))
+        return ndjson_chunk(rows)
+
+    monkeypatch.setattr(src.app, "EXPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(src.app, "_ndjson_chunk", recording_chunk)
+    client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(5)])
+
+    response = client.get("/tasks/export")
+
+    assert batches == [2, 2, 1]
+    assert response.text.count("\n") == 5
+
+
+def test_export_empty_csv_has_header(client):
+    response = client.get("/tasks/export?format=csv")
+
+    assert response.text.splitlines() == [
+        "id,title,description,status,priority,assignee,due_date,created_at,updated_at"
+    ]
+
+
+def test_export_unknown_format(client):
+    response = client.get("/tasks/export?format=xml")
+    assert response.status_code == 422
@@ -0,0 +1,71 @@
+"""
+Tests des sondes de santé (/health/live, /health/ready) et du compteur en cache.
+"""
+
+import asyncio
+
+from src.app import app
+from src.database import get_db
+from src.health import TaskCounter
+
+
+def test_liveness_does_not_touch_the_database(client, sql_statements):
+    response = client.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+    assert not [s for s, _ in sql_statements if "SELECT 1" in s]
+
+
+def test_readiness(client):
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"] == "connected"
+    assert "tasks_count" in body
+
+
+def test_health_does_not_count_rows(client, sql_statements):
+    client.get("/health")
+
+    counts = [s for s, _ in sql_statements if "count(" in s.lower()]
+    # seul le rafraîchissement de fond (au démarrage) compte les lignes
+    assert len(counts) <= 1
+
+
+def test_readiness_times_out(client, monkeypatch):
+    class SlowSession:
+        async def execute(self, statement):
+            await asyncio.sleep(1)
+
+    async def slow_db():
+        yield SlowSession()
+
+    monkeypatch.setattr("src.app.HEALTH_DB_TIMEOUT", 0.01)
+    app.dependency_overrides[get_db] = slow_db
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "database": "timeout"}
+
+
+def test_task_counter_refresh_and_adjust(client, async_session_factory):
+    client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}])
+    counter = TaskCounter()
+    counter.add(5)  # ignoré tant que le compteur est inconnu
+    assert counter.value is None
+
+    async def refresh():
+        async with async_session_factory() as db:
+            await counter.refresh(db)
+
+    asyncio.run(refresh())
+
+    assert counter.value == 2
+    assert counter.estimated is False
+    counter.add(1)
+    counter.add(-5)
+    assert counter.snapshot()["tasks_count"] == 0
@@ -0,0 +1,51 @@
+"""
+Tests des identifiants UUIDv7 (src/ids.py) et de leur stockage (models.TaskId).
+"""
+
+import time
+import uuid
+
+from sqlalchemy import text
+
+from src.ids import new_task_id, uuid7
+
+
+def test_uuid7_layout_and_timestamp():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert before <= value.int >> 80 <= after + 1
+
+
+def test_ids_are_strictly_increasing_within_a_process():
+    ids = [new_task_id() for _ in range(20_000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_api_ids_are_uuid7_strings_stored_as_16_bytes(client, sync_engine):
+    first = client.post("/tasks", json={"title": "A"}).json()["id"]
+    second = client.post("/tasks/bulk", json=[{"title": "B"}]).json()[0]["id"]
+
+    assert uuid.UUID(first).version == 7 and first < second
+    with sync_engine.connect() as connection:
+        stored = connection.execute(text("SELECT typeof(id), length(id) FROM tasks")).all()
+    assert set(stored) == {("blob", 16)}
+
+
+def test_ids_are_matched_in_any_uuid_form(client):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+
+    response = client.get(f"/tasks/{task_id.upper()}")
+
+    assert response.status_code == 200
+    assert response.json()["id"] == task_id
+
+
+def test_non_uuid_ids_are_not_found(client):
+    assert client.get("/tasks/not-a-uuid").status_code == 404
+    assert client.delete("/tasks/not-a-uuid").status_code == 404
@@ -0,0 +1,87 @@
+"""
+Tests des métriques Prometheus (GET /metrics, middleware, compteurs SQL).
+"""
+
+import pytest
+
+from src.metrics import Histogram, MetricsRegistry, RequestStats, metrics
+
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    """Registre vide branché à la place du registre global."""
+    registry = MetricsRegistry()
+    for name, value in vars(registry).items():
+        monkeypatch.setattr(metrics, name, value)
+    return metrics
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "# TYPE db_pool_connections gauge" in response.text
+
+
+def test_requests_are_labelled_by_route_template(client, fresh_metrics):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+    client.get(f"/tasks/{task_id}")
+    client.get("/tasks/does-not-exist")
+
+    assert fresh_metrics.requests.values[("GET", "/tasks/{task_id}", "200")] == 1
+    assert fresh_metrics.requests.values[("GET", "/tasks/{task_id}", "404")] == 1
+    assert fresh_metrics.requests.values[("POST", "/tasks", "201")] == 1
+    assert fresh_metrics.latency.count(("GET", "/tasks/{task_id}")) == 2
+    assert not any(task_id in labels[1] for labels in fresh_metrics.requests.values)
+
+
+def test_unknown_paths_share_one_series(client, fresh_metrics):
+    client.get("/nope/1")
+    client.get("/nope/2")
+
+    assert fresh_metrics.requests.values[("GET", "unmatched", "404")] == 2
+
+
+def test_in_progress_returns_to_zero(client, fresh_metrics):
+    client.get("/tasks")
+
+    assert fresh_metrics.in_progress.values[("GET", "/tasks")] == 0
+
+
+def test_db_queries_are_counted_per_request(client, fresh_metrics):
+    client.post("/tasks", json={"title": "A"})
+
+    labels = ("POST", "/tasks")
+    assert fresh_metrics.request_queries.count(labels) == 1
+    assert fresh_metrics.request_queries.sum(labels) >= 1
+    assert fresh_metrics.request_db_time.sum(labels) > 0
+    assert fresh_metrics.db_queries.values[()] >= 1
+
+    client.get("/health/live")
+    assert fresh_metrics.request_queries.sum(("GET", "/health/live")) == 0
+
+
+def test_histogram_rendering():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 3)
+
+    lines = list(histogram.samples())
+
+    assert lines == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 3.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_render_escapes_label_values():
+    registry = MetricsRegistry()
+    registry.observe_request("GET", 'a"b', 200, 0.01, RequestStats())
+
+    assert 'route="a\\"b"' in registry.render()
@@ -0,0 +1,81 @@
+"""
+Tests de la pagination par curseur et de la projection de champs sur GET /tasks.
+"""
+
+from src.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    from datetime import datetime
+
+    created_at = datetime(2024, 5, 1, 12, 30, 0)
+    assert decode_cursor(encode_cursor(created_at, "abc")) == (created_at, "abc")
+
+
+def test_pages_cover_all_tasks_without_duplicates(client, create_task):
+    # Les tâches sont créées dans la même seconde : l'id départage les égalités
+    ids = [create_task(f"Tâche {i}")[0] for i in range(7)]
+
+    seen = []
+    url = "/tasks?limit=3"
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(task["id"] for task in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/tasks?limit=3&cursor={cursor}" if cursor else None
+
+    assert pages == 3
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+
+def test_last_page_has_no_next_link(client, create_task):
+    for i in range(2):
+        create_task(f"Tâche {i}")
+
+    response = client.get("/tasks?limit=5")
+
+    assert len(response.json()) == 2
+    assert "Link" not in response.headers
+
+
+def test_next_link_keeps_filters(client, create_task):
+    for i in range(3):
+        create_task(f"Tâche {i}", assignee="alice")
+
+    response = client.get("/tasks?assignee=alice&limit=2")
+
+    link = response.headers["Link"]
+    assert 'rel="next"' in link
+    assert "assignee=alice" in link
+    assert "cursor=" in link
+
+
+def test_limit_is_capped(client):
+    response = client.get("/tasks?limit=100000")
+    assert response.status_code == 422
+
+
+def test_invalid_cursor(client):
+    response = client.get("/tasks?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_fields_projection(client, create_task):
+    for i in range(2):
+        create_task(f"Tâche {i}", priority="high")
+
+    response = client.get("/tasks?fields=id,title&limit=1")
+
+    assert response.status_code == 200
+    [task] = response.json()
+    assert set(task) == {"id", "title"}
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/tasks?fields=id,password")
+    assert response.status_code == 400
@@ -0,0 +1,133 @@
+"""
+Tests du profilage SQL par requête (src/profiling.py).
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src import profiling
+from src.metrics import MetricsRegistry, instrument_engine
+from src.profiling import QueryProfile, classify, profile_engine
+
+
+@pytest.fixture
+def profiled(monkeypatch, caplog):
+    """Profilage et en-têtes X-DB-* activés ; renvoie les événements journalisés."""
+    monkeypatch.setattr(profiling, "SQL_PROFILING", True)
+    monkeypatch.setattr(profiling, "DEBUG_HEADERS", True)
+    caplog.set_level(logging.DEBUG, logger="taskflow.sql")
+
+    def events(name):
+        return [record.sql for record in caplog.records if getattr(record, "sql", {}).get("event") == name]
+
+    return events
+
+
+def patterns(events) -> set:
+    return {(pattern["pattern"], pattern.get("table")) for record in events("sql_patterns")
+            for pattern in record["patterns"]}
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT tasks.id, tasks.title FROM tasks WHERE tasks.id = ?", ("SELECT", "tasks", True)),
+    ("SELECT tasks.id FROM tasks WHERE tasks.id IN (?, ?)", ("SELECT", "tasks", True)),
+    ("SELECT tasks.id FROM tasks ORDER BY tasks.created_at", ("SELECT", "tasks", False)),
+    ("UPDATE tasks SET title=?, version=? WHERE tasks.id = ? AND tasks.version = ?", ("UPDATE", "tasks", True)),
+    ("INSERT INTO tasks (id, title) VALUES (?, ?)", ("INSERT", "tasks", False)),
+    ("DELETE FROM tasks WHERE tasks.id = $1::VARCHAR", ("DELETE", "tasks", True)),
+    ("PRAGMA journal_mode=WAL", (None, None, False)),
+])
+def test_classify(statement, expected):
+    assert classify(statement) == expected
+
+
+def test_repeated_select_is_flagged_as_n_plus_one():
+    profile = QueryProfile()
+    profile.queries = [("SELECT tasks.id FROM tasks ORDER BY tasks.id", 0.001)] + [
+        ("SELECT task_tombstones.id FROM task_tombstones WHERE task_tombstones.task_id = ?", 0.001)
+    ] * 5
+
+    assert profile.patterns(n_plus_one=5) == [{
+        "pattern": "n+1",
+        "statement": "SELECT task_tombstones.id FROM task_tombstones WHERE task_tombstones.task_id = ?",
+        "count": 5,
+    }]
+
+
+def test_headers_report_statements_and_time(client, profiled):
+    response = client.get("/tasks")
+
+    assert response.headers["X-DB-Queries"] == "1"
+    assert float(response.headers["X-DB-Time"]) > 0
+    assert profiled("sql_patterns") == []
+
+
+def test_headers_are_only_sent_in_debug_mode(client, profiled, monkeypatch):
+    monkeypatch.setattr(profiling, "DEBUG_HEADERS", False)
+
+    assert "X-DB-Queries" not in client.get("/tasks").headers
+
+
+def test_bulk_update_flags_select_before_write_and_refresh(client, profiled):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+    client.put(f"/tasks/{task_id}", json={"title": "B"})
+    assert patterns(profiled) == set()  # écritures unitaires en une requête (RETURNING)
+
+    client.patch("/tasks/bulk", json=[{"id": task_id, "title": "C"}])
+
+    assert patterns(profiled) == {("refresh-after-write", "tasks"), ("select-before-write", "tasks")}
+    record = profiled("sql_patterns")[-1]
+    assert (record["method"], record["path"]) == ("PATCH", "/tasks/bulk")
+    assert record["queries"] >= 3
+
+
+def test_slow_queries_are_logged_without_parameters(client, profiled, monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+
+    client.get("/tasks", params={"assignee": "secret-user"})
+
+    # (le compteur de tâches en tâche de fond est journalisé aussi)
+    slow = [record for record in profiled("slow_query") if "tasks.assignee = " in record["statement"]]
+    assert len(slow) == 1 and slow[0]["duration_ms"] >= 0
+    assert not any("secret-user" in record["statement"] for record in profiled("slow_query"))
+
+
+def test_disabled_by_default(client, caplog):
+    caplog.set_level(logging.DEBUG, logger="taskflow.sql")
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "B"})
+
+    assert "X-DB-Queries" not in response.headers
+    assert not [record for record in caplog.records if record.name == "taskflow.sql"]
+
+
+def test_existence_check_after_a_write_is_not_a_refresh():
+    profile = QueryProfile()
+    profile.queries = [
+        ("UPDATE tasks SET title=? WHERE tasks.id = ? AND tasks.version IN (?) RETURNING tasks.id", 0.001),
+        ("SELECT tasks.id FROM tasks WHERE tasks.id = ?", 0.001),
+    ]
+
+    assert profile.patterns() == []
+
+
+def test_metrics_and_profiling_share_one_timer(monkeypatch):
+    monkeypatch.setattr(profiling, "SQL_PROFILING", True)
+    engine, registry, profile = create_engine("sqlite://"), MetricsRegistry(), QueryProfile()
+    instrument_engine(engine, registry)
+    profile_engine(engine)
+
+    token = profiling._profile.set(profile)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        profiling._profile.reset(token)
+        engine.dispose()
+
+    # un seul couple d'écouteurs : les deux voient la même durée
+    assert len(engine.dispatch.before_cursor_execute) == len(engine.dispatch.after_cursor_execute) == 1
+    assert registry.db_latency.sum() == profile.db_seconds > 0
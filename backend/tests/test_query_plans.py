@@ -0,0 +1,103 @@
+"""
+Tests de non-régression des plans de requête (SQLite EXPLAIN QUERY PLAN).
+
+On capture le SQL réellement émis par GET /tasks pour chaque combinaison
+de filtres, puis on vérifie que SQLite passe par un index au lieu de
+parcourir toute la table.
+"""
+
+import itertools
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from src.pagination import encode_cursor
+
+FILTERS = {"status": "todo", "priority": "high", "assignee": "alice"}
+
+# Toutes les combinaisons de filtres acceptées par get_tasks (y compris aucune)
+COMBINATIONS = [
+    combo
+    for size in range(len(FILTERS) + 1)
+    for combo in itertools.combinations(FILTERS, size)
+]
+
+
+def list_selects(sql_statements):
+    """Garde uniquement les SELECT de listage (tasks ... ORDER BY)."""
+    return [
+        (statement, parameters)
+        for statement, parameters in sql_statements
+        if statement.lstrip().upper().startswith("SELECT")
+        and "FROM tasks" in statement
+        and "ORDER BY" in statement
+    ]
+
+
+@pytest.mark.parametrize("combo", COMBINATIONS, ids=lambda c: "+".join(c) or "no-filter")
+def test_task_filters_use_an_index(client, sql_statements, query_plan, combo):
+    params = {name: FILTERS[name] for name in combo}
+
+    response = client.get("/tasks", params=params)
+    assert response.status_code == 200
+
+    [select] = list_selects(sql_statements)
+    plan = query_plan(*select)
+    table_steps = [step for step in plan if "tasks" in step]
+
+    assert table_steps, plan
+    for step in table_steps:
+        # "SCAN tasks" sans index = parcours complet de la table
+        assert "INDEX" in step, plan
+    if combo:
+        assert any(step.startswith("SEARCH") for step in table_steps), plan
+
+
+def test_paginated_list_walks_the_sort_index(client, sql_statements, query_plan):
+    cursor = encode_cursor(datetime(2024, 1, 1), "0")
+
+    client.get("/tasks", params={"cursor": cursor})
+
+    [select] = list_selects(sql_statements)
+    plan = query_plan(*select)
+    assert any("ix_tasks_created_at_id" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_due_date_queries_use_an_index(query_plan):
+    plan = query_plan(
+        "SELECT id FROM tasks WHERE due_date < ? AND status != ?",
+        ("2024-01-01 00:00:00", "DONE"),
+    )
+
+    assert any("ix_tasks_due_date" in step for step in plan), plan
+
+
+def test_stats_queries_only_read_indexes(client, sql_statements, query_plan):
+    client.get("/tasks/stats")
+
+    # (le COUNT(*) du compteur de /health tourne aussi en tâche de fond)
+    selects = [(s, p) for s, p in sql_statements if "GROUP BY" in s or "due_date <" in s]
+    assert len(selects) == 4
+    for select in selects:
+        plan = query_plan(*select)
+        assert all("INDEX" in step for step in plan if "tasks" in step), plan
+
+
+def test_declared_indexes_exist(sync_engine):
+    with sync_engine.connect() as conn:
+        names = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks'")
+            )
+        }
+
+    assert {
+        "ix_tasks_created_at_id",
+        "ix_tasks_assignee_status",
+        "ix_tasks_status_priority",
+        "ix_tasks_priority",
+        "ix_tasks_due_date",
+    } <= names
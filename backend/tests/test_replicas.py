@@ -0,0 +1,166 @@
+"""
+Tests du routage des lectures vers les répliques (database.ReadRouter).
+
+Deux fichiers SQLite jouent les répliques : chacun contient une tâche
+différente, ce qui indique quelle base a servi la lecture. Le primaire
+est la base de test habituelle.
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src import database
+from src.database import READ_YOUR_WRITES_COOKIE, Base, ReadRouter, to_async_url
+from src.models import TaskModel
+
+
+def replica_engine(path):
+    url, connect_args = to_async_url(f"sqlite:///{path}")
+    return create_async_engine(url, connect_args=connect_args, poolclass=NullPool)
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    engines = []
+    for index in range(2):
+        path = tmp_path / f"replica{index}.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(sync_engine)
+        with sync_engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO tasks (id, title, status, priority, version, change_seq, created_at, updated_at) "
+                f"VALUES ('r{index}', 'replica-{index}', 'TODO', 'MEDIUM', 1, 1, '2025-01-01', '2025-01-01')"
+            ))
+        sync_engine.dispose()
+        engines.append(replica_engine(path))
+    router = ReadRouter(engines)
+    monkeypatch.setattr(database, "read_router", router)
+    yield router
+    asyncio.run(router.dispose())
+
+
+def served_by(client) -> list:
+    """Titres renvoyés par le flux de changements (jamais mis en cache)."""
+    return [task["title"] for task in client.get("/tasks/changes").json()["tasks"]]
+
+
+def test_reads_are_spread_over_replicas_round_robin(client, replicas):
+    assert [served_by(client) for _ in range(4)] == [["replica-0"], ["replica-1"]] * 2
+    assert replicas.stats()["replicas"][0]["reads"] == 2
+
+
+def test_writes_go_to_the_primary_and_later_reads_follow_them(client, replicas):
+    response = client.post("/tasks", json={"title": "Écrite sur le primaire"})
+    task_id = response.json()["id"]
+
+    assert READ_YOUR_WRITES_COOKIE in response.cookies
+    assert served_by(client) == ["Écrite sur le primaire"]
+    assert client.get(f"/tasks/{task_id}").status_code == 200
+    assert replicas.primary_reads == 2
+
+    # cookie expiré : retour aux répliques
+    client.cookies.set(READ_YOUR_WRITES_COOKIE, str(time.time() - 1))
+    assert served_by(client) == ["replica-0"]
+
+
+def test_reads_after_a_write_skip_responses_cached_from_a_replica(client, replicas, titles):
+    client.post("/tasks", json={"title": "Nouvelle"})
+    sticky = client.cookies[READ_YOUR_WRITES_COOKIE]
+
+    # un autre client lit une réplique en retard (réponse non mise en cache)
+    client.cookies.clear()
+    assert titles(client.get("/tasks")) == ["replica-0"]
+
+    client.cookies.set(READ_YOUR_WRITES_COOKIE, sticky)
+    assert titles(client.get("/tasks")) == ["Nouvelle"]
+
+
+def lag_behind(replicas, task_id, title):
+    """Les répliques n'ont reçu que la première version de la tâche."""
+    for replica in replicas.engines:
+        sync_engine = create_engine(str(replica.url).replace("+aiosqlite", ""))
+        with sync_engine.begin() as connection:
+            connection.execute(TaskModel.__table__.insert().values(
+                id=task_id, title=title, version=1, change_seq=1))
+        sync_engine.dispose()
+
+
+def test_reads_from_a_lagging_replica_never_fill_the_shared_cache(client, replicas, titles):
+    task_id = client.post("/tasks", json={"title": "Avant"}).json()["id"]
+    lag_behind(replicas, task_id, "Avant")
+    client.put(f"/tasks/{task_id}", json={"title": "Après"})
+
+    # un second client, sans cookie read-your-writes, lit les répliques en retard
+    client.cookies.clear()
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Avant"
+    assert "Avant" in titles(client.get("/tasks"))
+    assert client.get("/tasks/stats").json()["total"] == 2
+
+    # lectures suivantes sur le primaire : rien de périmé n'a été mis en cache
+    replicas.mark(0, False, "down")
+    replicas.mark(1, False, "down")
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Après"
+    assert titles(client.get("/tasks")) == ["Après"]
+    assert client.get("/tasks/stats").json()["total"] == 1
+
+
+def test_unhealthy_replicas_are_skipped_then_primary_is_used(client, replicas):
+    replicas.mark(0, False, "down")
+    assert [served_by(client) for _ in range(2)] == [["replica-1"], ["replica-1"]]
+
+    replicas.mark(1, False, "down")
+    assert served_by(client) == []  # primaire (vide)
+    assert replicas.fallbacks == 1
+
+
+def test_health_check_marks_unreachable_replicas(tmp_path, replicas):
+    replicas.engines.append(replica_engine(tmp_path / "missing" / "replica.db"))
+    replicas.healthy.append(True)
+
+    asyncio.run(replicas.check(timeout=1))
+
+    assert replicas.healthy == [True, True, False]
+
+
+def test_connection_error_on_a_replica_removes_it_from_rotation(client, tmp_path, monkeypatch):
+    router = ReadRouter([replica_engine(tmp_path / "missing" / "replica.db")])
+    monkeypatch.setattr(database, "read_router", router)
+
+    with pytest.raises(OperationalError):
+        client.get("/tasks/changes")
+
+    assert router.healthy == [False]
+    assert client.get("/tasks/changes").status_code == 200  # primaire
+
+
+def test_no_cookie_without_replicas(client):
+    response = client.post("/tasks", json={"title": "Sans réplique"})
+
+    assert READ_YOUR_WRITES_COOKIE not in response.cookies
+
+
+def test_replica_pool_timeouts_reach_the_admission_signal(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "replica_pool_metrics", database.PoolMetrics())
+    monkeypatch.setattr(database.ReplicaQueuePool, "metrics", database.replica_pool_metrics)
+    url, connect_args = to_async_url(f"sqlite:///{tmp_path / 'replica.db'}")
+    replica = create_async_engine(url, connect_args=connect_args, poolclass=database.ReplicaQueuePool,
+                                  pool_size=1, max_overflow=0, pool_timeout=0.05)
+    before = database.pool_timeouts()
+
+    async def scenario():
+        async with replica.connect():
+            with pytest.raises(PoolTimeoutError):
+                async with replica.connect():
+                    pass
+        await replica.dispose()
+
+    asyncio.run(scenario())
+
+    assert database.pool_timeouts() == before + 1
+    assert database.replica_pool_metrics.snapshot()["checkout_timeouts"] == 1
@@ -0,0 +1,107 @@
+"""
+Nombre de requêtes SQL par endpoint : les écritures unitaires restent en
+un aller-retour sur tasks (... RETURNING), plus l'attribution du numéro
+de changement.
+"""
+
+import pytest
+
+
+def test_create_is_one_insert_returning(client, statements_of):
+    response, statements = statements_of(lambda: client.post("/tasks", json={"title": "A"}))
+
+    assert response.status_code == 201
+    assert response.json()["created_at"] is not None
+    assert len(statements) == 2
+    assert statements[0].startswith("UPDATE change_sequence")
+    assert statements[1].startswith("INSERT INTO tasks") and "RETURNING" in statements[1]
+
+
+def test_update_is_one_update_returning(client, statements_of, create_task):
+    task_id, etag = create_task()
+
+    response, statements = statements_of(
+        lambda: client.put(f"/tasks/{task_id}", json={"title": "B"}, headers={"If-Match": etag})
+    )
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "B"
+    assert response.headers["ETag"] != etag
+    assert len(statements) == 2
+    assert statements[1].startswith("UPDATE tasks") and "RETURNING" in statements[1]
+    assert not any(statement.startswith("SELECT") for statement in statements)
+
+
+def test_update_without_changes_is_one_select(client, statements_of, create_task):
+    task_id, etag = create_task()
+
+    response, statements = statements_of(lambda: client.put(f"/tasks/{task_id}", json={}))
+
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1 and statements[0].startswith("SELECT")
+
+
+def test_delete_is_one_delete_returning(client, statements_of, create_task):
+    task_id, _ = create_task()
+
+    response, statements = statements_of(lambda: client.delete(f"/tasks/{task_id}"))
+
+    assert response.status_code == 204
+    # DELETE ... RETURNING, numéro de changement, tombe
+    assert len(statements) == 3
+    assert statements[0].startswith("DELETE FROM tasks") and "RETURNING" in statements[0]
+    assert statements[2].startswith("INSERT INTO task_tombstones")
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_missing_task_is_decided_by_the_affected_rows(client, statements_of, method):
+    kwargs = {"json": {"title": "B"}} if method == "put" else {}
+
+    response, statements = statements_of(lambda: getattr(client, method)("/tasks/missing", **kwargs))
+
+    assert response.status_code == 404
+    assert not any(statement.startswith("SELECT") for statement in statements)
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_stale_if_match_is_checked_only_on_failure(client, statements_of, method, create_task):
+    task_id, etag = create_task()
+    client.put(f"/tasks/{task_id}", json={"title": "Autre client"})
+    kwargs = {"json": {"title": "B"}} if method == "put" else {}
+
+    response, statements = statements_of(
+        lambda: getattr(client, method)(f"/tasks/{task_id}", headers={"If-Match": etag}, **kwargs)
+    )
+
+    assert response.status_code == 412
+    # l'écriture ne touche aucune ligne, puis une lecture distingue 412 de 404
+    assert statements[-1].startswith("SELECT tasks.id FROM tasks WHERE tasks.id =")
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Autre client"
+
+
+def test_if_match_on_a_missing_task_is_404(client):
+    response = client.put("/tasks/missing", json={"title": "B"}, headers={"If-Match": '"missing.1"'})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_if_match_star_on_a_missing_task_is_412(client, statements_of, method):
+    kwargs = {"json": {"title": "B"}} if method == "put" else {}
+
+    response, statements = statements_of(
+        lambda: getattr(client, method)("/tasks/missing", headers={"If-Match": "*"}, **kwargs)
+    )
+
+    assert response.status_code == 412
+    # l'échec de l'écriture suffit : pas de lecture pour distinguer 404 / 412
+    assert not any(statement.startswith("SELECT tasks.id FROM tasks") for statement in statements)
+
+
+def test_reads_are_one_statement(client, statements_of, create_task):
+    task_id, _ = create_task()
+
+    assert len(statements_of(lambda: client.get("/tasks"))[1]) == 1
+    assert len(statements_of(lambda: client.get(f"/tasks/{task_id}"))[1]) == 1
+    # réponse en cache : aucune requête
+    assert statements_of(lambda: client.get(f"/tasks/{task_id}"))[1] == []
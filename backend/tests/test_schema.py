@@ -0,0 +1,199 @@
+"""
+Tests des migrations du schéma (src/schema.py, src/migrations).
+"""
+
+import io
+import uuid
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, event, select, text
+
+from src import models, schema, search
+from src.database import Base
+from src.schema import SchemaOutOfDate
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def schema_diff(connection):
+    context = MigrationContext.configure(connection, opts={"include_object": schema.include_object})
+    return compare_metadata(context, Base.metadata)
+
+
+def migrate_to(connection, revision: str, versioned: bool = True):
+    command.upgrade(schema.alembic_config(connection), revision)
+    connection.commit()
+    if not versioned:
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.commit()
+
+
+def test_head_revision_matches_alembic():
+    scripts = ScriptDirectory.from_config(schema.alembic_config())
+
+    assert schema.head_revision() == scripts.get_current_head()
+
+
+def test_upgrade_creates_the_models_schema(engine):
+    with engine.connect() as connection:
+        schema.upgrade(connection)
+
+        assert schema.current_revision(connection) == schema.head_revision()
+        assert schema_diff(connection) == []
+        assert connection.execute(text("SELECT id, value FROM change_sequence")).all() == [(1, 0)]
+        connection.execute(text("INSERT INTO tasks (id, title) VALUES ('1', 'Rapport mensuel')"))
+        assert connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'rapport'")).all()
+
+
+def test_downgrade_to_base_and_back(engine):
+    with engine.connect() as connection:
+        schema.upgrade(connection)
+        command.downgrade(schema.alembic_config(connection), "base")
+        connection.commit()
+
+        remaining = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'alembic_version'")
+        ).scalars().all()
+        assert remaining == []
+
+        schema.upgrade(connection)
+        assert schema_diff(connection) == []
+
+
+@pytest.mark.parametrize("revision", ["0001", "0002", "0003", "0004", "0005", "0006", "0007"])
+def test_adopts_unversioned_database_at_each_stage(engine, revision):
+    with engine.connect() as connection:
+        migrate_to(connection, revision, versioned=False)
+
+        assert schema.detect_revision(connection) == revision
+        schema.ensure_schema(connection)
+
+        assert schema.current_revision(connection) == schema.head_revision()
+        assert schema_diff(connection) == []
+
+
+def test_adopts_database_created_by_create_all(engine):
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        connection.execute(text("INSERT INTO tasks (id, title) VALUES ('1', 'Gardée')"))
+        connection.commit()
+
+        schema.ensure_schema(connection)
+
+        assert schema.current_revision(connection) == schema.head_revision()
+        assert connection.execute(text("SELECT title FROM tasks")).scalars().all() == ["Gardée"]
+
+
+def test_adopts_old_tasks_table_with_later_tables_and_search_index(engine):
+    # ancienne table tasks, puis create_all (nouvelles tables) et index de recherche
+    with engine.connect() as connection:
+        migrate_to(connection, "0001", versioned=False)
+        Base.metadata.create_all(connection, tables=[models.TaskTombstone.__table__,
+                                                     models.ChangeSequence.__table__])
+        search.create_search_index(connection)
+        connection.commit()
+
+        assert schema.detect_revision(connection) == "0001"
+        schema.ensure_schema(connection)
+
+        assert schema_diff(connection) == []
+        assert connection.execute(text("SELECT id, value FROM change_sequence")).all() == [(1, 0)]
+
+
+def test_text_ids_are_converted_to_binary_and_back(engine):
+    task_id, deleted_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with engine.connect() as connection:
+        migrate_to(connection, "0005")
+        connection.execute(text(f"INSERT INTO tasks (id, title) VALUES ('{task_id}', 'Rapport gardé')"))
+        connection.execute(text(f"INSERT INTO task_tombstones (task_id, change_seq) VALUES ('{deleted_id}', 1)"))
+        connection.commit()
+
+        schema.upgrade(connection)
+
+        assert connection.execute(select(models.TaskModel.id, models.TaskModel.title)).all() == [
+            (task_id, "Rapport gardé")]
+        assert connection.execute(select(models.TaskTombstone.task_id)).scalars().all() == [deleted_id]
+        assert connection.execute(text("SELECT typeof(id) FROM tasks")).scalar() == "blob"
+        # index plein texte recréé sur la nouvelle table (triggers compris)
+        connection.execute(text(f"INSERT INTO tasks (id, title) VALUES (x'{uuid.uuid4().hex}', 'Rapport neuf')"))
+        assert len(connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'rapport'")).all()) == 2
+
+        command.downgrade(schema.alembic_config(connection), "0005")
+        connection.commit()
+        assert task_id in connection.execute(text("SELECT id FROM tasks")).scalars().all()
+
+
+def test_archive_downgrade_restores_tasks_for_synced_clients(engine):
+    task_id = str(uuid.uuid4())
+    with engine.connect() as connection:
+        schema.upgrade(connection)
+        connection.execute(models.ChangeSequence.__table__.update().values(value=8))
+        connection.execute(models.ArchivedTaskModel.__table__.insert().values(
+            id=task_id, title="Archivée", version=1, change_seq=3))
+        connection.execute(models.TaskTombstone.__table__.insert().values(task_id=task_id, change_seq=8))
+        connection.commit()
+
+        command.downgrade(schema.alembic_config(connection), "0006")
+        connection.commit()
+
+        assert connection.execute(select(models.TaskModel.id, models.TaskModel.change_seq)).all() == [(task_id, 9)]
+        assert connection.execute(select(models.TaskTombstone.task_id)).all() == []
+
+
+def test_non_uuid_ids_block_the_id_migration(engine):
+    with engine.connect() as connection:
+        migrate_to(connection, "0005")
+        connection.execute(text("INSERT INTO tasks (id, title) VALUES ('legacy-1', 'Importée')"))
+        connection.commit()
+
+        with pytest.raises(RuntimeError, match="legacy-1"):
+            schema.upgrade(connection)
+
+
+def test_startup_check_only_reads_the_version_when_current(engine):
+    with engine.connect() as connection:
+        schema.upgrade(connection)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    with engine.connect() as connection:
+        schema.ensure_schema(connection)
+
+    # existence de la table de version + lecture de la révision, aucun DDL
+    assert len(statements) == 2
+    assert not any(statement.lstrip().upper().startswith(("CREATE", "ALTER")) for statement in statements)
+
+
+def test_startup_check_refuses_pending_migrations_without_auto_migrate(engine):
+    with engine.connect() as connection:
+        migrate_to(connection, "0004")
+
+        with pytest.raises(SchemaOutOfDate, match="0004"):
+            schema.ensure_schema(connection, auto_migrate=False)
+
+        assert schema.current_revision(connection) == "0004"
+
+
+def test_postgresql_indexes_are_built_concurrently_outside_transactions():
+    config = schema.alembic_config()
+    config.output_buffer = io.StringIO()
+    config.set_main_option("sqlalchemy.url", "postgresql://taskflow@localhost/taskflow")
+
+    command.upgrade(config, "0001:head", sql=True)
+
+    statements = [statement.strip() for statement in config.output_buffer.getvalue().split(";")]
+    concurrent = [i for i, statement in enumerate(statements) if "CONCURRENTLY" in statement]
+    assert "CREATE INDEX CONCURRENTLY ix_tasks_created_at_id ON tasks (created_at, id)" in statements
+    assert any(statements[i].startswith("CREATE INDEX CONCURRENTLY ix_tasks_search ON tasks USING gin")
+               for i in concurrent)
+    # chaque CONCURRENTLY suit un COMMIT (bloc autocommit)
+    assert all(statements[i - 1].endswith("COMMIT") for i in concurrent)
@@ -0,0 +1,113 @@
+"""
+Tests de la recherche plein texte (GET /tasks/search, FTS5 sous SQLite).
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+
+from src.search import create_search_index, search_query, search_terms
+
+
+def test_search_ranks_title_matches_first(client, titles):
+    client.post("/tasks", json={"title": "Préparer la réunion", "description": "Envoyer le rapport"})
+    client.post("/tasks", json={"title": "Rapport mensuel", "description": "Chiffres de ventes"})
+    client.post("/tasks", json={"title": "Autre", "description": "Rien à voir"})
+
+    response = client.get("/tasks/search?q=rapport")
+
+    assert response.status_code == 200
+    assert titles(response) == ["Rapport mensuel", "Préparer la réunion"]
+
+
+def test_search_matches_prefixes_of_every_word(client, titles):
+    client.post("/tasks", json={"title": "Rapport PDF mensuel"})
+    client.post("/tasks", json={"title": "Rapport annuel"})
+
+    assert titles(client.get("/tasks/search?q=rap pdf")) == ["Rapport PDF mensuel"]
+
+
+def test_search_ignores_accents_and_case(client, titles):
+    client.post("/tasks", json={"title": "Tâche planifiée"})
+
+    assert titles(client.get("/tasks/search?q=TACHE planifiee")) == ["Tâche planifiée"]
+
+
+def test_search_follows_updates_and_deletes(client, titles):
+    task_id = client.post("/tasks", json={"title": "Ancien titre"}).json()["id"]
+
+    client.put(f"/tasks/{task_id}", json={"title": "Nouveau titre"})
+    assert titles(client.get("/tasks/search?q=ancien")) == []
+    assert titles(client.get("/tasks/search?q=nouveau")) == ["Nouveau titre"]
+
+    client.delete(f"/tasks/{task_id}")
+    assert titles(client.get("/tasks/search?q=nouveau")) == []
+
+
+def test_search_with_filters(client, titles):
+    client.post("/tasks", json={"title": "Deploy api", "status": "done"})
+    client.post("/tasks", json={"title": "Deploy frontend", "status": "todo"})
+
+    assert titles(client.get("/tasks/search?q=deploy&status=todo")) == ["Deploy frontend"]
+
+
+def test_search_pagination(client, titles):
+    client.post("/tasks/bulk", json=[{"title": f"Bug {i}"} for i in range(5)])
+
+    first = client.get("/tasks/search?q=bug&limit=3")
+    second = client.get(f"/tasks/search?q=bug&limit=3&cursor={first.headers['X-Next-Cursor']}")
+
+    assert len(first.json()) == 3
+    assert len(second.json()) == 2
+    assert "X-Next-Cursor" not in second.headers
+    assert not set(titles(first)) & set(titles(second))
+
+
+def test_fts_syntax_is_not_interpreted(client, titles):
+    client.post("/tasks", json={"title": "Fix NEAR bug"})
+
+    response = client.get('/tasks/search?q=fix" NEAR(')
+
+    assert response.status_code == 200
+    assert titles(response) == ["Fix NEAR bug"]
+
+
+def test_search_rejects_queries_without_words(client):
+    assert client.get("/tasks/search?q=%21%21").status_code == 400
+    assert client.get("/tasks/search?q=bug&cursor=nope").status_code == 400
+
+
+def test_search_uses_the_fts_index(sync_engine, sql_statements, client):
+    client.post("/tasks", json={"title": "Index"})
+    client.get("/tasks/search?q=index")
+
+    statement, parameters = next(s for s in sql_statements if "MATCH" in s[0])
+    with sync_engine.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+    assert "SCAN tasks_fts VIRTUAL TABLE INDEX" in plan
+    # les tâches trouvées sont lues par rowid, jamais par parcours de la table
+    assert "SEARCH tasks USING INTEGER PRIMARY KEY (rowid=?)" in plan
+
+
+def test_search_index_is_backfilled_on_existing_database(tmp_path):
+    """Base créée avant la recherche : init_db crée l'index et y indexe les tâches."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE tasks (id VARCHAR PRIMARY KEY, title VARCHAR, description VARCHAR)")
+        conn.exec_driver_sql("INSERT INTO tasks VALUES ('1', 'Ancienne tâche', NULL)")
+
+        create_search_index(conn)
+        create_search_index(conn)  # idempotent (plusieurs workers au démarrage)
+
+        found = conn.exec_driver_sql("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'ancienne'").all()
+    engine.dispose()
+
+    assert len(found) == 1
+
+
+def test_postgres_query_uses_the_indexed_expression():
+    sql = str(search_query("postgresql", search_terms("rap pdf")).compile(dialect=postgresql.dialect()))
+
+    assert "@@ to_tsquery('simple'" in sql
+    assert "setweight(to_tsvector('simple', coalesce(title, '')), 'A')" in sql
+    assert "LIKE" not in sql
@@ -0,0 +1,80 @@
+"""
+Tests de la sérialisation rapide des listes (src/serialization.py).
+"""
+
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src import serialization
+from src.app import Task, app
+from src.models import TaskModel
+from src.serialization import TASK_COLUMNS, TASK_FIELDS, dump_rows
+
+REFERENCE = TypeAdapter(List[Task])
+
+
+@pytest.fixture(params=["orjson", "pydantic"])
+def encoder(request, monkeypatch):
+    """Exécute le test avec orjson puis avec le repli pydantic-core."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def seeded(client):
+    client.post("/tasks/bulk", json=[
+        {"title": "Accentué é ✓", "description": "ligne\n\"citée\"", "priority": "high",
+         "assignee": "alice", "due_date": datetime(2030, 1, 2, 3, 4, 5, 678901).isoformat()},
+        {"title": "Sans rien"},
+    ])
+
+
+def test_task_fields_match_response_model():
+    assert TASK_FIELDS == list(Task.model_fields)
+
+
+@pytest.mark.usefixtures("seeded")
+def test_dump_rows_is_byte_identical_to_model_validation(encoder, sync_engine):
+    with Session(sync_engine) as session:
+        tasks = session.scalars(select(TaskModel).order_by(TaskModel.id)).all()
+        rows = session.execute(select(*TASK_COLUMNS).order_by(TaskModel.id)).all()
+        expected = REFERENCE.dump_json(REFERENCE.validate_python(tasks, from_attributes=True))
+
+    assert dump_rows(rows) == expected
+
+
+@pytest.mark.usefixtures("seeded")
+def test_list_endpoint_with_either_encoder(encoder, client):
+    # même created_at pour tout le lot : l'ordre dépend des ids
+    tasks = sorted(client.get("/tasks").json(), key=lambda task: task["title"])
+
+    assert [task["title"] for task in tasks] == ["Accentué é ✓", "Sans rien"]
+    assert tasks[0]["due_date"] == "2030-01-02T03:04:05.678901"
+    assert "version" not in tasks[0]
+    projected = client.get("/tasks?fields=title,priority").json()
+    assert sorted(projected, key=lambda task: task["title"]) == [
+        {"title": "Accentué é ✓", "priority": "high"},
+        {"title": "Sans rien", "priority": "medium"},
+    ]
+
+
+def test_repeated_fields_are_returned_once(client):
+    task = client.post("/tasks", json={"title": "Doublon", "priority": "low"}).json()
+
+    projected = client.get("/tasks?fields=id,priority,id").json()
+
+    assert projected == [{"id": task["id"], "priority": "low"}]
+
+
+def test_openapi_still_documents_the_response_model(client):
+    schema = app.openapi()["paths"]["/tasks"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    assert schema == {"type": "array", "items": {"$ref": "#/components/schemas/Task"}, "title": "Response Get Tasks Tasks Get"}
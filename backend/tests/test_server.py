@@ -0,0 +1,85 @@
+"""
+Tests du lanceur de production (src/server.py) et de l'initialisation unique.
+"""
+
+import os
+
+import pytest
+
+from src import app as app_module
+from src import database, server
+
+
+def test_prepare_database_runs_init_once_and_disables_it_in_workers(monkeypatch):
+    calls = []
+
+    async def fake_init_db():
+        calls.append("init")
+
+    async def fake_close_db():
+        calls.append("close")
+
+    monkeypatch.setattr(server, "init_db", fake_init_db)
+    monkeypatch.setattr(server, "close_db", fake_close_db)
+    monkeypatch.setenv("DB_INIT_ON_STARTUP", "true")
+    monkeypatch.setattr(database, "INIT_ON_STARTUP", True)
+    monkeypatch.setattr(app_module, "INIT_ON_STARTUP", True)
+
+    server.prepare_database()
+
+    # pool vidé avant le démarrage des workers
+    assert calls == ["init", "close"]
+    assert os.environ["DB_INIT_ON_STARTUP"] == "false"
+    # WEB_CONCURRENCY=1 : l'application servie dans ce processus ne relance pas init_db
+    assert database.INIT_ON_STARTUP is False and app_module.INIT_ON_STARTUP is False
+
+
+def test_lifespan_skips_init_db_when_disabled(monkeypatch, request):
+    async def fail():
+        raise AssertionError("init_db must not run in workers")
+
+    monkeypatch.setattr(app_module, "INIT_ON_STARTUP", False)
+    monkeypatch.setattr(app_module, "init_db", fail)
+
+    # le client (et donc le lifespan) démarre après les remplacements
+    client = request.getfixturevalue("client")
+    assert client.get("/health/live").status_code == 200
+
+
+@pytest.mark.parametrize("installed", [True, False])
+def test_server_options_use_uvloop_and_httptools_when_installed(monkeypatch, installed):
+    monkeypatch.setattr(server, "_installed", lambda module: installed)
+
+    options = server.server_options()
+
+    assert options["loop"] == ("uvloop" if installed else "asyncio")
+    assert options["http"] == ("httptools" if installed else "h11")
+    assert options["workers"] == server.WORKERS
+    assert options["timeout_graceful_shutdown"] == server.GRACEFUL_TIMEOUT
+
+
+@pytest.fixture
+def local_backends(monkeypatch):
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    monkeypatch.delenv("EVENTS_BROKER", raising=False)
+    monkeypatch.delenv("SERVER_ALLOW_LOCAL_STATE", raising=False)
+    return monkeypatch
+
+
+def test_several_workers_need_shared_cache_and_events(local_backends):
+    server.check_workers(1)
+    with pytest.raises(RuntimeError, match="CACHE_BACKEND=memory, EVENTS_BROKER=memory"):
+        server.check_workers(2)
+
+    local_backends.setenv("CACHE_BACKEND", "none")
+    local_backends.setenv("EVENTS_BROKER", "redis")
+    server.check_workers(4)
+
+
+def test_local_state_can_be_allowed_with_a_warning(local_backends, caplog):
+    local_backends.setenv("CACHE_BACKEND", "redis")
+    local_backends.setenv("SERVER_ALLOW_LOCAL_STATE", "true")
+
+    server.check_workers(2)
+
+    assert "EVENTS_BROKER=memory" in caplog.text
@@ -0,0 +1,67 @@
+"""
+Tests de GET /tasks/stats (compteurs du tableau de bord).
+"""
+
+from datetime import datetime, timedelta
+
+
+def test_stats_on_empty_database(client):
+    response = client.get("/tasks/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 0,
+        "by_status": {"todo": 0, "in_progress": 0, "done": 0},
+        "by_priority": {"low": 0, "medium": 0, "high": 0},
+        "by_assignee": {},
+        "unassigned": 0,
+        "overdue": 0,
+        "archived": 0,
+    }
+
+
+def test_stats_counts(client):
+    past = (datetime.now() - timedelta(days=2)).isoformat()
+    future = (datetime.now() + timedelta(days=2)).isoformat()
+    client.post("/tasks/bulk", json=[
+        {"title": "A", "status": "todo", "priority": "high", "assignee": "alice", "due_date": past},
+        {"title": "B", "status": "done", "priority": "high", "assignee": "alice", "due_date": past},
+        {"title": "C", "status": "in_progress", "priority": "low", "assignee": "bob", "due_date": future},
+        {"title": "D"},
+    ])
+
+    stats = client.get("/tasks/stats").json()
+
+    assert stats["total"] == 4
+    assert stats["by_status"] == {"todo": 2, "in_progress": 1, "done": 1}
+    assert stats["by_priority"] == {"low": 1, "medium": 1, "high": 2}
+    assert stats["by_assignee"] == {"alice": 2, "bob": 1}
+    assert stats["unassigned"] == 1
+    # B est en retard mais terminée
+    assert stats["overdue"] == 1
+
+
+def test_stats_are_refreshed_after_writes(client, sql_statements):
+    task_id = client.post("/tasks", json={"title": "A"}).json()["id"]
+    assert client.get("/tasks/stats").json()["by_status"]["todo"] == 1
+
+    # deuxième lecture servie par le cache
+    before = len(sql_statements)
+    client.get("/tasks/stats")
+    assert len(sql_statements) == before
+
+    client.put(f"/tasks/{task_id}", json={"status": "done"})
+    assert client.get("/tasks/stats").json()["by_status"] == {"todo": 0, "in_progress": 0, "done": 1}
+
+
+def test_stats_use_group_by_not_row_transfer(client, sql_statements):
+    client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(10)])
+    sql_statements.clear()
+
+    client.get("/tasks/stats")
+
+    selects = [s for s, _ in sql_statements if s.lstrip().startswith("SELECT") and "count(" in s]
+    assert sum("GROUP BY" in s for s in selects) == 3
+    assert sum("due_date <" in s for s in selects) == 1
+    # aucune ligne de tâche n'est lue
+    assert not [s for s, _ in sql_statements if "tasks.title" in s]
@@ -30,6 +30,27 @@ describe('API Module', () => {
     expect(tasks[0].title).toBe('Test Task');
   });
 
+  /**
+   * GET /tasks est paginé : getTasks suit X-Next-Cursor jusqu'à la dernière page
+   */
+  it('follows the next cursor to fetch every page', async () => {
+    const page = (tasks: object[], next: string | null) => ({
+      ok: true,
+      headers: new Headers(next ? { 'X-Next-Cursor': next } : {}),
+      json: () => Promise.resolve(tasks),
+    });
+    const fetchMock = vi.fn()
+      .mockResolvedValueOnce(page([{ id: 1, title: 'Page 1', status: 'todo' }], 'abc'))
+      .mockResolvedValueOnce(page([{ id: 2, title: 'Page 2', status: 'todo' }], null));
+    (globalThis as any).fetch = fetchMock;
+
+    const tasks = await api.getTasks('todo');
+
+    expect(tasks.map((task) => task.title)).toEqual(['Page 1', 'Page 2']);
+    expect(fetchMock).toHaveBeenCalledTimes(2);
+    expect(fetchMock.mock.calls[1][0]).toBe('/api/tasks?status=todo&cursor=abc');
+  });
+
   /**
    * Test 2 : Vérifier que l'API peut créer des tâches
    * Montre comment tester les requêtes POST
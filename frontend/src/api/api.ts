@@ -3,8 +3,8 @@ import { Task, TaskCreate, TaskUpdate, TaskStatus, TaskPriority } from '../types
 // API Base URL - use environment variable in production or proxy in development
 const API_BASE = import.meta.env.VITE_API_URL || '/api';
 
-// Helper function for API calls
-async function apiRequest<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
+// Helper function for API calls (throws on HTTP errors)
+async function apiFetch(endpoint: string, options: RequestInit = {}): Promise<Response> {
   const url = `${API_BASE}${endpoint}`;
 
   const response = await fetch(url, {
@@ -19,12 +19,18 @@ async function apiRequest<T>(endpoint: string, options: RequestInit = {}): Promi
     throw new Error(`API error: ${response.status} ${response.statusText}`);
   }
 
+  return response;
+}
+
+async function apiRequest<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
+  const response = await apiFetch(endpoint, options);
   return response.json();
 }
 
 // Task API functions
 export const api = {
   // Get all tasks with optional filters
+  // GET /tasks returns one page at a time: follow X-Next-Cursor until the last page
   async getTasks(
     status?: TaskStatus,
     priority?: TaskPriority,
@@ -35,10 +41,17 @@ export const api = {
     if (priority) params.append('priority', priority);
     if (assignee) params.append('assignee', assignee);
 
-    const query = params.toString();
-    const endpoint = `/tasks${query ? `?${query}` : ''}`;
+    const tasks: Task[] = [];
+    let cursor: string | null = null;
+    do {
+      if (cursor) params.set('cursor', cursor);
+      const query = params.toString();
+      const response = await apiFetch(`/tasks${query ? `?${query}` : ''}`);
+      tasks.push(...(await response.json()));
+      cursor = response.headers?.get('X-Next-Cursor') ?? null;
+    } while (cursor);
 
-    return apiRequest<Task[]>(endpoint);
+    return tasks;
   },
 
   // Get single task